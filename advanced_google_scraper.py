@@ -12,6 +12,7 @@ from flask import Flask, request, jsonify
 from dotenv import load_dotenv
 from yelp_analyzer import GooglePlacesReviewAnalyzer
 from utils import search_businesses
+import places_client
 import random
 
 # Load API key
@@ -676,7 +677,7 @@ def attempt_advanced_google_scraping(user_name, known_review=None):
                 # Add random delay to simulate human behavior
                 time.sleep(random.uniform(2, 5))
                 
-                response = requests.get(url, headers=headers, timeout=15)
+                response = places_client.get_http_session().get(url, headers=headers, timeout=15)
                 scraping_log.append(f"📡 Response: {response.status_code}")
                 
                 if response.status_code == 200:
@@ -0,0 +1,153 @@
+"""
+Asyncio front-end for Places API lookups with bounded concurrency
+Fans many searches / detail lookups out at once while still going through the shared
+pooled session, so the process rate limiter and host-wide quota keep applying. Every
+lookup runs on one process-wide pool of ASYNC_CONCURRENCY threads, so concurrent
+callers (e.g. web requests) share the limit instead of each getting their own
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from config import ASYNC_CONCURRENCY
+import utils
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Get the process-wide thread pool that runs every bounded lookup
+    """
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=max(1, ASYNC_CONCURRENCY), thread_name_prefix='places')
+    return _executor
+
+
+async def gather_bounded(func: Callable, arg_tuples: Iterable[Tuple], concurrency: int = None) -> List:
+    """
+    Run a blocking function over many argument tuples with at most `concurrency` in flight
+
+    Calls run on the process-wide pool from get_executor(), so all callers together
+    never have more than ASYNC_CONCURRENCY calls in flight.
+
+    Args:
+        func: Blocking function to call
+        arg_tuples: Positional arguments for each call
+        concurrency: Maximum concurrent calls of this gather. Defaults to ASYNC_CONCURRENCY
+
+    Returns:
+        Results in the same order as arg_tuples
+    """
+    concurrency = max(1, concurrency or ASYNC_CONCURRENCY)
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    executor = get_executor()
+
+    async def run(args):
+        async with semaphore:
+            return await loop.run_in_executor(executor, functools.partial(func, *args))
+
+    return await asyncio.gather(*(run(args) for args in arg_tuples))
+
+
+async def search_businesses_async(query: str, location: str, api_key: str = None) -> List[Dict]:
+    """
+    Async counterpart of utils.search_businesses
+    """
+    results = await gather_bounded(utils.search_businesses, [(query, location, api_key)], 1)
+    return results[0]
+
+
+async def get_business_details_async(place_id: str, api_key: str = None) -> Optional[Dict]:
+    """
+    Async counterpart of utils.get_business_details
+    """
+    results = await gather_bounded(utils.get_business_details, [(place_id, api_key)], 1)
+    return results[0]
+
+
+async def search_many_async(queries: Sequence[Tuple[str, str]], api_key: str = None,
+                            concurrency: int = None) -> List[List[Dict]]:
+    """
+    Search for many (query, location) pairs concurrently
+
+    Args:
+        queries: List of (query, location) tuples
+        api_key: Google Places API key
+        concurrency: Maximum concurrent requests
+
+    Returns:
+        One result list per query, in input order
+    """
+    return await gather_bounded(utils.search_businesses,
+                                [(query, location, api_key) for query, location in queries],
+                                concurrency)
+
+
+async def get_details_many_async(place_ids: Sequence[str], api_key: str = None,
+                                 concurrency: int = None) -> Dict[str, Optional[Dict]]:
+    """
+    Get details for many place IDs concurrently
+
+    Args:
+        place_ids: Google Places place IDs
+        api_key: Google Places API key
+        concurrency: Maximum concurrent requests
+
+    Returns:
+        Dictionary mapping place ID to details (None on error)
+    """
+    results = await gather_bounded(utils.get_business_details,
+                                   [(place_id, api_key) for place_id in place_ids],
+                                   concurrency)
+    return dict(zip(place_ids, results))
+
+
+async def get_reviews_many_async(analyzer, place_ids: Sequence[str],
+                                 concurrency: int = None) -> Dict[str, List[Dict]]:
+    """
+    Async counterpart of GooglePlacesReviewAnalyzer.get_business_reviews for many places
+
+    Args:
+        analyzer: GooglePlacesReviewAnalyzer instance
+        place_ids: Google Places place IDs
+        concurrency: Maximum concurrent requests
+
+    Returns:
+        Dictionary mapping place ID to its formatted reviews
+    """
+    results = await gather_bounded(analyzer.get_business_reviews,
+                                   [(place_id,) for place_id in place_ids],
+                                   concurrency)
+    return dict(zip(place_ids, results))
+
+
+def search_many(queries: Sequence[Tuple[str, str]], api_key: str = None,
+                concurrency: int = None) -> List[List[Dict]]:
+    """
+    Sync wrapper around search_many_async for CLI scripts
+    """
+    return asyncio.run(search_many_async(queries, api_key, concurrency))
+
+
+def get_details_many(place_ids: Sequence[str], api_key: str = None,
+                     concurrency: int = None) -> Dict[str, Optional[Dict]]:
+    """
+    Sync wrapper around get_details_many_async for CLI scripts
+    """
+    return asyncio.run(get_details_many_async(place_ids, api_key, concurrency))
+
+
+def get_reviews_many(analyzer, place_ids: Sequence[str], concurrency: int = None) -> Dict[str, List[Dict]]:
+    """
+    Sync wrapper around get_reviews_many_async for CLI scripts
+    """
+    return asyncio.run(get_reviews_many_async(analyzer, place_ids, concurrency))
@@ -0,0 +1,269 @@
+"""
+Checkpointed batch analysis of many businesses
+Reviews and reviewer histories are fetched on a thread pool (metered by the shared rate
+limiter and quota), scoring runs on a process pool, and every finished business is
+checkpointed until the whole batch is done, so an interrupted or failing batch resumes
+where it stopped
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from config import BATCH_DB_PATH, BATCH_FETCH_WORKERS, BATCH_PROCESSES
+from incremental_analysis import AnalysisState
+from review_engine import low_rating_reviewer_keys, score_business
+from sqlite_store import SQLiteStore
+
+
+NO_REVIEWS = {"error": "No reviews found for this business"}
+
+
+def read_place_ids(text: str) -> List[str]:
+    """
+    Parse a batch file: one place ID per line, blank lines and # comments ignored
+
+    Returns:
+        Distinct place IDs in file order
+    """
+    lines = (line.split('#', 1)[0].strip() for line in text.splitlines())
+    return list(dict.fromkeys(line for line in lines if line))
+
+
+def job_id_for(place_ids: Sequence[str]) -> str:
+    """
+    Identify a batch by its place IDs, so running the same unfinished list again resumes it
+    """
+    return hashlib.sha1('\n'.join(place_ids).encode('utf-8')).hexdigest()[:16]
+
+
+def _score(place_id: str, reviews: List[Dict], histories: Dict[str, List[Dict]],
+           known_stats: Dict[str, Optional[Dict]] = None) -> Dict:
+    # Runs in a worker process; histories (or reviewer statistics) were fetched by the parent
+    return score_business(place_id, reviews, histories.__getitem__, key_column='reviewer_id', image_url=True,
+                          known_stats=known_stats)
+
+
+class BatchStore(SQLiteStore):
+    """
+    Per-job checkpoints of finished businesses
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            job TEXT NOT NULL,
+            place_id TEXT NOT NULL,
+            data TEXT NOT NULL,
+            finished REAL NOT NULL,
+            PRIMARY KEY (job, place_id)
+        );
+    """
+
+    def __init__(self, db_path: str = BATCH_DB_PATH):
+        super().__init__(db_path)
+
+    def finished(self, job: str) -> Dict[str, Dict]:
+        """
+        Get every checkpointed result of a job
+
+        Returns:
+            Dictionary of place ID to analysis results
+        """
+        rows = self._connect().execute("SELECT place_id, data FROM results WHERE job = ?", (job,))
+        return {place_id: json.loads(data) for place_id, data in rows}
+
+    def save(self, job: str, place_id: str, results: Dict):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO results (job, place_id, data, finished) VALUES (?, ?, ?, ?)",
+            (job, place_id, json.dumps(results), time.time())
+        )
+
+    def clear_job(self, job: str):
+        self._connect().execute("DELETE FROM results WHERE job = ?", (job,))
+
+
+class BatchAnalyzer:
+    """
+    Analyzes many businesses with a GooglePlacesReviewAnalyzer
+    """
+
+    def __init__(self, analyzer, store: BatchStore, processes: int = BATCH_PROCESSES,
+                 fetch_workers: int = BATCH_FETCH_WORKERS, state: AnalysisState = None):
+        """
+        Args:
+            analyzer: GooglePlacesReviewAnalyzer used for all API calls
+            store: Checkpoint store
+            processes: Scoring processes; 1 or less scores in this process
+            fetch_workers: Businesses fetched concurrently
+            state: Previous analyses for incremental re-analysis, None to analyze from scratch
+        """
+        self.analyzer = analyzer
+        self.store = store
+        self.processes = processes
+        self.fetch_workers = fetch_workers
+        self.state = state
+
+        self._lock = threading.Lock()
+        self.resumed = 0
+        self.analyzed = 0
+        self.failed = 0
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _fetch(self, place_id: str) -> Tuple[List[Dict], Dict, Optional[Dict], Optional[Dict]]:
+        """
+        Fetch what scoring a business needs
+
+        Returns:
+            Tuple of (reviews, reviewer histories, reviewer statistics that need no history,
+            previous results when the reviews are unchanged)
+        """
+        # A failed fetch must not look like a business without reviews, or it would be
+        # checkpointed and never retried
+        reviews = self.analyzer.get_business_reviews(place_id, raise_errors=True)
+        if not reviews or self.state is None:
+            low_keys = low_rating_reviewer_keys(reviews)
+            # Reviewers with running statistics in the reviewer index need no history
+            known_stats = self.analyzer.get_user_stats(low_keys) if low_keys else {}
+            histories = {key: self.analyzer.get_user_reviews(key) for key in low_keys if key not in known_stats}
+            return reviews, histories, known_stats, None
+        unchanged, known_stats = self.state.prepare(place_id, reviews, self.analyzer.get_user_reviews,
+                                                    get_user_stats=self.analyzer.get_user_stats)
+        return reviews, {}, known_stats, unchanged
+
+    def run(self, place_ids: Sequence[str], job: str) -> Iterator[Tuple[str, Dict]]:
+        """
+        Analyze businesses, yielding each result as it finishes
+
+        Businesses already checkpointed for this job are yielded first without any API
+        call. A business that raises is yielded with an 'error' result and is not
+        checkpointed, so it is retried when the job is resumed. Once every business has
+        finished, the job's checkpoints are dropped, so running it again analyzes afresh.
+
+        Args:
+            place_ids: Google Places place IDs
+            job: Job ID from job_id_for()
+
+        Yields:
+            (place_id, analysis results) in completion order
+        """
+        finished = self.store.finished(job)
+        for place_id in place_ids:
+            if place_id in finished:
+                self.resumed += 1
+                yield place_id, finished[place_id]
+        todo = iter([place_id for place_id in place_ids if place_id not in finished])
+
+        fetch_pool = ThreadPoolExecutor(max_workers=self.fetch_workers)
+        # forkserver: worker processes must not be forked from this threaded process
+        score_pool = ProcessPoolExecutor(max_workers=self.processes,
+                                         mp_context=multiprocessing.get_context('forkserver')) \
+            if self.processes > 1 else None
+        pending = {}
+        failed = 0
+
+        def fill():
+            # Bound the businesses held in memory between fetching and checkpointing
+            while len(pending) < self.fetch_workers * 2:
+                place_id = next(todo, None)
+                if place_id is None:
+                    return
+                pending[fetch_pool.submit(self._fetch, place_id)] = ('fetch', place_id, None)
+
+        def score(place_id, reviews, histories, known_stats) -> Future:
+            if score_pool is not None:
+                return score_pool.submit(_score, place_id, reviews, histories, known_stats)
+            future = Future()
+            try:
+                future.set_result(_score(place_id, reviews, histories, known_stats))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        try:
+            fill()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, place_id, scored = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        failed += 1
+                        self._count('failed')
+                        yield place_id, {'error': f"{type(e).__name__}: {e}"}
+                        continue
+
+                    if kind == 'fetch':
+                        reviews, histories, known_stats, unchanged = result
+                        if unchanged is not None:
+                            result = unchanged
+                        elif reviews:
+                            pending[score(place_id, reviews, histories, known_stats)] = \
+                                ('score', place_id, (reviews, known_stats))
+                            continue
+                        else:
+                            result = dict(NO_REVIEWS)
+                    elif self.state is not None:
+                        self.state.record(place_id, *scored, result)
+
+                    self.store.save(job, place_id, result)
+                    self._count('analyzed')
+                    yield place_id, result
+                fill()
+            if not failed:
+                self.store.clear_job(job)
+        finally:
+            fetch_pool.shutdown(wait=False, cancel_futures=True)
+            if score_pool is not None:
+                score_pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'resumed': self.resumed, 'analyzed': self.analyzed, 'failed': self.failed}
+
+
+def analyze_many(analyzer, place_ids: Sequence[str], job: str = None, store: BatchStore = None,
+                 processes: int = BATCH_PROCESSES, restart: bool = False,
+                 state: AnalysisState = None) -> Dict[str, Dict]:
+    """
+    Analyze many businesses, resuming a previous run of the same batch
+
+    Args:
+        analyzer: GooglePlacesReviewAnalyzer
+        place_ids: Google Places place IDs
+        job: Checkpoint job ID. Defaults to one derived from the place IDs
+        store: Checkpoint store. Defaults to one at BATCH_DB_PATH
+        processes: Scoring processes
+        restart: Discard the job's checkpoints first
+        state: Previous analyses for incremental re-analysis
+
+    Returns:
+        Dictionary of place ID to analysis results (or {'error': ...}), in input order
+    """
+    place_ids = list(dict.fromkeys(place_ids))
+    job = job or job_id_for(place_ids)
+    store = store or BatchStore()
+    if restart:
+        store.clear_job(job)
+
+    results = dict(BatchAnalyzer(analyzer, store, processes=processes, state=state).run(place_ids, job))
+    return {place_id: results[place_id] for place_id in place_ids}
+
+
+def write_results(results: Dict[str, Dict], path: str):
+    """
+    Write the consolidated batch results as JSON, replacing the file atomically
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
@@ -2,10 +2,12 @@
 Beautiful Web Interface for Business Bad Review Finder - Fixed CSS Issue
 """
 import os
+from functools import partial
 from flask import Flask, request
 from dotenv import load_dotenv
 from yelp_analyzer import GooglePlacesReviewAnalyzer
 from utils import search_businesses
+from branch_comparison import analyze_branches, parse_branch_count, render_branch_comparison, render_branch_options
 
 # Load API key
 load_dotenv()
@@ -78,7 +80,7 @@ def get_base_html(title, content):
                 font-size: 1.1em;
             }}
             
-            input[type="text"] {{
+            input[type="text"], select {{
                 width: 100%;
                 padding: 15px 20px;
                 border: 2px solid #e1e8ed;
@@ -87,7 +89,7 @@ def get_base_html(title, content):
                 transition: all 0.3s ease;
             }}
             
-            input[type="text"]:focus {{
+            input[type="text"]:focus, select:focus {{
                 outline: none;
                 border-color: #667eea;
                 box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.1);
@@ -335,6 +337,11 @@ def index():
                 <input type="text" id="location" name="location" placeholder="e.g., Los Angeles, CA or New York, NY" required>
             </div>
             
+            <div class="form-group">
+                <label for="branches">Branches</label>
+                ''' + render_branch_options() + '''
+            </div>
+            
             <button type="submit" class="search-btn">🔍 Analyze Reviews</button>
         </form>
     </div>
@@ -346,6 +353,7 @@ def index():
 def search():
     business_name = request.form.get('business_name', '').strip()
     location = request.form.get('location', '').strip()
+    branch_count = parse_branch_count(request.form.get('branches'))
     
     if not business_name or not location:
         error_content = '''
@@ -391,16 +399,18 @@ def search():
             '''
             return get_base_html("Error - Business Review Analyzer", error_content)
         
-        # Get reviews for the first business
-        business = businesses[0]
+        # Get reviews for the top matches concurrently (a failed fetch shows as an error in
+        # the comparison, not as 0 reviews); details below are for the first
         analyzer = GooglePlacesReviewAnalyzer()
-        reviews = analyzer.get_business_reviews(business['place_id'])
+        branches = analyze_branches(businesses, partial(analyzer.get_business_reviews, raise_errors=True), branch_count)
+        business = businesses[0]
+        reviews = branches[0]['reviews']
         
         # Filter bad reviews
-        bad_reviews = [review for review in reviews if review['rating'] < 4]
-        total_reviews = len(reviews)
-        bad_reviews_count = len(bad_reviews)
-        bad_percentage = round((bad_reviews_count / total_reviews * 100), 1) if total_reviews > 0 else 0
+        bad_reviews = branches[0]['bad_reviews']
+        total_reviews = branches[0]['total_reviews']
+        bad_reviews_count = branches[0]['bad_reviews_count']
+        bad_percentage = branches[0]['bad_percentage']
         
         # Build results content
         results_content = f'''
@@ -410,6 +420,7 @@ def search():
         </div>
         
         <div class="results-section">
+            {render_branch_comparison(branches)}
             <div class="business-card">
                 <div class="business-name">{business['name']}</div>
                 <div class="business-info">
@@ -0,0 +1,106 @@
+"""
+Benchmark pooled vs. unpooled Places API round trips against the local fake Places server
+
+Runs a textsearch -> details round trip many times, once with a bare requests.get per
+call (the old behaviour) and once through the shared places_client session, and prints
+p50/p95 latency for both. The fake server adds a delay on every new connection to
+emulate the TCP + TLS handshake cost of the real API.
+
+Usage:
+    python benchmark_places_client.py --rounds 200 --connect-delay-ms 30
+"""
+import argparse
+import statistics
+import time
+
+import requests
+
+from fake_places_server import start_server
+
+
+def unpooled_round_trip(base_url: str):
+    """
+    One search -> details round trip the way the code used to do it
+    """
+    search = requests.get(f"{base_url}/maps/api/place/textsearch/json",
+                          params={'query': 'cafe in vancouver', 'key': 'bench'})
+    search.raise_for_status()
+    place_id = search.json()['results'][0]['place_id']
+    details = requests.get(f"{base_url}/maps/api/place/details/json",
+                           params={'place_id': place_id, 'key': 'bench'})
+    details.raise_for_status()
+    return details.json()
+
+
+def pooled_round_trip():
+    """
+    One search -> details round trip through the shared pooled client
+    """
+    import places_client
+
+    search = places_client.request_json('place/textsearch/json',
+                                        {'query': 'cafe in vancouver'}, api_key='bench')
+    place_id = search['results'][0]['place_id']
+    return places_client.request_json('place/details/json',
+                                      {'place_id': place_id}, api_key='bench')
+
+
+def measure(func, rounds: int):
+    """
+    Time a round-trip function
+
+    Returns:
+        List of latencies in milliseconds
+    """
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarize(label: str, latencies):
+    """
+    Print p50/p95 for a list of latencies
+    """
+    ordered = sorted(latencies)
+    p50 = statistics.median(ordered)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{label:<10} p50 {p50:8.2f} ms   p95 {p95:8.2f} ms")
+    return p50
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pooled vs unpooled Places API round trips')
+    parser.add_argument('--rounds', type=int, default=200, help='Number of search -> details round trips')
+    parser.add_argument('--connect-delay-ms', type=float, default=20.0,
+                        help='Delay the fake server adds to every new connection')
+    args = parser.parse_args()
+
+    server, base_url = start_server(connect_delay_ms=args.connect_delay_ms)
+
+    # Point the shared client at the fake server, lift the limits and bypass the cache so only
+    # connection handling is measured
+    import places_client
+    from rate_limiter import configure_rate_limiter
+    places_client.MAPS_API_BASE_URL = base_url
+    places_client.QUOTA_ENABLED = False
+    places_client.RESPONSE_CACHE_ENABLED = False
+    configure_rate_limiter(rate=1e6, burst=10**6)
+
+    try:
+        print(f"Fake Places server: {base_url} (connect delay {args.connect_delay_ms} ms)")
+        print(f"Rounds: {args.rounds}")
+        print("-" * 50)
+        unpooled = summarize('unpooled', measure(lambda: unpooled_round_trip(base_url), args.rounds))
+        pooled = summarize('pooled', measure(pooled_round_trip, args.rounds))
+        print("-" * 50)
+        print(f"p50 speedup: {unpooled / pooled:.1f}x")
+    finally:
+        places_client.close_session()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
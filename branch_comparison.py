@@ -0,0 +1,152 @@
+"""
+Side-by-side review analysis of the top matching businesses for a search
+Chains have many branches matching the same query; reviews for the top N are fetched
+concurrently, so comparing them costs about one details round trip instead of N
+"""
+import asyncio
+from typing import Callable, Dict, List, Sequence
+from config import BRANCH_COMPARE_MAX
+from async_places_client import gather_bounded
+
+
+# Reviews under this many stars count as bad, as on the results pages
+BAD_REVIEW_BELOW = 4
+
+
+def parse_branch_count(value, default: int = 1) -> int:
+    """
+    Read the number of branches to compare from a form value
+
+    Args:
+        value: Submitted value, may be missing or invalid
+        default: Count to use when the value is unusable
+
+    Returns:
+        Count between 1 and BRANCH_COMPARE_MAX
+    """
+    try:
+        count = int(value)
+    except (TypeError, ValueError):
+        count = default
+    return max(1, min(count, BRANCH_COMPARE_MAX))
+
+
+def summarize_branch(business: Dict, reviews: List[Dict], error: str = None) -> Dict:
+    """
+    Review statistics for one business
+
+    Args:
+        business: Search result for the business
+        reviews: Its reviews (anything with a 'rating' key)
+        error: Why reviews could not be fetched, if they couldn't
+
+    Returns:
+        Dictionary with the business, its reviews, bad reviews and percentages
+    """
+    bad_reviews = [review for review in reviews if review.get('rating', 5) < BAD_REVIEW_BELOW]
+    total_reviews = len(reviews)
+    return {
+        'business': business,
+        'reviews': reviews,
+        'bad_reviews': bad_reviews,
+        'total_reviews': total_reviews,
+        'bad_reviews_count': len(bad_reviews),
+        'bad_percentage': round((len(bad_reviews) / total_reviews * 100), 1) if total_reviews > 0 else 0,
+        'average_rating': round(sum(r.get('rating', 0) for r in reviews) / total_reviews, 1) if total_reviews else None,
+        'error': error,
+    }
+
+
+def analyze_branches(businesses: Sequence[Dict], get_reviews: Callable[[str], List[Dict]],
+                     count: int = 1, concurrency: int = None) -> List[Dict]:
+    """
+    Fetch and summarize reviews for the top matches concurrently
+
+    A branch whose reviews fail to load is reported with an error instead of failing
+    the others.
+
+    Args:
+        businesses: Search results in ranking order (each with 'place_id')
+        get_reviews: Blocking function returning the reviews for a place ID
+        count: How many of the top matches to analyze
+        concurrency: Maximum concurrent lookups. Defaults to ASYNC_CONCURRENCY
+
+    Returns:
+        Branch summaries from summarize_branch(), in ranking order
+    """
+    top = list(businesses[:max(1, count)])
+
+    def fetch(place_id):
+        try:
+            return get_reviews(place_id) or [], None
+        except Exception as e:
+            return [], str(e)
+
+    results = asyncio.run(gather_bounded(fetch, [(b['place_id'],) for b in top], concurrency))
+    return [summarize_branch(business, reviews, error) for business, (reviews, error) in zip(top, results)]
+
+
+def render_branch_options(selected: int = 1) -> str:
+    """
+    HTML <select> for the number of branches to compare, for the search forms
+    """
+    options = ''.join(
+        f'<option value="{n}"{" selected" if n == selected else ""}>'
+        f'{"Top match only" if n == 1 else f"Compare top {n} branches"}</option>'
+        for n in sorted({1, 3, 5, BRANCH_COMPARE_MAX})
+    )
+    return f'<select id="branches" name="branches">{options}</select>'
+
+
+def render_branch_comparison(branches: List[Dict]) -> str:
+    """
+    HTML table comparing branches, self-styled so it fits any of the front-ends
+
+    Args:
+        branches: Branch summaries from analyze_branches()
+
+    Returns:
+        HTML fragment, empty for a single branch
+    """
+    if len(branches) < 2:
+        return ''
+
+    worst = max(range(len(branches)), key=lambda i: branches[i]['bad_percentage'])
+    rows = ''
+    for index, branch in enumerate(branches):
+        business = branch['business']
+        highlight = ' style="background: #fff3cd;"' if index == worst and branch['bad_reviews_count'] else ''
+        reviews_cell = f"<em>{branch['error']}</em>" if branch['error'] else branch['total_reviews']
+        rows += f'''
+                <tr{highlight}>
+                    <td style="padding: 10px; border-bottom: 1px solid #eee;">{index + 1}</td>
+                    <td style="padding: 10px; border-bottom: 1px solid #eee;"><strong>{business.get('name', 'Unknown')}</strong><br>
+                        <small style="color: #666;">{business.get('formatted_address', '')}</small></td>
+                    <td style="padding: 10px; border-bottom: 1px solid #eee;">{business.get('rating', 'N/A')} ⭐</td>
+                    <td style="padding: 10px; border-bottom: 1px solid #eee;">{business.get('user_ratings_total', 'N/A')}</td>
+                    <td style="padding: 10px; border-bottom: 1px solid #eee;">{reviews_cell}</td>
+                    <td style="padding: 10px; border-bottom: 1px solid #eee;">{branch['bad_reviews_count']}</td>
+                    <td style="padding: 10px; border-bottom: 1px solid #eee;">{branch['bad_percentage']}%</td>
+                </tr>
+        '''
+
+    return f'''
+        <div style="background: white; padding: 20px; border-radius: 10px; margin-bottom: 20px; overflow-x: auto;">
+            <h2 style="margin-bottom: 15px;">🏢 Branch Comparison ({len(branches)} locations)</h2>
+            <table style="width: 100%; border-collapse: collapse; text-align: left;">
+                <thead>
+                    <tr style="background: #667eea; color: white;">
+                        <th style="padding: 10px;">#</th>
+                        <th style="padding: 10px;">Branch</th>
+                        <th style="padding: 10px;">Rating</th>
+                        <th style="padding: 10px;">Total Reviews</th>
+                        <th style="padding: 10px;">Reviews Analyzed</th>
+                        <th style="padding: 10px;">Bad Reviews</th>
+                        <th style="padding: 10px;">Bad Review Rate</th>
+                    </tr>
+                </thead>
+                <tbody>{rows}
+                </tbody>
+            </table>
+        </div>
+    '''
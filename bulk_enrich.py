@@ -0,0 +1,354 @@
+"""
+Bulk lead enrichment from a CSV of business names and locations
+Each row is resolved through Text Search and Place Details on a bounded worker pool.
+Finished rows are checkpointed per input file so a crashed job resumes where it stopped,
+and resolved queries are cached across jobs
+"""
+import csv
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from config import BULK_ENRICH_DB_PATH, BULK_ENRICH_WORKERS, LEAD_ENRICH_MAX_AGE
+from lead_finder import build_lead, fetch_contact_details
+from lead_store import LeadStore
+from negative_cache import search_unless_empty
+from search_cache import normalize_text
+from sqlite_store import SQLiteStore
+
+
+OUTPUT_COLUMNS = ['name', 'location', 'place_id', 'matched_name', 'address', 'phone', 'website',
+                  'rating', 'user_ratings_total', 'status']
+
+# Accepted input headers for each field, first match wins
+NAME_HEADERS = ('name', 'business_name', 'business')
+LOCATION_HEADERS = ('location', 'city', 'address')
+
+
+def read_input_rows(text: str) -> List[Tuple[str, str]]:
+    """
+    Parse the uploaded CSV into (name, location) pairs
+
+    Args:
+        text: CSV text with a header row containing a name column and a location column
+
+    Returns:
+        List of (name, location) in file order
+
+    Raises:
+        ValueError: If no name column is found
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    headers = {h.strip().lower().replace(' ', '_'): h for h in (reader.fieldnames or []) if h}
+    name_header = next((headers[h] for h in NAME_HEADERS if h in headers), None)
+    location_header = next((headers[h] for h in LOCATION_HEADERS if h in headers), None)
+    if name_header is None:
+        raise ValueError(f"CSV needs a business name column ({', '.join(NAME_HEADERS)})")
+
+    return [((row.get(name_header) or '').strip(),
+             (row.get(location_header) or '').strip() if location_header else '')
+            for row in reader]
+
+
+def job_id_for(text: str) -> str:
+    """
+    Identify a job by its input, so uploading the same file again within max_age resumes it
+    """
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+def normalize_query(name: str, location: str) -> str:
+    # Same folding as the search cache, so both caches key a query the same way
+    return normalize_text(f"{name} {location}")
+
+
+class EnrichmentStore(SQLiteStore):
+    """
+    Per-job checkpoints of finished rows and a cross-job cache of resolved queries
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS checkpoints (
+            job TEXT NOT NULL,
+            row_number INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            finished REAL NOT NULL,
+            PRIMARY KEY (job, row_number)
+        );
+        CREATE TABLE IF NOT EXISTS resolved (
+            query TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            resolved_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, db_path: str = BULK_ENRICH_DB_PATH, max_age: float = LEAD_ENRICH_MAX_AGE):
+        """
+        Args:
+            db_path: Path to the SQLite database file
+            max_age: Seconds a resolved query or checkpointed row stays reusable
+        """
+        super().__init__(db_path)
+        self.max_age = max_age
+
+    def finished_rows(self, job: str) -> Dict[int, Dict]:
+        """
+        Get every checkpointed row of a job finished within max_age
+
+        Returns:
+            Dictionary of row number to output row
+        """
+        rows = self._connect().execute(
+            "SELECT row_number, data FROM checkpoints WHERE job = ? AND finished >= ?",
+            (job, time.time() - self.max_age)
+        )
+        return {row_number: json.loads(data) for row_number, data in rows}
+
+    def checkpoint(self, job: str, row_number: int, output: Dict):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO checkpoints (job, row_number, data, finished) VALUES (?, ?, ?, ?)",
+            (job, row_number, json.dumps(output), time.time())
+        )
+
+    def cached(self, query: str) -> Optional[Dict]:
+        """
+        Get a fresh resolution of a normalized query
+        """
+        row = self._connect().execute(
+            "SELECT data FROM resolved WHERE query = ? AND resolved_at >= ?",
+            (query, time.time() - self.max_age)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def cache(self, query: str, output: Dict):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO resolved (query, data, resolved_at) VALUES (?, ?, ?)",
+            (query, json.dumps(output), time.time())
+        )
+
+    def clear_job(self, job: str):
+        self._connect().execute("DELETE FROM checkpoints WHERE job = ?", (job,))
+
+
+class BulkEnricher:
+    """
+    Resolves (name, location) rows to enriched leads
+    """
+
+    def __init__(self, gmaps, store: EnrichmentStore, lead_store: Optional[LeadStore] = None,
+                 workers: int = BULK_ENRICH_WORKERS):
+        """
+        Args:
+            gmaps: googlemaps.Client
+            store: Checkpoint and query cache store
+            lead_store: Lead store to reuse contact details from and save leads into
+            workers: Rows resolved concurrently
+        """
+        self.gmaps = gmaps
+        self.store = store
+        self.lead_store = lead_store
+        self.workers = workers
+
+        self._lock = threading.Lock()
+        self.resumed = 0
+        self.cache_hits = 0
+        self.resolved = 0
+        self.failed = 0
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def resolve(self, name: str, location: str) -> Dict:
+        """
+        Resolve one row: best Text Search match, then its contact details
+
+        Args:
+            name: Business name
+            location: City or address, may be empty
+
+        Returns:
+            Output row with OUTPUT_COLUMNS keys; status is 'ok', 'not_found' or 'error: ...'.
+            Errors are not cached or checkpointed, so they are retried on the next run.
+            Only 'ok' rows go in the query cache; empty searches are remembered by the
+            negative cache for NEGATIVE_CACHE_TTL only
+        """
+        output = {column: '' for column in OUTPUT_COLUMNS}
+        output.update(name=name, location=location)
+        if not name:
+            output['status'] = 'not_found'
+            return output
+
+        query = normalize_query(name, location)
+        cached = self.store.cached(query)
+        if cached is not None:
+            self._count('cache_hits')
+            output.update({k: v for k, v in cached.items() if k not in ('name', 'location')})
+            return output
+
+        try:
+            text = f"{name} {location}".strip()
+            results = search_unless_empty(lambda: self.gmaps.places(query=text), text).get('results', [])
+            if not results:
+                output['status'] = 'not_found'
+            else:
+                place = results[0]
+                place_id = place.get('place_id')
+                known = self.lead_store.fresh_contacts(place_id) if self.lead_store is not None else None
+                phone, website = known or fetch_contact_details(self.gmaps, place_id)
+                lead = build_lead(place, phone, website)
+                if self.lead_store is not None:
+                    self.lead_store.save_lead(lead, enriched=known is None, query=query)
+                output.update(place_id=place_id, matched_name=lead['name'], address=lead['address'],
+                              phone=phone, website=website, rating=lead['rating'],
+                              user_ratings_total=lead['total_reviews'], status='ok')
+        except Exception as e:
+            self._count('failed')
+            output['status'] = f"error: {e}"
+            return output
+
+        self._count('resolved')
+        if output['status'] == 'ok':
+            self.store.cache(query, output)
+        return output
+
+    def run(self, rows: List[Tuple[str, str]], job: str) -> Iterator[Dict]:
+        """
+        Enrich rows, yielding output rows in input order
+
+        Rows already checkpointed for this job are yielded without any API call. At most
+        a few batches of rows are in flight, so a large file doesn't queue thousands of
+        pending lookups.
+
+        Args:
+            rows: (name, location) pairs from read_input_rows()
+            job: Job ID from job_id_for()
+
+        Yields:
+            Output row dictionaries
+        """
+        finished = self.store.finished_rows(job)
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        in_flight = deque()
+        window = self.workers * 4
+
+        def drain(limit: int) -> Iterator[Dict]:
+            while len(in_flight) > limit:
+                row_number, future = in_flight.popleft()
+                output = future.result()
+                if not output['status'].startswith('error'):
+                    self.store.checkpoint(job, row_number, output)
+                yield output
+
+        try:
+            for row_number, (name, location) in enumerate(rows):
+                if row_number in finished:
+                    # Keep output in input order behind any rows still in flight
+                    yield from drain(0)
+                    self.resumed += 1
+                    yield finished[row_number]
+                    continue
+                in_flight.append((row_number, executor.submit(self.resolve, name, location)))
+                yield from drain(window)
+            yield from drain(0)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'resumed': self.resumed,
+                'cache_hits': self.cache_hits,
+                'resolved': self.resolved,
+                'failed': self.failed,
+            }
+
+
+def iter_csv(rows: Iterable[Dict]) -> Iterator[str]:
+    """
+    Render output rows as CSV text chunks, header first
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=OUTPUT_COLUMNS, extrasaction='ignore')
+    writer.writeheader()
+    yield buffer.getvalue()
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        yield buffer.getvalue()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_enrichment_store() -> EnrichmentStore:
+    """
+    Get the process-wide enrichment store backed by BULK_ENRICH_DB_PATH
+    """
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = EnrichmentStore()
+    return _store
+
+
+def main():
+    """
+    Enrich a CSV file from the command line
+    """
+    import argparse
+    from config import LEAD_STORE_ENABLED
+    from lead_store import get_lead_store
+    from maps_client import get_maps_client
+
+    parser = argparse.ArgumentParser(description='Add place_id, phone, website and rating to a CSV of businesses')
+    parser.add_argument('input', help="CSV with a 'name' column and optionally a 'location' column")
+    parser.add_argument('--output', '-o', help='Output CSV (default: <input>_enriched.csv)')
+    parser.add_argument('--workers', type=int, default=BULK_ENRICH_WORKERS, help='Rows resolved concurrently')
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start over')
+    parser.add_argument('--api-key', help='Google API key (defaults to GOOGLE_API_KEY)')
+    args = parser.parse_args()
+
+    api_key = args.api_key or os.environ.get('GOOGLE_API_KEY')
+    if not api_key:
+        print("❌ Error: No API key (set GOOGLE_API_KEY or pass --api-key)")
+        return 1
+
+    with open(args.input, encoding='utf-8-sig') as f:
+        text = f.read()
+    rows = read_input_rows(text)
+    job = job_id_for(text)
+    output_path = args.output or f"{os.path.splitext(args.input)[0]}_enriched.csv"
+
+    store = get_enrichment_store()
+    if args.restart:
+        store.clear_job(job)
+    enricher = BulkEnricher(get_maps_client(api_key), store,
+                            lead_store=get_lead_store() if LEAD_STORE_ENABLED else None, workers=args.workers)
+
+    print(f"Enriching {len(rows)} rows (job {job})")
+    start = time.time()
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        for count, chunk in enumerate(iter_csv(enricher.run(rows, job))):
+            f.write(chunk)
+            if count and count % 100 == 0:
+                print(f"  {count}/{len(rows)} rows, {count / (time.time() - start):.1f} rows/s")
+
+    for name, value in enricher.stats().items():
+        print(f"  {name:<12} {value}")
+    print(f"✅ Wrote {output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""
+Record/replay cassettes for HTTP traffic on the shared sessions
+In record mode real responses (Places API and scraper pages) are captured to a
+gzip-compressed cassette file; in replay mode they are served back from it with
+configurable synthetic latency, so whole-pipeline performance runs are deterministic,
+offline and free of quota
+"""
+import atexit
+import base64
+import gzip
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from config import CASSETTE_MODE, CASSETTE_PATH, CASSETTE_LATENCY_MS, CASSETTE_JITTER_MS
+
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+# Never stored in a cassette or used for matching
+SECRET_PARAMS = {'key', 'signature', 'client'}
+
+
+class CassetteMissError(requests.exceptions.ConnectionError):
+    """
+    Raised in replay mode when a request was never recorded
+    """
+
+
+def request_key(method: str, url: str) -> str:
+    """
+    Build a match key from the method and URL with sorted query params and secrets removed
+
+    Args:
+        method: HTTP method
+        url: Full request URL
+
+    Returns:
+        Key string, e.g. 'GET https://maps.googleapis.com/...?place_id=x'
+    """
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in SECRET_PARAMS)
+    return f"{method.upper()} {urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))}"
+
+
+class Cassette:
+    """
+    In-memory set of recorded interactions backed by a gzip JSON file
+
+    Repeated requests with the same key are replayed in the order they were recorded,
+    cycling when the recording runs out.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._interactions: Dict[str, List[Dict]] = {}
+        self._positions: Dict[str, int] = {}
+        self.dirty = False
+
+        if os.path.exists(path):
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for interaction in json.load(f).get('interactions', []):
+                    self._interactions.setdefault(interaction['key'], []).append(interaction)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(v) for v in self._interactions.values())
+
+    def record(self, key: str, response: requests.Response, elapsed: float):
+        """
+        Store a real response
+        """
+        interaction = {
+            'key': key,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {k: v for k, v in response.headers.items()
+                        if k.lower() not in ('content-encoding', 'transfer-encoding', 'content-length', 'set-cookie')},
+            'body': base64.b64encode(response.content).decode('ascii'),
+            'elapsed_ms': round(elapsed * 1000, 1),
+        }
+        with self._lock:
+            self._interactions.setdefault(key, []).append(interaction)
+            self.dirty = True
+
+    def next_interaction(self, key: str) -> Optional[Dict]:
+        """
+        Get the next recorded interaction for a key
+
+        Returns:
+            Interaction dictionary, or None if the key was never recorded
+        """
+        with self._lock:
+            recorded = self._interactions.get(key)
+            if not recorded:
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            return recorded[position % len(recorded)]
+
+    def save(self):
+        """
+        Write the cassette to disk if anything new was recorded
+        """
+        with self._lock:
+            if not self.dirty:
+                return
+            interactions = [i for recorded in self._interactions.values() for i in recorded]
+            self.dirty = False
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump({'version': 1, 'interactions': interactions}, f)
+        os.replace(tmp_path, self.path)
+
+
+class CassetteAdapter(HTTPAdapter):
+    """
+    Transport adapter that records real responses or replays recorded ones
+    """
+
+    def __init__(self, cassette: Cassette, mode: str, latency_ms: Optional[float] = CASSETTE_LATENCY_MS,
+                 jitter_ms: float = CASSETTE_JITTER_MS, **kwargs):
+        """
+        Args:
+            cassette: Cassette to record into or replay from
+            mode: 'record' or 'replay'
+            latency_ms: Synthetic latency per replayed response. None replays the recorded latency
+            jitter_ms: Uniform random jitter added to the latency
+            **kwargs: Passed to HTTPAdapter (pool sizing) for record mode
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        super().__init__(**kwargs)
+        self.cassette = cassette
+        self.mode = mode
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+    def send(self, request, **kwargs):
+        key = request_key(request.method, request.url)
+
+        if self.mode == RECORD:
+            start = time.perf_counter()
+            response = super().send(request, **kwargs)
+            self.cassette.record(key, response, time.perf_counter() - start)
+            return response
+
+        interaction = self.cassette.next_interaction(key)
+        if interaction is None:
+            raise CassetteMissError(f"No recorded response for {key}", request=request)
+
+        latency = interaction.get('elapsed_ms', 0) if self.latency_ms is None else self.latency_ms
+        latency += random.uniform(0, self.jitter_ms) if self.jitter_ms else 0
+        if latency > 0:
+            time.sleep(latency / 1000)
+        return self._build_response(request, interaction)
+
+    @staticmethod
+    def _build_response(request, interaction: Dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = interaction['status']
+        response.reason = interaction.get('reason', '')
+        response.headers = CaseInsensitiveDict(interaction.get('headers', {}))
+        response._content = base64.b64decode(interaction['body'])
+        response.url = request.url
+        response.request = request
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """
+    Get the process-wide cassette when CASSETTE_MODE is 'record' or 'replay'
+
+    In record mode the cassette is saved automatically at exit.
+
+    Returns:
+        Shared Cassette, or None when cassettes are off
+    """
+    global _cassette
+
+    if CASSETTE_MODE not in (RECORD, REPLAY):
+        return None
+    if _cassette is None:
+        with _cassette_lock:
+            if _cassette is None:
+                _cassette = Cassette(CASSETTE_PATH)
+                if CASSETTE_MODE == RECORD:
+                    atexit.register(_cassette.save)
+    return _cassette
+
+
+def mount_cassette(session: requests.Session, **adapter_kwargs) -> bool:
+    """
+    Mount the cassette adapter on a session if cassettes are enabled
+
+    Args:
+        session: Session to mount on
+        **adapter_kwargs: Pool sizing for the underlying HTTPAdapter
+
+    Returns:
+        True if the adapter was mounted
+    """
+    cassette = get_cassette()
+    if cassette is None:
+        return False
+    adapter = CassetteAdapter(cassette, CASSETTE_MODE, **adapter_kwargs)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return True
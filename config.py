@@ -16,8 +16,100 @@ MIN_REVIEWS_FOR_ANALYSIS = 5  # Minimum reviews a user needs to be analyzed
 SUSPICIOUS_THRESHOLD = 0.7  # If 70%+ of reviews are low ratings, user is suspicious
 
 # API Rate Limiting
-REQUESTS_PER_SECOND = 10
-DELAY_BETWEEN_REQUESTS = 0.1  # seconds
+REQUESTS_PER_SECOND = float(os.getenv('REQUESTS_PER_SECOND', '10'))
+RATE_LIMIT_BURST = int(os.getenv('RATE_LIMIT_BURST', '10'))  # Requests allowed back-to-back when there is headroom
+DELAY_BETWEEN_REQUESTS = 0.1  # seconds (legacy, superseded by the token-bucket limiter)
+
+# Host-wide quota coordination (shared by every worker process on the machine)
+QUOTA_ENABLED = os.getenv('QUOTA_ENABLED', 'true').lower() == 'true'
+QUOTA_DB_PATH = os.getenv('QUOTA_DB_PATH', os.path.join('data', 'quota.db'))
+GLOBAL_REQUESTS_PER_SECOND = float(os.getenv('GLOBAL_REQUESTS_PER_SECOND', str(REQUESTS_PER_SECOND)))
+DAILY_BUDGETS = {  # Requests per UTC day per API SKU, 0 = unlimited
+    'textsearch': int(os.getenv('DAILY_BUDGET_TEXTSEARCH', '0')),
+    'details': int(os.getenv('DAILY_BUDGET_DETAILS', '0')),
+    'geocode': int(os.getenv('DAILY_BUDGET_GEOCODE', '0')),
+}
+
+# Two-tier Place Details field cache (used in front of details calls instead of whole-response caching)
+FIELD_CACHE_ENABLED = os.getenv('FIELD_CACHE_ENABLED', 'true').lower() == 'true'
+FIELD_CACHE_DB_PATH = os.getenv('FIELD_CACHE_DB_PATH', os.path.join('data', 'field_cache.db'))
+CONTACT_FIELDS_TTL = int(os.getenv('CONTACT_FIELDS_TTL', str(28 * 24 * 3600)))  # Phone, website, address: 4 weeks
+VOLATILE_FIELDS_TTL = int(os.getenv('VOLATILE_FIELDS_TTL', str(3600)))  # Rating, review count, reviews: 1 hour
+
+# Persistent response cache
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+RESPONSE_CACHE_DB_PATH = os.getenv('RESPONSE_CACHE_DB_PATH', os.path.join('data', 'places_cache.db'))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+RESPONSE_CACHE_TTLS = {}  # Seconds each endpoint's responses stay fresh; endpoints not listed are not cached
+if not FIELD_CACHE_ENABLED:
+    # Details are cached by exactly one tier: per field by the field cache, or else whole here.
+    # Stacking both would let a day-old whole response outlive the hour-long review TTL
+    RESPONSE_CACHE_TTLS['place/details/json'] = int(os.getenv('DETAILS_CACHE_TTL', str(24 * 3600)))
+
+# Negative cache of Text Searches that returned no results
+NEGATIVE_CACHE_ENABLED = os.getenv('NEGATIVE_CACHE_ENABLED', 'true').lower() == 'true'
+NEGATIVE_CACHE_DB_PATH = os.getenv('NEGATIVE_CACHE_DB_PATH', os.path.join('data', 'negative_cache.db'))
+NEGATIVE_CACHE_TTL = int(os.getenv('NEGATIVE_CACHE_TTL', '600'))  # Seconds an empty search is remembered
+NEGATIVE_BLOOM_CAPACITY = int(os.getenv('NEGATIVE_BLOOM_CAPACITY', '100000'))  # Empty queries the Bloom filter is sized for
+NEGATIVE_BLOOM_ERROR_RATE = float(os.getenv('NEGATIVE_BLOOM_ERROR_RATE', '0.01'))  # Target false-positive rate at capacity
+
+# Normalized business search cache, with fuzzy matching of near-identical queries
+SEARCH_CACHE_ENABLED = os.getenv('SEARCH_CACHE_ENABLED', 'true').lower() == 'true'
+SEARCH_CACHE_DB_PATH = os.getenv('SEARCH_CACHE_DB_PATH', os.path.join('data', 'search_cache.db'))
+SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', str(6 * 3600)))  # Seconds a search result set stays fresh
+SEARCH_FUZZY_ENABLED = os.getenv('SEARCH_FUZZY_ENABLED', 'true').lower() == 'true'
+SEARCH_FUZZY_MIN_SIMILARITY = float(os.getenv('SEARCH_FUZZY_MIN_SIMILARITY', '0.8'))  # Trigram similarity needed to reuse a near-identical query
+
+# HTTP Client Configuration
+MAPS_API_BASE_URL = os.getenv('MAPS_API_BASE_URL', 'https://maps.googleapis.com')
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))  # Keep-alive connections per worker process
+HTTP_CONNECT_TIMEOUT = 3.05  # seconds
+HTTP_READ_TIMEOUT = 10  # seconds
+RETRY_MAX_ATTEMPTS = int(os.getenv('RETRY_MAX_ATTEMPTS', '4'))  # Attempts per call for 429 / 5xx / OVER_QUERY_LIMIT
+RETRY_BASE_DELAY = 0.5  # seconds, doubled on every retry (with full jitter)
+RETRY_MAX_DELAY = 8  # seconds
+RETRY_AFTER_MAX = 30  # Longest Retry-After we are willing to honor, in seconds
+MAPS_CLIENT_RETRY_TIMEOUT = int(os.getenv('MAPS_CLIENT_RETRY_TIMEOUT', '20'))  # googlemaps.Client retry budget per call, in seconds
+MAPS_CLIENT_QUERIES_PER_SECOND = max(1, int(REQUESTS_PER_SECOND))  # googlemaps.Client throttle (must be an int)
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))  # Consecutive failures before failing fast
+CIRCUIT_RESET_TIMEOUT = int(os.getenv('CIRCUIT_RESET_TIMEOUT', '30'))  # seconds before a probe request is allowed
+NEXT_PAGE_TOKEN_DELAY = 2.0  # seconds before a Text Search next_page_token becomes valid
+MAX_SEARCH_PAGES = 3  # Text Search returns at most 3 pages of 20 results
+ASYNC_CONCURRENCY = int(os.getenv('ASYNC_CONCURRENCY', '8'))  # Max in-flight async lookups per process, across all callers
+BRANCH_COMPARE_MAX = int(os.getenv('BRANCH_COMPARE_MAX', '10'))  # Most matching branches a search can compare
+
+# Record/replay of HTTP traffic for offline performance runs
+CASSETTE_MODE = os.getenv('CASSETTE_MODE', 'off')  # 'off', 'record' or 'replay'
+CASSETTE_PATH = os.getenv('CASSETTE_PATH', os.path.join('data', 'cassettes', 'places.json.gz'))
+CASSETTE_LATENCY_MS = float(os.environ['CASSETTE_LATENCY_MS']) if os.getenv('CASSETTE_LATENCY_MS') else None  # None replays recorded latency
+CASSETTE_JITTER_MS = float(os.getenv('CASSETTE_JITTER_MS', '0'))
+
+# Lead Finder Configuration
+LEAD_MAX_RESULTS = int(os.getenv('LEAD_MAX_RESULTS', '60'))  # Businesses per lead search (up to 3 pages)
+LEAD_DETAIL_WORKERS = int(os.getenv('LEAD_DETAIL_WORKERS', '8'))  # Concurrent Place Details lookups per lead search
+LEAD_STREAMING = os.getenv('LEAD_STREAMING', 'true').lower() == 'true'  # Stream lead rows as their details arrive
+LEAD_STORE_ENABLED = os.getenv('LEAD_STORE_ENABLED', 'true').lower() == 'true'  # Reuse contact details of known places
+LEAD_STORE_DB_PATH = os.getenv('LEAD_STORE_DB_PATH', os.path.join('data', 'leads.db'))
+LEAD_ENRICH_MAX_AGE = int(os.getenv('LEAD_ENRICH_MAX_AGE', str(30 * 24 * 3600)))  # Seconds before a place's details are fetched again
+SWEEP_GRID_SIZE = int(os.getenv('SWEEP_GRID_SIZE', '4'))  # Initial cells per side of a grid sweep
+SWEEP_MAX_DEPTH = int(os.getenv('SWEEP_MAX_DEPTH', '3'))  # Times a cell that hits the result cap may be split
+SWEEP_WORKERS = int(os.getenv('SWEEP_WORKERS', '4'))  # Concurrent cell searches
+BULK_ENRICH_WORKERS = int(os.getenv('BULK_ENRICH_WORKERS', '8'))  # Rows resolved concurrently by bulk enrichment
+BULK_ENRICH_DB_PATH = os.getenv('BULK_ENRICH_DB_PATH', os.path.join('data', 'bulk_enrich.db'))  # Checkpoints and resolved-query cache
+
+# Batch analysis (main.py --batch)
+BATCH_PROCESSES = int(os.getenv('BATCH_PROCESSES', str(os.cpu_count() or 1)))  # Scoring processes; 1 scores in-process
+BATCH_FETCH_WORKERS = int(os.getenv('BATCH_FETCH_WORKERS', str(ASYNC_CONCURRENCY)))  # Businesses fetched concurrently
+BATCH_DB_PATH = os.getenv('BATCH_DB_PATH', os.path.join('data', 'batch_analysis.db'))  # Per-job checkpoints of finished businesses
+
+# Incremental re-analysis (skip unchanged businesses, rescore only new reviewers)
+INCREMENTAL_ANALYSIS = os.getenv('INCREMENTAL_ANALYSIS', 'false').lower() == 'true'
+ANALYSIS_STATE_DB_PATH = os.getenv('ANALYSIS_STATE_DB_PATH', os.path.join('data', 'analysis_state.db'))
+
+# Reviewer index (reviewer histories accumulated from every business we fetch)
+REVIEWER_INDEX_ENABLED = os.getenv('REVIEWER_INDEX_ENABLED', 'true').lower() == 'true'
+REVIEWER_INDEX_DB_PATH = os.getenv('REVIEWER_INDEX_DB_PATH', os.path.join('data', 'reviewer_index.db'))
+SIMULATE_USER_REVIEWS = os.getenv('SIMULATE_USER_REVIEWS', 'true').lower() == 'true'  # Demo histories for reviewers the index knows too little about
 
 # Output Configuration
 OUTPUT_DIR = 'output'
@@ -0,0 +1,45 @@
+"""
+Shared test fixtures
+"""
+from unittest.mock import patch
+import pytest
+import resilience
+from fake_places_server import start_server
+
+
+# Process-wide caches and stores that default to databases under data/
+SHARED_STORE_SWITCHES = (
+    'places_client.QUOTA_ENABLED',
+    'places_client.RESPONSE_CACHE_ENABLED',
+    'places_client.FIELD_CACHE_ENABLED',
+    'places_client.NEGATIVE_CACHE_ENABLED',
+    'places_client.SEARCH_CACHE_ENABLED',
+    'lead_finder.FIELD_CACHE_ENABLED',
+    'negative_cache.NEGATIVE_CACHE_ENABLED',
+    'utils.SEARCH_CACHE_ENABLED',
+    'reviewer_index.REVIEWER_INDEX_ENABLED',
+)
+
+
+@pytest.fixture(autouse=True)
+def no_shared_stores(monkeypatch):
+    """
+    Turn off every process-wide cache so tests neither read nor leave behind state in
+    data/. A cache's own tests turn it back on against a database in tmp_path.
+    """
+    for switch in SHARED_STORE_SWITCHES:
+        monkeypatch.setattr(switch, False)
+
+
+@pytest.fixture
+def fake_api():
+    """
+    Local fake Places API server that places_client talks to
+    """
+    server, base_url = start_server(places=100_000, reviewers=5_000)
+    with patch('places_client.MAPS_API_BASE_URL', base_url):
+        yield server
+    # Injected failures must not leave a breaker open for other tests
+    resilience._breakers.clear()
+    server.shutdown()
+    server.server_close()
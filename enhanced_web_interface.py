@@ -3,15 +3,18 @@ Enhanced Web Interface with Better Review Display
 This version shows more reviews and handles API limitations better
 """
 import os
+from functools import partial
 from flask import Flask, render_template_string, request, jsonify
 from dotenv import load_dotenv
 from yelp_analyzer import GooglePlacesReviewAnalyzer
 from utils import search_businesses
+from branch_comparison import analyze_branches, parse_branch_count, render_branch_comparison, render_branch_options
 
 # Load API key
 load_dotenv()
 
 app = Flask(__name__)
+app.jinja_env.globals['render_branch_options'] = render_branch_options
 
 # HTML Template with better review display
 HTML_TEMPLATE = """
@@ -616,6 +619,11 @@ HTML_TEMPLATE = """
                             <option value="Costa Mesa, CA">Costa Mesa, CA</option>
                         </select>
                     </div>
+                    
+                    <div class="form-group">
+                        <label for="branches">Branches:</label>
+                        {{ render_branch_options(branch_count or 1)|safe }}
+                    </div>
                 </div>
                 
                 <button type="submit">Find Bad Reviews</button>
@@ -627,6 +635,8 @@ HTML_TEMPLATE = """
             
             {% if results %}
             <div class="results">
+                {{ branch_comparison|safe }}
+                
                 <div class="stats">
                     <h3>Analysis Results</h3>
                     <p><strong>Business:</strong> {{ business_name }}</p>
@@ -691,6 +701,7 @@ def index():
     if request.method == 'POST':
         business_name = request.form.get('business_name', '').strip()
         location = request.form.get('location', '').strip()
+        branch_count = parse_branch_count(request.form.get('branches'))
         
         if not business_name or not location:
             return render_template_string(HTML_TEMPLATE, error="Please select both business name and location")
@@ -706,10 +717,11 @@ def index():
             if not businesses:
                 return render_template_string(HTML_TEMPLATE, error=f"No businesses found for '{business_name}' in '{location}'")
             
-            # Get reviews for the first business
-            business = businesses[0]
+            # Get reviews for the top matches concurrently (a failed fetch shows as an error in
+            # the comparison, not as 0 reviews); the counts below are for the first
             analyzer = GooglePlacesReviewAnalyzer()
-            reviews = analyzer.get_business_reviews(business['place_id'])
+            branches = analyze_branches(businesses, partial(analyzer.get_business_reviews, raise_errors=True), branch_count)
+            reviews = branches[0]['reviews']
             
             # Filter reviews
             bad_reviews = [review for review in reviews if review['rating'] < 4]
@@ -723,6 +735,9 @@ def index():
             
             return render_template_string(
                 HTML_TEMPLATE,
+                results=True,
+                branch_count=branch_count,
+                branch_comparison=render_branch_comparison(branches),
                 business_name=business_name,
                 location=location,
                 businesses=businesses,
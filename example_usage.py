@@ -7,6 +7,7 @@ import json
 from yelp_analyzer import YelpReviewAnalyzer
 from utils import interactive_business_search, export_results_to_csv
 from visualizer import YelpDataVisualizer
+from batch_analysis import write_results
 
 
 def example_1_basic_analysis():
@@ -113,26 +114,19 @@ def example_4_batch_analysis():
     ]
     
     analyzer = YelpReviewAnalyzer()
-    batch_results = {}
     
-    for i, business_id in enumerate(business_ids, 1):
-        print(f"\nAnalyzing business {i}/{len(business_ids)}: {business_id}")
-        
-        try:
-            results = analyzer.analyze_business_reviews(business_id)
-            batch_results[business_id] = results
-            
-            if 'error' not in results:
-                print(f"  ✅ Analysis complete: {results['suspicious_users_count']} suspicious users found")
-            else:
-                print(f"  ❌ Error: {results['error']}")
-                
-        except Exception as e:
-            print(f"  ❌ Error analyzing {business_id}: {e}")
+    # Fetched concurrently, scored on a process pool and checkpointed per business,
+    # so a failing ID doesn't lose the others and rerunning resumes the batch
+    batch_results = analyzer.analyze_many(business_ids)
+    
+    for business_id, results in batch_results.items():
+        if 'error' not in results:
+            print(f"  ✅ {business_id}: {results['suspicious_users_count']} suspicious users found")
+        else:
+            print(f"  ❌ {business_id}: {results['error']}")
     
     # Save batch results
-    with open('batch_analysis_results.json', 'w') as f:
-        json.dump(batch_results, f, indent=2)
+    write_results(batch_results, 'batch_analysis_results.json')
     
     print(f"\nBatch analysis complete! Results saved to batch_analysis_results.json")
 
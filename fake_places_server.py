@@ -0,0 +1,330 @@
+"""
+Local stand-in for the Google Maps textsearch, details and geocode endpoints
+Serves a deterministic synthetic corpus (millions of places and reviewers, generated on
+the fly from the place index so nothing is held in memory) with tunable latency, error
+rates and OVER_QUERY_LIMIT injection, for load-testing the Flask apps without quota
+
+Point the app at it with MAPS_API_BASE_URL, e.g.:
+    python fake_places_server.py --port 8765 --latency-ms 150 --over-query-limit-rate 0.02
+    MAPS_API_BASE_URL=http://127.0.0.1:8765 python simple_railway_app.py
+"""
+import argparse
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+
+PAGE_SIZE = 20
+MAX_RESULTS_PER_QUERY = 60
+REVIEWS_PER_PLACE = 5
+
+NAME_WORDS = ['Golden', 'Maple', 'Harbour', 'Summit', 'Blue', 'Cedar', 'Urban', 'Coastal', 'Royal', 'Lucky',
+              'Northern', 'Pacific', 'Green', 'Silver', 'Sunset', 'Union', 'Granite', 'Riverside']
+CATEGORIES = ['Cafe', 'Pizza', 'Plumbing', 'Dental', 'Bakery', 'Auto Repair', 'Sushi', 'Fitness', 'Law Office',
+              'Financial Advisors', 'Florist', 'Hair Salon', 'Pharmacy', 'Realty', 'Bistro', 'Electric']
+STREETS = ['Main St', 'King St', 'Oak Ave', 'Granville St', 'Broadway', 'Hastings St', 'Kingsway', 'Park Rd']
+CITIES = ['Vancouver, BC', 'Burnaby, BC', 'Coquitlam, BC', 'Surrey, BC', 'Richmond, BC', 'Seattle, WA']
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn']
+REVIEW_TEXTS = {
+    1: "Terrible experience, would not come back.",
+    2: "Pretty disappointing overall.",
+    3: "It was okay, nothing special.",
+    4: "Good service and fair prices.",
+    5: "Excellent, highly recommend!",
+}
+
+
+def _rng(*parts) -> random.Random:
+    digest = hashlib.blake2b('|'.join(str(p) for p in parts).encode('utf-8'), digest_size=8).digest()
+    return random.Random(int.from_bytes(digest, 'big'))
+
+
+class SyntheticCorpus:
+    """
+    Deterministic corpus of places and reviewers derived from integer indexes
+    """
+
+    def __init__(self, places: int = 5_000_000, reviewers: int = 1_000_000, seed: int = 0):
+        self.places = places
+        self.reviewers = reviewers
+        self.seed = seed
+
+    @staticmethod
+    def place_id(index: int) -> str:
+        return f"FAKE_{index:09d}"
+
+    @staticmethod
+    def index_for(place_id: str) -> Optional[int]:
+        if not place_id or not place_id.startswith('FAKE_'):
+            return None
+        try:
+            return int(place_id[5:])
+        except ValueError:
+            return None
+
+    def location(self, index: int):
+        rng = _rng(self.seed, 'loc', index)
+        return 49.0 + rng.random() * 0.5, -123.3 + rng.random() * 0.6
+
+    def summary(self, index: int) -> Dict:
+        rng = _rng(self.seed, 'place', index)
+        category = CATEGORIES[index % len(CATEGORIES)]
+        lat, lng = self.location(index)
+        return {
+            'place_id': self.place_id(index),
+            'name': f"{rng.choice(NAME_WORDS)} {category} #{index}",
+            'formatted_address': f"{rng.randint(1, 9999)} {rng.choice(STREETS)}, {rng.choice(CITIES)}",
+            'rating': round(rng.uniform(2.5, 5.0), 1),
+            'user_ratings_total': rng.randint(0, 2500),
+            'geometry': {'location': {'lat': lat, 'lng': lng}},
+            'types': [category.lower().replace(' ', '_'), 'establishment'],
+        }
+
+    def reviews(self, index: int) -> List[Dict]:
+        rng = _rng(self.seed, 'reviews', index)
+        reviews = []
+        for _ in range(REVIEWS_PER_PLACE):
+            author = rng.randrange(self.reviewers)
+            # Reviewers have a stable temperament so cross-business histories look realistic
+            temperament = _rng(self.seed, 'author', author).random()
+            rating = 1 + min(4, int(rng.random() * 2.5 + temperament * 3))
+            reviews.append({
+                'author_name': f"{FIRST_NAMES[author % len(FIRST_NAMES)]} {chr(65 + author % 26)}. {author}",
+                'author_url': f"https://www.google.com/maps/contrib/{100000000000000000000 + author}/reviews",
+                'profile_photo_url': '',
+                'rating': rating,
+                'text': REVIEW_TEXTS[rating],
+                'time': 1_600_000_000 + rng.randrange(120_000_000),
+                'relative_time_description': 'a month ago',
+                'language': 'en',
+            })
+        return reviews
+
+    def details(self, index: int) -> Dict:
+        rng = _rng(self.seed, 'contact', index)
+        result = self.summary(index)
+        result.update({
+            'formatted_phone_number': f"(604) {rng.randint(200, 999)}-{rng.randint(1000, 9999)}",
+            'international_phone_number': f"+1 604-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}",
+            'website': f"https://example-{index}.test/" if rng.random() < 0.8 else None,
+            'reviews': self.reviews(index),
+        })
+        return {k: v for k, v in result.items() if v is not None}
+
+    def search(self, query: str) -> List[int]:
+        """
+        Deterministic ranked place indexes for a query (empty for unknown-looking queries)
+        """
+        normalized = ' '.join(query.lower().split())
+        rng = _rng(self.seed, 'search', normalized)
+        if 'zzz' in normalized or rng.random() < 0.02:
+            return []
+        count = rng.randint(5, MAX_RESULTS_PER_QUERY)
+        return [rng.randrange(self.places) for _ in range(count)]
+
+
+class FakePlacesHandler(BaseHTTPRequestHandler):
+    """
+    Request handler; behaviour is configured through the server's `options` attribute
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        # Emulate TCP + TLS handshake cost once per new connection
+        delay = self.server.options.get('connect_delay_ms', 0)
+        if delay:
+            time.sleep(delay / 1000)
+        super().setup()
+
+    def log_message(self, format, *args):
+        if self.server.options.get('verbose'):
+            super().log_message(format, *args)
+
+    def _send_json(self, data: Dict, status: int = 200, headers: Dict = None):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        options = server.options
+        parsed = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        path = parsed.path.rstrip('/')
+
+        if path == '/__stats':
+            return self._send_json(server.stats())
+
+        server.count('requests')
+        latency = options.get('latency_ms', 0) + random.uniform(0, options.get('jitter_ms', 0))
+        if latency:
+            time.sleep(latency / 1000)
+
+        if random.random() < options.get('error_rate', 0):
+            server.count('injected_errors')
+            return self._send_json({'status': 'UNKNOWN_ERROR'}, status=500)
+        if random.random() < options.get('over_query_limit_rate', 0):
+            server.count('injected_over_query_limit')
+            return self._send_json({'status': 'OVER_QUERY_LIMIT',
+                                    'error_message': 'You have exceeded your rate-limit for this API.'},
+                                   headers={'Retry-After': '1'})
+
+        if not params.get('key'):
+            return self._send_json({'status': 'REQUEST_DENIED', 'error_message': 'You must use an API key.'})
+
+        if path.endswith('/place/textsearch/json'):
+            server.count('textsearch')
+            return self._send_json(self._textsearch(params))
+        if path.endswith('/place/details/json'):
+            server.count('details')
+            return self._send_json(self._details(params))
+        if path.endswith('/geocode/json'):
+            server.count('geocode')
+            return self._send_json(self._geocode(params))
+
+        self._send_json({'status': 'INVALID_REQUEST', 'error_message': f"Unknown endpoint {path}"}, status=404)
+
+    def _textsearch(self, params: Dict) -> Dict:
+        corpus = self.server.corpus
+        if params.get('pagetoken'):
+            try:
+                query, offset = json.loads(base64.urlsafe_b64decode(params['pagetoken']))
+            except ValueError:
+                return {'status': 'INVALID_REQUEST', 'results': []}
+        elif params.get('query'):
+            query = params['query']
+            if params.get('location'):
+                query = f"{query}@{params['location']}"
+            offset = 0
+        else:
+            return {'status': 'INVALID_REQUEST', 'results': []}
+
+        indexes = corpus.search(query)
+        if not indexes:
+            return {'status': 'ZERO_RESULTS', 'results': []}
+
+        page = indexes[offset:offset + PAGE_SIZE]
+        data = {'status': 'OK', 'results': [corpus.summary(i) for i in page]}
+        if offset + PAGE_SIZE < len(indexes):
+            data['next_page_token'] = base64.urlsafe_b64encode(
+                json.dumps([query, offset + PAGE_SIZE]).encode('utf-8')).decode('ascii')
+        return data
+
+    def _details(self, params: Dict) -> Dict:
+        corpus = self.server.corpus
+        index = corpus.index_for(params.get('place_id', ''))
+        if index is None or index >= corpus.places:
+            return {'status': 'NOT_FOUND'}
+
+        result = corpus.details(index)
+        fields = [f.strip() for f in params.get('fields', '').split(',') if f.strip()]
+        if fields:
+            result = {k: v for k, v in result.items() if k in fields}
+        return {'status': 'OK', 'result': result}
+
+    def _geocode(self, params: Dict) -> Dict:
+        address = params.get('address', '').strip()
+        if not address:
+            return {'status': 'INVALID_REQUEST', 'results': []}
+        rng = _rng(self.server.corpus.seed, 'geocode', address.lower())
+        lat, lng = 49.0 + rng.random() * 0.5, -123.3 + rng.random() * 0.6
+        return {'status': 'OK', 'results': [{
+            'formatted_address': address,
+            'place_id': f"GEO_{hashlib.md5(address.lower().encode('utf-8')).hexdigest()[:12]}",
+            'geometry': {
+                'location': {'lat': lat, 'lng': lng},
+                'viewport': {
+                    'northeast': {'lat': lat + 0.08, 'lng': lng + 0.12},
+                    'southwest': {'lat': lat - 0.08, 'lng': lng - 0.12},
+                },
+            },
+        }]}
+
+
+class FakePlacesServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server holding the corpus, options and request counters
+    """
+    daemon_threads = True
+
+    def __init__(self, address, corpus: SyntheticCorpus, **options):
+        super().__init__(address, FakePlacesHandler)
+        self.corpus = corpus
+        self.options = options
+        self._counters = {}
+        self._counters_lock = threading.Lock()
+
+    def count(self, name: str):
+        with self._counters_lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+
+    def stats(self) -> Dict:
+        with self._counters_lock:
+            return dict(self._counters)
+
+
+def start_server(host: str = '127.0.0.1', port: int = 0, places: int = 5_000_000,
+                 reviewers: int = 1_000_000, seed: int = 0, **options):
+    """
+    Start the fake server on a background thread
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free one)
+        places: Number of places in the synthetic corpus
+        reviewers: Number of distinct reviewers
+        seed: Corpus seed
+        **options: latency_ms, jitter_ms, error_rate, over_query_limit_rate, connect_delay_ms, verbose
+
+    Returns:
+        (server, base_url) tuple; pass base_url as MAPS_API_BASE_URL
+    """
+    server = FakePlacesServer((host, port), SyntheticCorpus(places, reviewers, seed), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{server.server_address[0]}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the Google Places API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--places', type=int, default=5_000_000, help='Places in the synthetic corpus')
+    parser.add_argument('--reviewers', type=int, default=1_000_000, help='Distinct reviewers in the corpus')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency-ms', type=float, default=0, help='Base latency added to every response')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Uniform random extra latency')
+    parser.add_argument('--connect-delay-ms', type=float, default=0, help='Delay on every new connection')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of requests answered with HTTP 500')
+    parser.add_argument('--over-query-limit-rate', type=float, default=0,
+                        help='Fraction of requests answered with OVER_QUERY_LIMIT')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    server = FakePlacesServer((args.host, args.port), SyntheticCorpus(args.places, args.reviewers, args.seed),
+                              latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                              connect_delay_ms=args.connect_delay_ms, error_rate=args.error_rate,
+                              over_query_limit_rate=args.over_query_limit_rate, verbose=args.verbose)
+    print(f"🧪 Fake Places API listening on http://{args.host}:{args.port}")
+    print(f"   Corpus: {args.places:,} places, {args.reviewers:,} reviewers")
+    print(f"   Set MAPS_API_BASE_URL=http://{args.host}:{args.port} to use it")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping fake server")
+        print(json.dumps(server.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Two-tier, per-field cache for Place Details
+Contact fields (phone, website, address) almost never change and are kept for weeks;
+volatile fields (rating, review count, reviews) for an hour or so. A details call only
+requests the fields that are missing or expired, which also keeps billable field SKUs down
+"""
+import json
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from config import FIELD_CACHE_DB_PATH, CONTACT_FIELDS_TTL, VOLATILE_FIELDS_TTL
+from response_cache import normalize_fields
+from sqlite_store import SQLiteStore
+
+
+# Fields that are stable for the life of a listing; everything else is treated as volatile
+CONTACT_FIELDS = {
+    'place_id', 'name', 'formatted_address', 'address_components', 'adr_address', 'vicinity',
+    'formatted_phone_number', 'international_phone_number', 'website', 'url', 'geometry',
+    'plus_code', 'types', 'utc_offset',
+}
+
+# How often (in writes) expired rows are swept out
+PURGE_EVERY = 1000
+
+
+class FieldCache(SQLiteStore):
+    """
+    Place Details field values keyed by (place, field) with per-tier expiry
+
+    A field the place does not have (e.g. no website) is cached as absent, so it is not
+    requested again until it expires.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS fields (
+            place_key TEXT NOT NULL,
+            field TEXT NOT NULL,
+            value TEXT,
+            expires REAL NOT NULL,
+            PRIMARY KEY (place_key, field)
+        );
+        CREATE INDEX IF NOT EXISTS idx_fields_expires ON fields (expires);
+    """
+
+    def __init__(self, db_path: str = FIELD_CACHE_DB_PATH, contact_ttl: float = CONTACT_FIELDS_TTL,
+                 volatile_ttl: float = VOLATILE_FIELDS_TTL):
+        """
+        Open the field cache
+
+        Args:
+            db_path: Path to the SQLite database file
+            contact_ttl: Seconds contact fields stay fresh
+            volatile_ttl: Seconds every other field stays fresh
+        """
+        super().__init__(db_path)
+        self.contact_ttl = contact_ttl
+        self.volatile_ttl = volatile_ttl
+
+        self._stats_lock = threading.Lock()
+        self.field_hits = 0
+        self.field_misses = 0
+        self.full_hits = 0
+        self.partial_fetches = 0
+        self.full_fetches = 0
+        self._writes = 0
+
+    def ttl_for(self, field: str) -> float:
+        return self.contact_ttl if field in CONTACT_FIELDS else self.volatile_ttl
+
+    def get(self, place_key: str, fields: Iterable[str]) -> Tuple[Dict, List[str]]:
+        """
+        Look up fresh cached values
+
+        Args:
+            place_key: Place ID, plus language if one was requested
+            fields: Field names wanted
+
+        Returns:
+            Tuple of (cached values for fields the place has, fields that must be fetched).
+            Fields cached as absent appear in neither.
+        """
+        fields = list(fields)
+        placeholders = ','.join('?' * len(fields))
+        rows = self._connect().execute(
+            f"SELECT field, value FROM fields WHERE place_key = ? AND expires > ? AND field IN ({placeholders})",
+            [place_key, time.time()] + fields
+        ).fetchall()
+
+        cached = {field: json.loads(value) for field, value in rows if value is not None}
+        fresh = {field for field, _ in rows}
+        missing = [f for f in fields if f not in fresh]
+
+        with self._stats_lock:
+            self.field_hits += len(fresh)
+            self.field_misses += len(missing)
+        return cached, missing
+
+    def put(self, place_key: str, fields: Iterable[str], result: Dict):
+        """
+        Store the values of requested fields from a details result
+
+        Args:
+            place_key: Place ID, plus language if one was requested
+            fields: Fields that were requested
+            result: The 'result' object of the details response
+        """
+        now = time.time()
+        rows = [(place_key, field, json.dumps(result[field]) if field in result else None,
+                 now + self.ttl_for(field)) for field in fields]
+
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany("INSERT OR REPLACE INTO fields (place_key, field, value, expires) VALUES (?, ?, ?, ?)",
+                             rows)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        with self._stats_lock:
+            self._writes += 1
+            purge = self._writes % PURGE_EVERY == 0
+        if purge:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """
+        Delete every expired field
+
+        Returns:
+            Number of rows removed
+        """
+        return self._connect().execute("DELETE FROM fields WHERE expires <= ?", (time.time(),)).rowcount
+
+    def details(self, place_id: str, fields, fetch: Callable[[List[str]], Optional[Dict]],
+                language: str = None) -> Dict:
+        """
+        Get Place Details fields, fetching only the missing or expired ones
+
+        Args:
+            place_id: Google Place ID
+            fields: Comma-separated string or list of field names
+            fetch: Function taking the field names to request and returning the details
+                'result' object, or None if the place could not be found
+            language: Language requested, cached separately
+
+        Returns:
+            Details result containing the requested fields the place has, or an empty
+            dictionary if fetch found nothing
+        """
+        fields = normalize_fields(fields).split(',') if fields else []
+        place_key = f"{place_id}|{language}" if language else place_id
+
+        cached, missing = self.get(place_key, fields)
+        if not missing:
+            with self._stats_lock:
+                self.full_hits += 1
+            return cached
+
+        with self._stats_lock:
+            if len(missing) < len(fields):
+                self.partial_fetches += 1
+            else:
+                self.full_fetches += 1
+
+        result = fetch(missing)
+        if result is None:
+            return {}
+        self.put(place_key, missing, result)
+        cached.update({field: result[field] for field in missing if field in result})
+        return cached
+
+    def stats(self) -> Dict:
+        """
+        Get hit counters for this process and the number of cached fields
+
+        Returns:
+            Dictionary of field cache statistics
+        """
+        rows = self._connect().execute("SELECT COUNT(*) FROM fields").fetchone()[0]
+        with self._stats_lock:
+            lookups = self.field_hits + self.field_misses
+            return {
+                'field_hits': self.field_hits,
+                'field_misses': self.field_misses,
+                'field_hit_rate': self.field_hits / lookups if lookups else 0.0,
+                'full_hits': self.full_hits,
+                'partial_fetches': self.partial_fetches,
+                'full_fetches': self.full_fetches,
+                'cached_fields': rows,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_field_cache() -> FieldCache:
+    """
+    Get the process-wide field cache backed by FIELD_CACHE_DB_PATH
+
+    Returns:
+        Shared FieldCache
+    """
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = FieldCache()
+    return _cache
@@ -3,12 +3,14 @@ Google Places API-based Review Analyzer
 Alternative to Yelp API due to Yelp's new paid-only model
 """
 import requests
-import pandas as pd
-import time
 import json
 import os
 from typing import List, Dict, Optional, Tuple
-from config import LOW_RATING_THRESHOLD, SUSPICIOUS_THRESHOLD, MIN_REVIEWS_FOR_ANALYSIS
+import places_client
+from review_engine import low_rating_reviewer_keys, score_business
+from incremental_analysis import get_analysis_state
+from reviewer_index import author_key, index_reviews, indexed_user_reviews, indexed_user_stats
+from config import LOW_RATING_THRESHOLD, INCREMENTAL_ANALYSIS
 
 
 class GooglePlacesAnalyzer:
@@ -28,14 +30,14 @@ class GooglePlacesAnalyzer:
         if not self.api_key:
             raise ValueError("Google Places API key is required. Set GOOGLE_API_KEY environment variable")
         
-        self.base_url = "https://maps.googleapis.com/maps/api/place"
+        self.base_url = places_client.build_url('place')
         
         # Cache for user reviews to avoid repeated API calls
         self.user_reviews_cache = {}
         
     def _make_request(self, endpoint: str, params: Dict) -> Dict:
         """
-        Make a request to Google Places API
+        Make a request to Google Places API (rate limited by the shared client)
         
         Args:
             endpoint: API endpoint
@@ -44,14 +46,7 @@ class GooglePlacesAnalyzer:
         Returns:
             JSON response data
         """
-        time.sleep(0.1)  # Rate limiting
-        
-        params['key'] = self.api_key
-        url = f"{self.base_url}/{endpoint}"
-        
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+        return places_client.request_json(f"place/{endpoint}", params, api_key=self.api_key)
     
     def search_businesses(self, query: str, location: str = None) -> List[Dict]:
         """
@@ -90,14 +85,10 @@ class GooglePlacesAnalyzer:
         Returns:
             Business details dictionary or None if error
         """
-        params = {
-            'place_id': place_id,
-            'fields': 'place_id,name,rating,user_ratings_total,formatted_address,reviews'
-        }
+        fields = 'place_id,name,rating,user_ratings_total,formatted_address,reviews'
         
         try:
-            data = self._make_request('details/json', params)
-            return data.get('result', {})
+            return places_client.get_place_details(place_id, fields, api_key=self.api_key)
         except requests.exceptions.RequestException as e:
             print(f"Error getting business details: {e}")
             return None
@@ -126,42 +117,58 @@ class GooglePlacesAnalyzer:
                 'rating': review.get('rating', 0),
                 'text': review.get('text', ''),
                 'user': {
-                    'id': review.get('author_name', 'Unknown'),
-                    'name': review.get('author_name', 'Unknown')
+                    # Contributor ID when Google provides one; names are not unique
+                    'id': author_key(review) or review.get('author_name', 'Unknown'),
+                    'name': review.get('author_name', 'Unknown'),
+                    'url': review.get('author_url', '')
                 },
                 'time_created': review.get('time', 0),
                 'profile_photo_url': review.get('profile_photo_url', '')
             }
             formatted_reviews.append(formatted_review)
-        
+
+        # Build up reviewer histories from every business we look at
+        index_reviews(place_id, business_details.get('name', ''), formatted_reviews)
+
         return formatted_reviews
     
-    def get_user_reviews(self, user_name: str) -> List[Dict]:
+    def get_user_reviews(self, user_id: str) -> List[Dict]:
         """
         Get all reviews from a specific user (Note: Limited by Google Places API)
-        For demonstration, we'll simulate this functionality
-        
+        Served from the reviewer index; simulated for users it knows too little about
+
         Args:
-            user_name: Google user name
-            
+            user_id: Reviewer ID (Google contributor ID, or the name if there is none)
+
         Returns:
             List of user's review dictionaries
         """
-        # Note: Google Places API doesn't provide direct access to all reviews by a user
-        # This is a limitation of the public API. In a real implementation, you might:
-        # 1. Use web scraping (with proper permissions and rate limiting)
-        # 2. Build a database of reviews over time
-        # 3. Use other data sources
-        
-        # For now, we'll return cached data if available
-        if user_name in self.user_reviews_cache:
-            return self.user_reviews_cache[user_name]
-        
-        # Simulate user review data (in practice, this would come from your data source)
-        simulated_reviews = self._simulate_user_reviews(user_name)
-        self.user_reviews_cache[user_name] = simulated_reviews
-        
+        # Note: Google Places API doesn't provide direct access to all reviews by a user,
+        # so histories come from the reviews of every business we have fetched
+        indexed_reviews = indexed_user_reviews(user_id)
+        if indexed_reviews is not None:
+            return indexed_reviews
+
+        if user_id in self.user_reviews_cache:
+            return self.user_reviews_cache[user_id]
+
+        # Simulate user review data for demonstration purposes
+        simulated_reviews = self._simulate_user_reviews(user_id)
+        self.user_reviews_cache[user_id] = simulated_reviews
+
         return simulated_reviews
+
+    def get_user_stats(self, user_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Get running rating statistics of users from the reviewer index, without their reviews
+
+        Args:
+            user_ids: Reviewer IDs
+
+        Returns:
+            Dictionary mapping user ID to statistics, for users with enough indexed reviews
+        """
+        return indexed_user_stats(user_ids)
     
     def _simulate_user_reviews(self, user_name: str) -> List[Dict]:
         """
@@ -193,12 +200,15 @@ class GooglePlacesAnalyzer:
         
         return reviews
     
-    def analyze_business_reviews(self, place_id: str) -> Dict:
+    def analyze_business_reviews(self, place_id: str, incremental: bool = None) -> Dict:
         """
         Main analysis function - analyzes reviews for a business and identifies suspicious reviewers
         
         Args:
             place_id: Google Places place ID to analyze
+            incremental: Reuse the previous analysis of this place: skip it if the reviews
+                are unchanged, otherwise only score reviewers with new reviews.
+                Defaults to INCREMENTAL_ANALYSIS
             
         Returns:
             Dictionary containing analysis results
@@ -211,66 +221,28 @@ class GooglePlacesAnalyzer:
         if not reviews:
             return {"error": "No reviews found for this business"}
         
-        # Convert to DataFrame for easier analysis
-        df_reviews = pd.DataFrame(reviews)
-        
-        # Extract reviewer information
-        df_reviews['reviewer_id'] = df_reviews['user'].apply(lambda x: x['id'])
-        df_reviews['reviewer_name'] = df_reviews['user'].apply(lambda x: x['name'])
-        
-        # Identify low-rating reviewers
-        low_rating_reviewers = df_reviews[df_reviews['rating'] < LOW_RATING_THRESHOLD]
-        
-        print(f"Found {len(low_rating_reviewers)} reviews with rating < {LOW_RATING_THRESHOLD} stars")
-        print(f"Total reviews analyzed: {len(df_reviews)}")
-        
-        # Analyze each low-rating reviewer
-        suspicious_users = []
-        user_analysis = {}
+        if incremental is None:
+            incremental = INCREMENTAL_ANALYSIS
+        # Reviewers the index knows well enough are scored from their running statistics
+        if incremental:
+            state = get_analysis_state()
+            unchanged, known_stats = state.prepare(place_id, reviews, self.get_user_reviews, user_field='id',
+                                                   get_user_stats=self.get_user_stats)
+            if unchanged is not None:
+                print("Reviews unchanged since the last analysis, reusing its results")
+                return unchanged
+        else:
+            known_stats = self.get_user_stats(low_rating_reviewer_keys(reviews))
         
-        for _, review in low_rating_reviewers.iterrows():
-            user_name = review['reviewer_name']
-            user_id = review['reviewer_id']
-            
-            print(f"Analyzing user: {user_name}")
-            
-            # Get all reviews from this user
-            user_reviews = self.get_user_reviews(user_name)
-            
-            if len(user_reviews) >= MIN_REVIEWS_FOR_ANALYSIS:
-                # Analyze user's review pattern
-                user_ratings = [r['rating'] for r in user_reviews]
-                low_rating_count = sum(1 for rating in user_ratings if rating < LOW_RATING_THRESHOLD)
-                low_rating_percentage = low_rating_count / len(user_ratings)
-                
-                user_analysis[user_name] = {
-                    'name': user_name,
-                    'total_reviews': len(user_reviews),
-                    'low_rating_count': low_rating_count,
-                    'low_rating_percentage': low_rating_percentage,
-                    'average_rating': sum(user_ratings) / len(user_ratings),
-                    'all_ratings': user_ratings,
-                    'is_suspicious': low_rating_percentage >= SUSPICIOUS_THRESHOLD,
-                    'target_business_rating': review['rating'],
-                    'target_business_comment': review.get('text', '')
-                }
-                
-                if low_rating_percentage >= SUSPICIOUS_THRESHOLD:
-                    suspicious_users.append(user_name)
-                    print(f"  [SUSPICIOUS] {low_rating_percentage:.1%} of reviews are low ratings")
-                else:
-                    print(f"  [NORMAL] {low_rating_percentage:.1%} of reviews are low ratings")
+        # Score every low-rating reviewer's history in one pass
+        results = score_business(place_id, reviews, self.get_user_reviews, key_column='reviewer_id',
+                                 known_stats=known_stats)
+        if incremental:
+            state.record(place_id, reviews, known_stats, results)
         
-        # Generate summary
-        results = {
-            'place_id': place_id,
-            'total_reviews': len(df_reviews),
-            'low_rating_reviews': len(low_rating_reviewers),
-            'suspicious_users_count': len(suspicious_users),
-            'user_analysis': user_analysis,
-            'suspicious_users': suspicious_users,
-            'all_reviews': df_reviews.to_dict('records')
-        }
+        print(f"Found {results['low_rating_reviews']} reviews with rating < {LOW_RATING_THRESHOLD} stars")
+        print(f"Total reviews analyzed: {results['total_reviews']}")
+        print(f"Reviewers analyzed: {len(results['user_analysis'])}, suspicious: {len(set(results['suspicious_users']))}")
         
         return results
     
@@ -297,8 +269,8 @@ SUSPICIOUS REVIEWERS:
 """
         
         if results['suspicious_users']:
-            for user_name in results['suspicious_users']:
-                user_data = results['user_analysis'][user_name]
+            for user_id in results['suspicious_users']:
+                user_data = results['user_analysis'][user_id]
                 report += f"""
 - {user_data['name']}
   • Total Reviews: {user_data['total_reviews']}
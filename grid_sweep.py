@@ -0,0 +1,333 @@
+"""
+Geographic grid sweep for large-area lead discovery
+Text Search returns at most 60 results per query, so a metro area is tiled into cells that
+are searched concurrently with a location bias. Cells that hit the cap are split into
+quadrants, place_ids are de-duplicated across overlapping cells, and new places are
+enriched and saved to the lead store as they are found
+"""
+import math
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+from config import (
+    SWEEP_GRID_SIZE, SWEEP_MAX_DEPTH, SWEEP_WORKERS, LEAD_DETAIL_WORKERS, MAX_SEARCH_PAGES,
+    NEXT_PAGE_TOKEN_DELAY
+)
+from lead_finder import build_lead, get_contact_details
+from lead_store import LeadStore
+from pagination import iter_pages
+
+
+EARTH_RADIUS_M = 6371000
+MAX_SEARCH_RADIUS_M = 50000  # Largest radius Text Search accepts
+RESULTS_PER_PAGE = 20
+
+# (south, west, north, east) in degrees
+BBox = Tuple[float, float, float, float]
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """
+    Great-circle distance between two points in meters
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class Cell:
+    """
+    Rectangular piece of the sweep area
+    """
+
+    __slots__ = ('south', 'west', 'north', 'east', 'depth')
+
+    def __init__(self, south: float, west: float, north: float, east: float, depth: int = 0):
+        self.south = south
+        self.west = west
+        self.north = north
+        self.east = east
+        self.depth = depth
+
+    def __repr__(self):
+        return f"Cell({self.south:.5f}, {self.west:.5f}, {self.north:.5f}, {self.east:.5f}, depth={self.depth})"
+
+    @property
+    def center(self) -> Tuple[float, float]:
+        return (self.south + self.north) / 2, (self.west + self.east) / 2
+
+    @property
+    def radius_m(self) -> int:
+        """
+        Radius of the circle through the cell's corners, i.e. covering the whole cell
+        """
+        lat, lng = self.center
+        return min(MAX_SEARCH_RADIUS_M, math.ceil(haversine_m(lat, lng, self.north, self.east)))
+
+    def contains(self, lat: float, lng: float) -> bool:
+        return self.south <= lat <= self.north and self.west <= lng <= self.east
+
+    def split(self) -> List['Cell']:
+        """
+        Split into four quadrants one level deeper
+        """
+        lat, lng = self.center
+        depth = self.depth + 1
+        return [
+            Cell(self.south, self.west, lat, lng, depth),
+            Cell(self.south, lng, lat, self.east, depth),
+            Cell(lat, self.west, self.north, lng, depth),
+            Cell(lat, lng, self.north, self.east, depth),
+        ]
+
+
+def tile_bbox(bbox: BBox, size: int = SWEEP_GRID_SIZE) -> List[Cell]:
+    """
+    Tile a bounding box into a size x size grid of cells
+
+    Args:
+        bbox: (south, west, north, east)
+        size: Cells per side
+
+    Returns:
+        List of cells, row by row from the south-west corner
+    """
+    south, west, north, east = bbox
+    lat_step = (north - south) / size
+    lng_step = (east - west) / size
+    return [Cell(south + row * lat_step, west + col * lng_step,
+                 south + (row + 1) * lat_step, west + (col + 1) * lng_step)
+            for row in range(size) for col in range(size)]
+
+
+def geocode_bbox(gmaps, address: str) -> BBox:
+    """
+    Get the bounding box of a city or region
+
+    Args:
+        gmaps: googlemaps.Client
+        address: Place to geocode, e.g. 'Vancouver, BC'
+
+    Returns:
+        (south, west, north, east) from the result's bounds, or its viewport
+
+    Raises:
+        ValueError: If the address could not be geocoded
+    """
+    results = gmaps.geocode(address)
+    if not results:
+        raise ValueError(f"Could not geocode '{address}'")
+    geometry = results[0]['geometry']
+    box = geometry.get('bounds') or geometry['viewport']
+    return (box['southwest']['lat'], box['southwest']['lng'],
+            box['northeast']['lat'], box['northeast']['lng'])
+
+
+class GridSweep:
+    """
+    One sweep of a search query over an area
+
+    Iterate over the sweep to run it; it yields each unique lead once. Ordering follows
+    completion, not ranking.
+    """
+
+    def __init__(self, gmaps, query: str, bbox: BBox, grid_size: int = SWEEP_GRID_SIZE,
+                 max_depth: int = SWEEP_MAX_DEPTH, workers: int = SWEEP_WORKERS,
+                 detail_workers: int = LEAD_DETAIL_WORKERS, store: Optional[LeadStore] = None,
+                 enrich: bool = True, token_delay: float = NEXT_PAGE_TOKEN_DELAY):
+        """
+        Args:
+            gmaps: googlemaps.Client
+            query: Type of business, e.g. 'plumbers'
+            bbox: Area to sweep as (south, west, north, east)
+            grid_size: Initial cells per side
+            max_depth: How many times a capped cell may be split
+            workers: Concurrent cell searches
+            detail_workers: Concurrent Place Details lookups
+            store: Lead store to skip known places and save new leads into
+            enrich: Whether to fetch phone and website for new places
+            token_delay: Seconds before a next_page_token becomes valid
+        """
+        self.gmaps = gmaps
+        self.query = query
+        self.bbox = Cell(*bbox)
+        self.grid_size = grid_size
+        self.max_depth = max_depth
+        self.workers = workers
+        self.detail_workers = detail_workers
+        self.store = store
+        self.enrich = enrich
+        self.token_delay = token_delay
+
+        self.seen = set()
+        self.cells_searched = 0
+        self.cells_split = 0
+        self.cells_failed = 0
+        self.results_returned = 0
+        self.duplicates = 0
+        self.missing_place_id = 0
+        self.outside_area = 0
+        self.details_fetched = 0
+
+    def search_cell(self, cell: Cell) -> Tuple[List[Dict], bool]:
+        """
+        Run the location-biased search for one cell across all result pages
+
+        Returns:
+            Tuple of (results, capped) where capped means Text Search ran out of pages
+        """
+        location = cell.center
+        radius = cell.radius_m
+
+        def fetch_page(page_token):
+            if page_token:
+                return self.gmaps.places(page_token=page_token)
+            return self.gmaps.places(query=self.query, location=location, radius=radius)
+
+        results = []
+        for page in iter_pages(fetch_page, max_pages=MAX_SEARCH_PAGES, token_delay=self.token_delay):
+            results.extend(page.get('results', []))
+        return results, len(results) >= MAX_SEARCH_PAGES * RESULTS_PER_PAGE
+
+    def _new_places(self, results: List[Dict]) -> List[Dict]:
+        places = []
+        for place in results:
+            place_id = place.get('place_id')
+            if not place_id:
+                self.missing_place_id += 1
+                continue
+            if place_id in self.seen:
+                self.duplicates += 1
+                continue
+            location = place.get('geometry', {}).get('location')
+            if location and not self.bbox.contains(location['lat'], location['lng']):
+                # Prominent places far outside the area still come back with a location bias
+                self.outside_area += 1
+                continue
+            self.seen.add(place_id)
+            places.append(place)
+        return places
+
+    def _finish(self, place: Dict, phone: str, website: str, fetched: bool) -> Dict:
+        lead = build_lead(place, phone, website)
+        if self.store is not None:
+            self.store.save_lead(lead, enriched=fetched, query=self.query)
+        return lead
+
+    def __iter__(self) -> Iterator[Dict]:
+        search_pool = ThreadPoolExecutor(max_workers=self.workers)
+        details_pool = ThreadPoolExecutor(max_workers=self.detail_workers)
+        # Future -> ('cell', Cell) or ('details', place)
+        pending = {}
+
+        try:
+            for cell in tile_bbox((self.bbox.south, self.bbox.west, self.bbox.north, self.bbox.east),
+                                  self.grid_size):
+                pending[search_pool.submit(self.search_cell, cell)] = ('cell', cell)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, item = pending.pop(future)
+
+                    if kind == 'details':
+                        phone, website, fetched = future.result()
+                        self.details_fetched += fetched
+                        yield self._finish(item, phone, website, fetched)
+                        continue
+
+                    try:
+                        results, capped = future.result()
+                    except Exception as e:
+                        # One failing cell should not abort the whole sweep
+                        self.cells_failed += 1
+                        print(f"Search failed for {item}: {e}")
+                        continue
+
+                    self.cells_searched += 1
+                    self.results_returned += len(results)
+                    if capped and item.depth < self.max_depth:
+                        self.cells_split += 1
+                        for child in item.split():
+                            pending[search_pool.submit(self.search_cell, child)] = ('cell', child)
+
+                    for place in self._new_places(results):
+                        known = self.store.fresh_contacts(place['place_id']) if self.store is not None else None
+                        if known is not None:
+                            yield self._finish(place, known[0], known[1], False)
+                        elif self.enrich:
+                            pending[details_pool.submit(get_contact_details, self.gmaps,
+                                                        place['place_id'])] = ('details', place)
+                        else:
+                            yield self._finish(place, 'No phone', 'No website', False)
+        finally:
+            search_pool.shutdown(wait=False, cancel_futures=True)
+            details_pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        """
+        Get progress counters for the sweep
+        """
+        return {
+            'unique_places': len(self.seen),
+            'cells_searched': self.cells_searched,
+            'cells_split': self.cells_split,
+            'cells_failed': self.cells_failed,
+            'results_returned': self.results_returned,
+            'duplicates': self.duplicates,
+            'missing_place_id': self.missing_place_id,
+            'outside_area': self.outside_area,
+            'details_fetched': self.details_fetched,
+        }
+
+
+def main():
+    """
+    Sweep an area from the command line, saving every lead to the lead store
+    """
+    import argparse
+    from lead_store import get_lead_store
+    from maps_client import get_maps_client
+
+    parser = argparse.ArgumentParser(description='Collect every business of a type across a large area')
+    parser.add_argument('query', help="Type of business, e.g. 'plumbers'")
+    area = parser.add_mutually_exclusive_group(required=True)
+    area.add_argument('--city', help="City or region to geocode, e.g. 'Vancouver, BC'")
+    area.add_argument('--bbox', type=float, nargs=4, metavar=('SOUTH', 'WEST', 'NORTH', 'EAST'))
+    parser.add_argument('--grid', type=int, default=SWEEP_GRID_SIZE, help='Initial cells per side')
+    parser.add_argument('--max-depth', type=int, default=SWEEP_MAX_DEPTH, help='Max splits of a capped cell')
+    parser.add_argument('--workers', type=int, default=SWEEP_WORKERS, help='Concurrent cell searches')
+    parser.add_argument('--no-details', action='store_true', help='Skip phone/website lookups')
+    parser.add_argument('--api-key', help='Google API key (defaults to GOOGLE_API_KEY)')
+    args = parser.parse_args()
+
+    api_key = args.api_key or os.environ.get('GOOGLE_API_KEY')
+    if not api_key:
+        print("❌ Error: No API key (set GOOGLE_API_KEY or pass --api-key)")
+        return 1
+
+    gmaps = get_maps_client(api_key)
+    bbox = tuple(args.bbox) if args.bbox else geocode_bbox(gmaps, args.city)
+    store = get_lead_store()
+    sweep = GridSweep(gmaps, args.query, bbox, grid_size=args.grid, max_depth=args.max_depth,
+                      workers=args.workers, store=store, enrich=not args.no_details)
+
+    print(f"Sweeping '{args.query}' over {bbox}")
+    try:
+        for count, lead in enumerate(sweep, 1):
+            if count % 50 == 0:
+                print(f"  {count} leads, {sweep.cells_searched} cells searched, {sweep.cells_split} split")
+    except KeyboardInterrupt:
+        print("\n⚠️  Sweep interrupted; leads found so far are saved")
+
+    for name, value in sweep.stats().items():
+        print(f"  {name:<18} {value}")
+    print(f"✅ Leads saved to {store.db_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Incremental re-analysis of businesses that were analyzed before
+For every place the newest review time (high-water mark), a digest of the review set,
+the reviewer statistics and the last results are kept. An unchanged review set is not
+re-analyzed at all; when new reviews arrived only their reviewers' histories are
+fetched and scored, every other reviewer's statistics are reused
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+from config import ANALYSIS_STATE_DB_PATH
+from review_engine import low_rating_reviewer_keys, review_time, reviewer_stats
+from sqlite_store import SQLiteStore
+
+
+def review_digest(reviews: List[Dict]) -> str:
+    """
+    Order-independent digest of a review set; changes when a review is added, removed or edited
+    """
+    canonical = sorted([str(review['user'].get('id')), review_time(review), review.get('rating'),
+                        review.get('text', '')] for review in reviews)
+    return hashlib.sha1(json.dumps(canonical, default=str).encode('utf-8')).hexdigest()
+
+
+class AnalysisState(SQLiteStore):
+    """
+    Last analysis of each place, used to skip or shrink the next one
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS analysis_state (
+            place_id TEXT PRIMARY KEY,
+            newest_time INTEGER NOT NULL,
+            digest TEXT NOT NULL,
+            reviewer_stats TEXT NOT NULL,
+            results TEXT NOT NULL,
+            analyzed_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, db_path: str = ANALYSIS_STATE_DB_PATH):
+        """
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        super().__init__(db_path)
+        self._stats_lock = threading.Lock()
+        self.unchanged = 0
+        self.incremental = 0
+        self.full = 0
+        self.reused_reviewers = 0
+        self.scored_reviewers = 0
+
+    def get(self, place_id: str) -> Optional[Dict]:
+        row = self._connect().execute(
+            "SELECT newest_time, digest, reviewer_stats, results FROM analysis_state WHERE place_id = ?",
+            (place_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {'newest_time': row[0], 'digest': row[1],
+                'reviewer_stats': json.loads(row[2]), 'results': json.loads(row[3])}
+
+    def prepare(self, place_id: str, reviews: List[Dict], get_user_reviews: Callable[[Hashable], List[Dict]],
+                user_field: str = 'id', get_user_stats: Callable[[List[Hashable]], Dict[Hashable, Dict]] = None
+                ) -> Tuple[Optional[Dict], Dict[Hashable, Optional[Dict]]]:
+        """
+        Work out how much of a place's analysis has to be redone
+
+        Args:
+            place_id: Google Places place ID
+            reviews: The place's current formatted reviews
+            get_user_reviews: Function returning a reviewer's reviews given their key
+            user_field: User field that keys the reviewer ('id' or 'name')
+            get_user_stats: Function returning the current statistics of the reviewers it
+                knows (e.g. from the reviewer index) given their keys; only called when
+                the reviews changed, and its statistics are used as they are instead of
+                being reused or fetched
+
+        Returns:
+            Tuple of (the previous results if the review set is unchanged, otherwise None;
+            reviewer statistics for every low-rating reviewer, to pass to score_business()).
+            Histories are only fetched for reviewers with a review newer than the
+            high-water mark or not seen before.
+        """
+        previous = self.get(place_id)
+        if previous is not None and previous['digest'] == review_digest(reviews):
+            with self._stats_lock:
+                self.unchanged += 1
+            return previous['results'], previous['reviewer_stats']
+
+        low_keys = low_rating_reviewer_keys(reviews, user_field)
+        known = get_user_stats(low_keys) if get_user_stats and low_keys else {}
+        low_keys = [key for key in low_keys if key not in known]
+        reused = {}
+        if previous is not None:
+            newer = {review['user'][user_field] for review in reviews
+                     if review_time(review) > previous['newest_time']}
+            reused = {key: previous['reviewer_stats'][key] for key in low_keys
+                      if key in previous['reviewer_stats'] and key not in newer}
+
+        needed = [key for key in low_keys if key not in reused]
+        computed = reviewer_stats({key: get_user_reviews(key) for key in needed})
+
+        with self._stats_lock:
+            if previous is None:
+                self.full += 1
+            else:
+                self.incremental += 1
+            self.reused_reviewers += len(reused)
+            self.scored_reviewers += len(needed)
+        return None, {**known, **reused, **{key: computed.get(key) for key in needed}}
+
+    def record(self, place_id: str, reviews: List[Dict], known_stats: Dict[Hashable, Optional[Dict]],
+               results: Dict):
+        """
+        Save a finished analysis as the baseline for the next one
+
+        Args:
+            place_id: Google Places place ID
+            reviews: The reviews that were analyzed
+            known_stats: Reviewer statistics from prepare()
+            results: Analysis results
+        """
+        self._connect().execute(
+            "INSERT OR REPLACE INTO analysis_state "
+            "(place_id, newest_time, digest, reviewer_stats, results, analyzed_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (place_id, max(map(review_time, reviews), default=0), review_digest(reviews),
+             json.dumps(known_stats), json.dumps(results), time.time())
+        )
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            return {
+                'unchanged': self.unchanged,
+                'incremental': self.incremental,
+                'full': self.full,
+                'reused_reviewers': self.reused_reviewers,
+                'scored_reviewers': self.scored_reviewers,
+            }
+
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def get_analysis_state() -> AnalysisState:
+    """
+    Get the process-wide analysis state backed by ANALYSIS_STATE_DB_PATH
+    """
+    global _state
+
+    if _state is None:
+        with _state_lock:
+            if _state is None:
+                _state = AnalysisState()
+    return _state
@@ -0,0 +1,179 @@
+"""
+Lead finder pipeline: Text Search results enriched with phone and website from Place Details
+Detail lookups fan out over a bounded worker pool while results are still being paged in;
+leads come out in the original ranking order. Places already in the lead store with fresh
+contact details skip the lookup
+"""
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, Optional, Tuple
+from config import LEAD_MAX_RESULTS, LEAD_DETAIL_WORKERS, FIELD_CACHE_ENABLED
+from field_cache import get_field_cache
+from lead_store import LeadStore
+from pagination import iter_results
+from negative_cache import search_unless_empty
+
+
+LEAD_DETAIL_FIELDS = ['formatted_phone_number', 'website', 'international_phone_number']
+NO_PHONE = 'No phone'
+NO_WEBSITE = 'No website'
+
+# Marks the end of the search results on the producer queue
+_DONE = object()
+
+
+def fetch_contact_details(gmaps, place_id: str) -> Tuple[str, str]:
+    """
+    Get phone and website for one place from Place Details
+
+    Args:
+        gmaps: googlemaps.Client
+        place_id: Google Place ID
+
+    Returns:
+        Tuple of (phone, website), with placeholders for details the place doesn't have
+
+    Raises:
+        Any error from the Place Details call
+    """
+    if FIELD_CACHE_ENABLED:
+        # Contact fields rarely change; only missing or expired ones are requested
+        result = get_field_cache().details(
+            place_id, LEAD_DETAIL_FIELDS, lambda missing: gmaps.place(place_id=place_id, fields=missing).get('result'))
+    else:
+        result = gmaps.place(place_id=place_id, fields=LEAD_DETAIL_FIELDS).get('result')
+    if not result:
+        return NO_PHONE, NO_WEBSITE
+    phone = result.get('formatted_phone_number', result.get('international_phone_number', NO_PHONE))
+    return phone, result.get('website', NO_WEBSITE)
+
+
+def get_contact_details(gmaps, place_id: str) -> Tuple[str, str, bool]:
+    """
+    Get phone and website for one place, never raising
+
+    Args:
+        gmaps: googlemaps.Client
+        place_id: Google Place ID
+
+    Returns:
+        Tuple of (phone, website, fetched). If the lookup failed the details are
+        placeholders and fetched is False
+    """
+    try:
+        return fetch_contact_details(gmaps, place_id) + (True,)
+    except Exception:
+        # If we can't get details for one business, continue with others
+        return NO_PHONE, NO_WEBSITE, False
+
+
+def _known_contact_details(contacts: Tuple[str, str]) -> Future:
+    future = Future()
+    future.set_result(contacts + (False,))
+    return future
+
+
+def build_lead(place: Dict, phone: str, website: str) -> Dict:
+    """
+    Build a lead row from a Text Search result and its contact details
+    """
+    return {
+        'place_id': place.get('place_id'),
+        'name': place.get('name', 'Unknown'),
+        'address': place.get('formatted_address', 'Address not available'),
+        'phone': phone,
+        'website': website,
+        'rating': place.get('rating', 'N/A'),
+        'total_reviews': place.get('user_ratings_total', 0)
+    }
+
+
+def iter_leads(gmaps, search_query: str, location: str, max_results: int = LEAD_MAX_RESULTS,
+               workers: int = LEAD_DETAIL_WORKERS, store: Optional[LeadStore] = None) -> Iterator[Dict]:
+    """
+    Yield leads for a search in ranking order as their details arrive
+
+    Search pages are read on a background thread and every place is handed to the worker
+    pool immediately, so details for the first page are fetched while the next page token
+    is still activating. The request rate stays bounded by the shared session's limiter.
+    With a lead store, places enriched within its max age reuse their stored details and
+    every lead is saved back to it.
+
+    Args:
+        gmaps: googlemaps.Client
+        search_query: Type of business, e.g. 'plumbers'
+        location: Location to search in
+        max_results: Stop after this many businesses
+        workers: Concurrent Place Details lookups
+        store: Lead store to check before, and update after, each details lookup
+
+    Yields:
+        Lead dictionaries
+
+    Raises:
+        The search error if the first page fails. If a later page fails, the leads
+        already found are yielded and iteration stops.
+    """
+    full_query = f"{search_query} {location}"
+
+    def fetch_page(page_token):
+        if page_token:
+            return gmaps.places(page_token=page_token)
+        return search_unless_empty(lambda: gmaps.places(query=full_query), full_query)
+
+    pending = queue.Queue()
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=workers)
+
+    def produce():
+        try:
+            for place in iter_results(fetch_page, max_results=max_results):
+                if stop.is_set():
+                    return
+                place_id = place.get('place_id')
+                known = store.fresh_contacts(place_id) if store is not None and place_id else None
+                if known is not None:
+                    pending.put((place, _known_contact_details(known)))
+                else:
+                    pending.put((place, executor.submit(get_contact_details, gmaps, place_id)))
+        except Exception as e:
+            pending.put(e)
+        finally:
+            pending.put(_DONE)
+
+    producer = threading.Thread(target=produce, name='lead-search-pages', daemon=True)
+    producer.start()
+
+    found = 0
+    try:
+        while True:
+            item = pending.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                if not found:
+                    raise item
+                # A later page failing should not throw away the businesses already found
+                return
+            place, future = item
+            found += 1
+            phone, website, fetched = future.result()
+            lead = build_lead(place, phone, website)
+            if store is not None:
+                store.save_lead(lead, enriched=fetched, query=full_query)
+            yield lead
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def find_leads(gmaps, search_query: str, location: str, max_results: int = LEAD_MAX_RESULTS,
+               workers: int = LEAD_DETAIL_WORKERS, store: Optional[LeadStore] = None) -> list:
+    """
+    Collect all leads for a search
+
+    Returns:
+        List of lead dictionaries in ranking order
+    """
+    return list(iter_leads(gmaps, search_query, location, max_results=max_results, workers=workers, store=store))
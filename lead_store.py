@@ -0,0 +1,252 @@
+"""
+Local lead database
+Every business the lead finder has seen is kept in SQLite keyed by place_id, with the time
+its contact details were last fetched, so overlapping searches only pay for Place Details
+on new or stale places
+"""
+import csv
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from config import LEAD_STORE_DB_PATH, LEAD_ENRICH_MAX_AGE
+from sqlite_store import SQLiteStore
+
+
+# Columns in query results and CSV exports, in order
+LEAD_COLUMNS = ['place_id', 'name', 'address', 'phone', 'website', 'rating', 'total_reviews',
+                'first_seen', 'last_seen', 'enriched_at', 'last_query']
+
+# Placeholders the lead finder shows for missing contact details; stored as NULL
+_PLACEHOLDERS = {'phone': 'No phone', 'website': 'No website', 'rating': 'N/A'}
+
+
+def _stored(field: str, value):
+    return None if value == _PLACEHOLDERS.get(field) else value
+
+
+class LeadStore(SQLiteStore):
+    """
+    Leads keyed by place_id with first/last seen and last-enriched timestamps
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS leads (
+            place_id TEXT PRIMARY KEY,
+            name TEXT,
+            address TEXT,
+            phone TEXT,
+            website TEXT,
+            rating REAL,
+            total_reviews INTEGER,
+            first_seen REAL NOT NULL,
+            last_seen REAL NOT NULL,
+            enriched_at REAL,
+            last_query TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_leads_enriched_at ON leads (enriched_at);
+        CREATE INDEX IF NOT EXISTS idx_leads_last_seen ON leads (last_seen);
+        CREATE INDEX IF NOT EXISTS idx_leads_rating ON leads (rating);
+    """
+
+    def __init__(self, db_path: str = LEAD_STORE_DB_PATH, max_age: float = LEAD_ENRICH_MAX_AGE):
+        """
+        Open the lead store
+
+        Args:
+            db_path: Path to the SQLite database file
+            max_age: Seconds contact details stay fresh before a place is enriched again
+        """
+        super().__init__(db_path)
+        self.max_age = max_age
+
+        self._stats_lock = threading.Lock()
+        self.reused = 0
+        self.enriched = 0
+
+    def fresh_contacts(self, place_id: str) -> Optional[Tuple[str, str]]:
+        """
+        Get stored contact details if they were fetched within max_age
+
+        Args:
+            place_id: Google Place ID
+
+        Returns:
+            Tuple of (phone, website) with placeholders for missing values, or None if the
+            place is unknown or stale
+        """
+        row = self._connect().execute(
+            "SELECT phone, website FROM leads WHERE place_id = ? AND enriched_at >= ?",
+            (place_id, time.time() - self.max_age)
+        ).fetchone()
+        if row is None:
+            return None
+        with self._stats_lock:
+            self.reused += 1
+        return row[0] or _PLACEHOLDERS['phone'], row[1] or _PLACEHOLDERS['website']
+
+    def save_lead(self, lead: Dict, enriched: bool = False, query: str = None):
+        """
+        Insert or update a lead
+
+        Listing fields (name, address, rating, review count) are always refreshed; contact
+        details and enriched_at only when they were just fetched.
+
+        Args:
+            lead: Lead dictionary with at least 'place_id'
+            enriched: Whether phone and website came from a fresh Place Details call
+            query: Search that produced the lead
+        """
+        place_id = lead.get('place_id')
+        if not place_id:
+            return
+
+        now = time.time()
+        listing = (lead.get('name'), lead.get('address'), _stored('rating', lead.get('rating')),
+                   lead.get('total_reviews'), now, query)
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute("INSERT OR IGNORE INTO leads (place_id, first_seen, last_seen) VALUES (?, ?, ?)",
+                         (place_id, now, now))
+            conn.execute("""
+                UPDATE leads SET name = ?, address = ?, rating = ?, total_reviews = ?, last_seen = ?,
+                                 last_query = COALESCE(?, last_query)
+                WHERE place_id = ?
+            """, listing + (place_id,))
+            if enriched:
+                conn.execute("UPDATE leads SET phone = ?, website = ?, enriched_at = ? WHERE place_id = ?",
+                             (_stored('phone', lead.get('phone')), _stored('website', lead.get('website')),
+                              now, place_id))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        if enriched:
+            with self._stats_lock:
+                self.enriched += 1
+
+    def query(self, text: str = None, min_rating: float = None, has_phone: bool = None,
+              has_website: bool = None, limit: int = None) -> List[Dict]:
+        """
+        Query collected leads
+
+        Args:
+            text: Substring to match in the name or address
+            min_rating: Minimum rating
+            has_phone: Only leads with (True) or without (False) a phone number
+            has_website: Only leads with (True) or without (False) a website
+            limit: Maximum rows
+
+        Returns:
+            Lead dictionaries with LEAD_COLUMNS keys, most recently seen first
+        """
+        clauses, params = [], []
+        if text:
+            clauses.append("(name LIKE ? OR address LIKE ?)")
+            params += [f"%{text}%", f"%{text}%"]
+        if min_rating is not None:
+            clauses.append("rating >= ?")
+            params.append(min_rating)
+        if has_phone is not None:
+            clauses.append("phone IS NOT NULL" if has_phone else "phone IS NULL")
+        if has_website is not None:
+            clauses.append("website IS NOT NULL" if has_website else "website IS NULL")
+
+        sql = f"SELECT {', '.join(LEAD_COLUMNS)} FROM leads"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY last_seen DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        rows = self._connect().execute(sql, params).fetchall()
+        return [dict(zip(LEAD_COLUMNS, row)) for row in rows]
+
+    def export_csv(self, file, rows: Iterable[Dict] = None) -> int:
+        """
+        Write leads as CSV
+
+        Args:
+            file: Writable text file object
+            rows: Leads to write (defaults to everything collected)
+
+        Returns:
+            Number of rows written
+        """
+        writer = csv.DictWriter(file, fieldnames=LEAD_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        count = 0
+        for row in (self.query() if rows is None else rows):
+            writer.writerow(row)
+            count += 1
+        return count
+
+    def stats(self) -> Dict:
+        """
+        Get store size and how many details calls this process saved
+
+        Returns:
+            Dictionary of lead store statistics
+        """
+        conn = self._connect()
+        total, enriched = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(enriched_at >= ?), 0) FROM leads", (time.time() - self.max_age,)
+        ).fetchone()
+        with self._stats_lock:
+            return {
+                'leads': total,
+                'fresh': enriched,
+                'details_reused': self.reused,
+                'details_fetched': self.enriched,
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_lead_store() -> LeadStore:
+    """
+    Get the process-wide lead store backed by LEAD_STORE_DB_PATH
+
+    Returns:
+        Shared LeadStore
+    """
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = LeadStore()
+    return _store
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Query or export the collected leads")
+    parser.add_argument('--search', help="Match text in the name or address")
+    parser.add_argument('--min-rating', type=float)
+    parser.add_argument('--with-phone', action='store_true', help="Only leads with a phone number")
+    parser.add_argument('--with-website', action='store_true', help="Only leads with a website")
+    parser.add_argument('--limit', type=int)
+    parser.add_argument('--csv', metavar='FILE', help="Write CSV to FILE ('-' for stdout)")
+    args = parser.parse_args()
+
+    store = get_lead_store()
+    leads = store.query(text=args.search, min_rating=args.min_rating,
+                        has_phone=True if args.with_phone else None,
+                        has_website=True if args.with_website else None, limit=args.limit)
+    if args.csv == '-':
+        store.export_csv(sys.stdout, leads)
+    elif args.csv:
+        with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+            written = store.export_csv(f, leads)
+        print(f"Wrote {written} leads to {args.csv}")
+    else:
+        for lead in leads:
+            print(f"{lead['name'] or '?':<40} {lead['phone'] or '-':<18} {lead['website'] or '-'}")
+        print(f"\n{len(leads)} leads in {store.db_path}")
@@ -1,9 +1,57 @@
 """
 Main entry point for Google Places Review Analyzer
 """
+import os
 import sys
+import time
 import argparse
 from yelp_analyzer import GooglePlacesReviewAnalyzer
+from config import BATCH_PROCESSES, INCREMENTAL_ANALYSIS, OUTPUT_DIR
+
+
+def run_batch(analyzer: GooglePlacesReviewAnalyzer, args) -> int:
+    """
+    Analyze every place ID in a batch file, resuming an unfinished run of the same file
+    """
+    from batch_analysis import BatchAnalyzer, BatchStore, job_id_for, read_place_ids, write_results
+    from incremental_analysis import get_analysis_state
+
+    with open(args.batch, encoding='utf-8') as f:
+        place_ids = read_place_ids(f.read())
+    if not place_ids:
+        print(f"❌ Error: No place IDs in {args.batch}")
+        return 1
+
+    job = job_id_for(place_ids)
+    store = BatchStore()
+    if args.restart:
+        store.clear_job(job)
+    state = get_analysis_state() if args.incremental or INCREMENTAL_ANALYSIS else None
+    batch = BatchAnalyzer(analyzer, store, processes=args.processes, state=state)
+
+    print(f"Analyzing {len(place_ids)} businesses (job {job}, {args.processes} scoring processes)")
+    start = time.time()
+    results = {}
+    for count, (place_id, result) in enumerate(batch.run(place_ids, job), 1):
+        results[place_id] = result
+        status = f"❌ {result['error']}" if 'error' in result else f"✅ {result['suspicious_users_count']} suspicious users"
+        print(f"  [{count}/{len(place_ids)}] {place_id}: {status}")
+
+    output_path = args.output or os.path.join(OUTPUT_DIR, f"batch_results_{job}.json")
+    write_results({place_id: results[place_id] for place_id in place_ids}, output_path)
+
+    stats = batch.stats()
+    print(f"\n✅ Batch complete in {time.time() - start:.1f}s: {stats['analyzed']} analyzed, "
+          f"{stats['resumed']} resumed, {stats['failed']} failed")
+    if state is not None:
+        state_stats = state.stats()
+        print(f"Incremental: {state_stats['unchanged']} unchanged, {state_stats['incremental']} updated, "
+              f"{state_stats['full']} new; {state_stats['reused_reviewers']} reviewers reused, "
+              f"{state_stats['scored_reviewers']} scored")
+    print(f"Results saved to: {output_path}")
+    if stats['failed']:
+        print("Run the same command again to retry the failed businesses.")
+    return 1 if stats['failed'] else 0
 
 
 def main():
@@ -11,11 +59,19 @@ def main():
     Main function with command line interface
     """
     parser = argparse.ArgumentParser(description='Analyze Google Places reviews to identify suspicious reviewers')
-    parser.add_argument('place_id', help='Google Places place ID to analyze')
+    parser.add_argument('place_id', nargs='?', help='Google Places place ID to analyze')
+    parser.add_argument('--batch', metavar='FILE', help='Analyze every place ID in FILE (one per line); resumable')
+    parser.add_argument('--processes', type=int, default=BATCH_PROCESSES, help='Scoring processes for --batch')
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint of a --batch run and start over')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Skip businesses whose reviews are unchanged and only rescore new reviewers')
+    parser.add_argument('--output', '-o', help='Consolidated JSON for --batch (default: output/batch_results_<job>.json)')
     parser.add_argument('--api-key', help='Google Places API key (overrides config.py)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
     
     args = parser.parse_args()
+    if not args.place_id and not args.batch:
+        parser.error('a place ID or --batch FILE is required')
     
     try:
         print("Google Places Review Analyzer")
@@ -23,11 +79,14 @@ def main():
         
         analyzer = GooglePlacesReviewAnalyzer(api_key=args.api_key)
         
+        if args.batch:
+            return run_batch(analyzer, args)
+
         if args.verbose:
             print(f"Analyzing place ID: {args.place_id}")
             print("This may take a few minutes depending on the number of reviews...")
         
-        results = analyzer.analyze_business_reviews(args.place_id)
+        results = analyzer.analyze_business_reviews(args.place_id, incremental=args.incremental or None)
         
         if 'error' in results:
             print(f"❌ Error: {results['error']}")
@@ -0,0 +1,77 @@
+"""
+Process-wide googlemaps.Client shared by every route
+Building a client per request throws away its connection pool and throttle state, so a
+single client is created lazily and reused until the API key changes
+"""
+import threading
+import googlemaps
+import places_client
+from config import (
+    MAPS_API_BASE_URL, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT,
+    MAPS_CLIENT_RETRY_TIMEOUT, MAPS_CLIENT_QUERIES_PER_SECOND
+)
+
+
+_client = None
+_client_lock = threading.Lock()
+_client_builds = 0
+
+
+def _is_current(client, api_key: str) -> bool:
+    # The pooled session is rebuilt after a fork or close_session(); follow it
+    return client is not None and client.key == api_key and client.session is places_client.get_session()
+
+
+def get_maps_client(api_key: str) -> googlemaps.Client:
+    """
+    Get the shared googlemaps.Client for an API key, creating it on first use
+
+    The client sends through the pooled, rate-limited Places session, with the configured
+    connect/read timeouts, retry budget and queries_per_second. It is re-created only
+    when the key changes.
+
+    Args:
+        api_key: Google Maps API key
+
+    Returns:
+        Shared googlemaps.Client
+
+    Raises:
+        ValueError: If googlemaps rejects the key format
+    """
+    global _client, _client_builds
+
+    client = _client
+    if _is_current(client, api_key):
+        return client
+
+    with _client_lock:
+        if not _is_current(_client, api_key):
+            _client = googlemaps.Client(
+                key=api_key,
+                connect_timeout=HTTP_CONNECT_TIMEOUT,
+                read_timeout=HTTP_READ_TIMEOUT,
+                retry_timeout=MAPS_CLIENT_RETRY_TIMEOUT,
+                queries_per_second=MAPS_CLIENT_QUERIES_PER_SECOND,
+                retry_over_query_limit=True,
+                requests_session=places_client.get_session(),
+                base_url=MAPS_API_BASE_URL
+            )
+            _client_builds += 1
+        return _client
+
+
+def reset_maps_client():
+    """
+    Drop the shared client so the next call builds a new one
+    """
+    global _client
+    with _client_lock:
+        _client = None
+
+
+def maps_client_stats() -> dict:
+    """
+    Get how many clients this process has built
+    """
+    return {'builds': _client_builds, 'active': _client is not None}
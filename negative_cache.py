@@ -0,0 +1,246 @@
+"""
+Negative cache for searches that return nothing
+Typo'd or nonexistent business/location pairs come back ZERO_RESULTS and are re-sent
+constantly by bots and retrying users. Empty results are remembered for a short TTL in
+SQLite (shared by every worker process), with an in-memory Bloom filter in front so the
+normal, non-empty search path never touches the database
+"""
+import hashlib
+import math
+import threading
+import time
+from typing import Callable, Dict
+from config import (
+    NEGATIVE_CACHE_ENABLED, NEGATIVE_CACHE_DB_PATH, NEGATIVE_CACHE_TTL, NEGATIVE_BLOOM_CAPACITY, NEGATIVE_BLOOM_ERROR_RATE
+)
+from search_cache import normalize_text
+from sqlite_store import SQLiteStore
+
+
+EMPTY_SEARCH = {'status': 'ZERO_RESULTS', 'results': []}
+
+
+def search_key(query: str, **params) -> str:
+    """
+    Build the negative-cache key for a search
+
+    Args:
+        query: Search text, compared after normalize_text()
+        **params: Other search parameters that change the result (location, radius, ...)
+
+    Returns:
+        Key string
+    """
+    normalized = normalize_text(query)
+    rest = '&'.join(f"{k}={params[k]}" for k in sorted(params) if params[k] not in (None, ''))
+    return f"{normalized}|{rest}"
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter using double hashing over a blake2b digest
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        """
+        Args:
+            capacity: Number of items the filter is sized for
+            error_rate: Target false-positive rate at capacity
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self.bits)
+
+    def estimated_false_positive_rate(self) -> float:
+        """
+        Expected false-positive rate given how many items have been added
+        """
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class NegativeCache(SQLiteStore):
+    """
+    Short-lived record of searches that returned no results
+
+    The Bloom filter only decides whether the database needs to be consulted: a false
+    positive costs one indexed lookup, never a wrong "no results". It is rebuilt from the
+    unexpired entries every TTL, which drops expired keys and picks up entries written
+    by other processes.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS empty_searches (
+            key TEXT PRIMARY KEY,
+            expires REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_empty_searches_expires ON empty_searches (expires);
+    """
+
+    def __init__(self, db_path: str = NEGATIVE_CACHE_DB_PATH, ttl: float = NEGATIVE_CACHE_TTL,
+                 capacity: int = NEGATIVE_BLOOM_CAPACITY, error_rate: float = NEGATIVE_BLOOM_ERROR_RATE):
+        """
+        Open the negative cache
+
+        Args:
+            db_path: Path to the SQLite database file
+            ttl: Seconds an empty result is remembered
+            capacity: Number of keys the Bloom filter is sized for
+            error_rate: Target Bloom false-positive rate at capacity
+        """
+        super().__init__(db_path)
+        self.ttl = ttl
+        self.capacity = capacity
+        self.error_rate = error_rate
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.bloom_negatives = 0
+        self.false_positives = 0
+        self.recorded = 0
+        self._rebuild_bloom()
+
+    def _rebuild_bloom(self):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("DELETE FROM empty_searches WHERE expires <= ?", (now,))
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        for (key,) in conn.execute("SELECT key FROM empty_searches"):
+            bloom.add(key)
+        with self._lock:
+            self._bloom = bloom
+            self._rebuild_at = now + self.ttl
+
+    def is_empty(self, key: str) -> bool:
+        """
+        Whether this search recently returned no results
+
+        Args:
+            key: Key from search_key()
+
+        Returns:
+            True if a caller can answer "no results" without calling upstream
+        """
+        if time.time() >= self._rebuild_at:
+            self._rebuild_bloom()
+
+        with self._lock:
+            maybe = key in self._bloom
+            if not maybe:
+                self.bloom_negatives += 1
+                return False
+
+        row = self._connect().execute("SELECT 1 FROM empty_searches WHERE key = ? AND expires > ?",
+                                      (key, time.time())).fetchone()
+        with self._lock:
+            if row is None:
+                self.false_positives += 1
+                return False
+            self.hits += 1
+            return True
+
+    def record(self, key: str):
+        """
+        Remember that a search returned no results
+        """
+        self._connect().execute("INSERT OR REPLACE INTO empty_searches (key, expires) VALUES (?, ?)",
+                                (key, time.time() + self.ttl))
+        with self._lock:
+            self._bloom.add(key)
+            self.recorded += 1
+
+    def search(self, key: str, search: Callable[[], Dict]) -> Dict:
+        """
+        Run a search unless it is known to be empty, remembering empty results
+
+        Args:
+            key: Key from search_key()
+            search: Function making the upstream Text Search call
+
+        Returns:
+            The search response, or an empty ZERO_RESULTS response from the cache
+        """
+        if self.is_empty(key):
+            return dict(EMPTY_SEARCH, results=[])
+        data = search()
+        if data.get('status') == 'ZERO_RESULTS':
+            self.record(key)
+        return data
+
+    def stats(self) -> Dict:
+        """
+        Get hit counters and Bloom filter accuracy and memory use for this process
+
+        Returns:
+            Dictionary of negative cache statistics
+        """
+        with self._lock:
+            bloom = self._bloom
+            negatives = self.false_positives + self.bloom_negatives
+            return {
+                'hits': self.hits,
+                'recorded': self.recorded,
+                'bloom_items': bloom.count,
+                'bloom_memory_bytes': bloom.memory_bytes,
+                'bloom_hashes': bloom.num_hashes,
+                'bloom_estimated_false_positive_rate': bloom.estimated_false_positive_rate(),
+                'bloom_false_positives': self.false_positives,
+                'bloom_observed_false_positive_rate': self.false_positives / negatives if negatives else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_negative_cache() -> NegativeCache:
+    """
+    Get the process-wide negative cache backed by NEGATIVE_CACHE_DB_PATH
+
+    Returns:
+        Shared NegativeCache
+    """
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = NegativeCache()
+    return _cache
+
+
+def search_unless_empty(search: Callable[[], Dict], query: str, **params) -> Dict:
+    """
+    Run a Text Search through the negative cache when it is enabled
+
+    Args:
+        search: Function making the upstream call for the first results page
+        query: Search text
+        **params: Other search parameters that change the result
+
+    Returns:
+        The search response, or an empty ZERO_RESULTS response for a recent miss
+    """
+    if not NEGATIVE_CACHE_ENABLED:
+        return search()
+    return get_negative_cache().search(search_key(query, **params), search)
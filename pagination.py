@@ -0,0 +1,90 @@
+"""
+Streaming pagination for Places Text Search results via next_page_token
+"""
+import time
+from typing import Callable, Dict, Iterator, Optional
+from config import NEXT_PAGE_TOKEN_DELAY, MAX_SEARCH_PAGES
+
+
+# A fresh next_page_token is rejected with INVALID_REQUEST until Google activates it
+TOKEN_RETRY_ATTEMPTS = 5
+TOKEN_RETRY_DELAY = 0.5  # seconds
+
+
+def _fetch_with_token(fetch_page: Callable[[Optional[str]], Dict], token: str) -> Dict:
+    """
+    Fetch a follow-up page, retrying while the token is not active yet
+    """
+    for attempt in range(TOKEN_RETRY_ATTEMPTS):
+        try:
+            data = fetch_page(token)
+        except Exception as e:
+            # Both PlacesAPIError and googlemaps.exceptions.ApiError carry .status
+            if getattr(e, 'status', None) != 'INVALID_REQUEST' or attempt == TOKEN_RETRY_ATTEMPTS - 1:
+                raise
+        else:
+            if data.get('status') != 'INVALID_REQUEST' or attempt == TOKEN_RETRY_ATTEMPTS - 1:
+                return data
+        time.sleep(TOKEN_RETRY_DELAY)
+
+
+def iter_pages(fetch_page: Callable[[Optional[str]], Dict], max_pages: int = MAX_SEARCH_PAGES,
+               token_delay: float = NEXT_PAGE_TOKEN_DELAY) -> Iterator[Dict]:
+    """
+    Yield Text Search response pages, following next_page_token
+
+    Pages are fetched lazily: the next page is only requested when the caller asks for it,
+    and only the part of the token-activation delay that has not already passed while the
+    caller was working on the previous page is slept.
+
+    Args:
+        fetch_page: Function taking a page token (None for the first page) and returning the JSON response
+        max_pages: Maximum pages to fetch (Text Search returns at most 3)
+        token_delay: Seconds before a next_page_token becomes valid
+
+    Yields:
+        JSON response for each page
+    """
+    token = None
+    ready_at = 0.0
+
+    for _ in range(max_pages):
+        if token is None:
+            data = fetch_page(None)
+        else:
+            remaining = ready_at - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+            data = _fetch_with_token(fetch_page, token)
+
+        # Start the activation clock before handing the page to the caller
+        token = data.get('next_page_token')
+        ready_at = time.monotonic() + token_delay
+
+        yield data
+
+        if not token:
+            return
+
+
+def iter_results(fetch_page: Callable[[Optional[str]], Dict], max_results: int = None,
+                 max_pages: int = MAX_SEARCH_PAGES, token_delay: float = NEXT_PAGE_TOKEN_DELAY) -> Iterator[Dict]:
+    """
+    Yield individual places across pages, stopping once max_results have been produced
+
+    Args:
+        fetch_page: Function taking a page token (None for the first page) and returning the JSON response
+        max_results: Stop after this many places (None for all pages)
+        max_pages: Maximum pages to fetch
+        token_delay: Seconds before a next_page_token becomes valid
+
+    Yields:
+        Place result dictionaries in ranking order
+    """
+    count = 0
+    for page in iter_pages(fetch_page, max_pages, token_delay):
+        for result in page.get('results', []):
+            yield result
+            count += 1
+            if max_results and count >= max_results:
+                return
@@ -0,0 +1,256 @@
+"""
+Shared HTTP client for Google Maps / Places API calls
+Keeps one pooled keep-alive session per process so repeated calls reuse connections
+instead of paying a new TCP + TLS handshake every time
+"""
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, Optional, Tuple
+from config import (
+    MAPS_API_BASE_URL, HTTP_POOL_SIZE,
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, QUOTA_ENABLED,
+    RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_TTLS, FIELD_CACHE_ENABLED, NEGATIVE_CACHE_ENABLED,
+    SEARCH_CACHE_ENABLED, CASSETTE_MODE
+)
+from rate_limiter import get_rate_limiter
+from quota import get_quota_coordinator, sku_for_endpoint
+from response_cache import get_response_cache, cache_key
+from field_cache import get_field_cache
+from negative_cache import get_negative_cache, search_unless_empty
+from search_cache import get_search_cache
+from single_flight import SingleFlight
+from resilience import call_with_retries, check_response, get_circuit_breaker, circuit_stats
+from cassette import mount_cassette, REPLAY
+
+
+DEFAULT_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+TEXT_SEARCH_ENDPOINT = 'place/textsearch/json'
+
+# name -> (pid, session); rebuilt after a fork
+_sessions = {}
+_session_lock = threading.Lock()
+
+# Coalesces concurrent identical requests (same endpoint, params and key) in this process
+single_flight = SingleFlight()
+
+
+class PlacesSession(requests.Session):
+    """
+    Session that applies the process rate limit and host-wide quota before every send
+
+    Limits live here rather than in request_json so that anything sharing the session
+    (e.g. a googlemaps.Client) is metered the same way. Replayed cassette traffic is
+    rate limited but does not spend quota.
+    """
+
+    def send(self, request, **kwargs):
+        get_rate_limiter().acquire()
+        if QUOTA_ENABLED and CASSETTE_MODE != REPLAY:
+            get_quota_coordinator().acquire(sku_for_endpoint(request.url))
+        return super().send(request, **kwargs)
+
+
+def _build_session(pool_size: int, session_class=PlacesSession) -> requests.Session:
+    """
+    Build a session whose connection pool holds one keep-alive connection per worker thread
+
+    Args:
+        pool_size: Maximum number of connections kept open per host
+        session_class: Session class to instantiate
+
+    Returns:
+        Configured requests session
+    """
+    session = session_class()
+    pool_kwargs = {'pool_connections': 4, 'pool_maxsize': pool_size, 'pool_block': True}
+    if not mount_cassette(session, **pool_kwargs):
+        adapter = HTTPAdapter(**pool_kwargs)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+    return session
+
+
+def _shared_session(name: str, session_class) -> requests.Session:
+    pid = os.getpid()
+    entry = _sessions.get(name)
+    if entry is not None and entry[0] == pid:
+        return entry[1]
+
+    with _session_lock:
+        entry = _sessions.get(name)
+        if entry is None or entry[0] != pid:
+            entry = _sessions[name] = (pid, _build_session(HTTP_POOL_SIZE, session_class))
+    return entry[1]
+
+
+def get_session() -> requests.Session:
+    """
+    Get the process-wide pooled session for Maps API calls, creating it on first use
+
+    The session is rebuilt after a fork so worker processes never share sockets
+    with their parent.
+
+    Returns:
+        Shared requests session
+    """
+    return _shared_session('places', PlacesSession)
+
+
+def get_http_session() -> requests.Session:
+    """
+    Get the process-wide pooled session for non-API traffic such as scraper page fetches
+
+    It shares the pooling and cassette recording of get_session() but is not metered
+    against the Places rate limit or quota.
+
+    Returns:
+        Shared requests session
+    """
+    return _shared_session('http', requests.Session)
+
+
+def close_session():
+    """
+    Close the shared sessions and drop their pooled connections
+    """
+    with _session_lock:
+        for _, session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def build_url(endpoint: str) -> str:
+    """
+    Build a full Maps API URL from an endpoint path
+
+    Args:
+        endpoint: Path below /maps/api/, e.g. 'place/details/json'
+
+    Returns:
+        Absolute URL
+    """
+    return f"{MAPS_API_BASE_URL.rstrip('/')}/maps/api/{endpoint.lstrip('/')}"
+
+
+def request_json(endpoint: str, params: Dict = None, api_key: str = None,
+                 timeout: Optional[Tuple[float, float]] = None, use_cache: bool = True) -> Dict:
+    """
+    Make a GET request to the Maps API through the shared session
+
+    This is the single entry point used by every Places API call site. Concurrent
+    identical requests share one upstream call, endpoints listed in
+    RESPONSE_CACHE_TTLS are read through the persistent response cache, and Text
+    Searches that recently came back empty are answered from the negative cache.
+
+    Args:
+        endpoint: Path below /maps/api/, e.g. 'place/textsearch/json'
+        params: Query parameters
+        api_key: Google API key, added to params when given
+        timeout: (connect, read) timeout in seconds. Defaults to config values
+        use_cache: Whether to read through the response and negative caches
+
+    Returns:
+        JSON response data
+
+    Raises:
+        requests.exceptions.RequestException: On connection errors or HTTP error status
+        resilience.PlacesAPIError: On a Places error status, or once retries are exhausted
+        resilience.CircuitOpenError: While the endpoint's circuit breaker is open
+        quota.QuotaExceededError: If the endpoint's daily budget is spent
+    """
+    params = dict(params or {})
+    if api_key:
+        params['key'] = api_key
+
+    key = cache_key(endpoint, params)
+    return single_flight.do((key, params.get('key'), use_cache), _fetch_json, endpoint, key, params, timeout, use_cache)
+
+
+def _fetch_json(endpoint: str, key: str, params: Dict, timeout: Optional[Tuple[float, float]],
+                use_cache: bool = True) -> Dict:
+    """
+    Fetch a response, reading through the response and negative caches where configured
+    """
+    ttl = RESPONSE_CACHE_TTLS.get(endpoint) if RESPONSE_CACHE_ENABLED and use_cache else None
+    if ttl:
+        cached = get_response_cache().get(key)
+        if cached is not None:
+            return cached
+
+    url = build_url(endpoint)
+
+    def fetch():
+        return call_with_retries(
+            lambda: check_response(get_session().get(url, params=params, timeout=timeout or DEFAULT_TIMEOUT)),
+            breaker=get_circuit_breaker(endpoint)
+        )
+
+    if endpoint == TEXT_SEARCH_ENDPOINT and use_cache and 'pagetoken' not in params:
+        search_params = {k: v for k, v in params.items() if k not in ('key', 'query')}
+        data = search_unless_empty(fetch, params.get('query'), **search_params)
+    else:
+        data = fetch()
+
+    # Only successful responses are cached; errors and empty results are retried next time
+    if ttl and data.get('status') == 'OK':
+        get_response_cache().put(key, endpoint, data, ttl)
+    return data
+
+
+def get_place_details(place_id: str, fields, api_key: str = None, language: str = None) -> Dict:
+    """
+    Get Place Details through the two-tier field cache
+
+    Only fields that are missing or expired are requested upstream: contact fields are
+    reused for weeks, volatile ones (rating, reviews) for about an hour. With the field
+    cache disabled this is a plain details request through the response cache, which
+    only caches details then (see RESPONSE_CACHE_TTLS in config.py).
+
+    Args:
+        place_id: Google Place ID
+        fields: Comma-separated string or list of field names
+        api_key: Google API key
+        language: Language code for the results
+
+    Returns:
+        Details 'result' object, or an empty dictionary if the place was not found
+
+    Raises:
+        Same errors as request_json
+    """
+    def fetch(wanted) -> Optional[Dict]:
+        params = {'place_id': place_id, 'fields': wanted if isinstance(wanted, str) else ','.join(wanted)}
+        if language:
+            params['language'] = language
+        data = request_json('place/details/json', params, api_key=api_key)
+        return data.get('result') if data.get('status') == 'OK' else None
+
+    if not FIELD_CACHE_ENABLED:
+        return fetch(fields) or {}
+    return get_field_cache().details(place_id, fields, fetch, language=language)
+
+
+def client_stats() -> Dict:
+    """
+    Collect counters from every layer of the client for monitoring
+
+    Returns:
+        Dictionary of rate limiter, single-flight, circuit breaker and cache statistics
+    """
+    stats = {
+        'rate_limiter': get_rate_limiter().stats(),
+        'single_flight': single_flight.stats(),
+        'circuit_breakers': circuit_stats(),
+    }
+    if RESPONSE_CACHE_ENABLED:
+        stats['response_cache'] = get_response_cache().stats()
+    if FIELD_CACHE_ENABLED:
+        stats['field_cache'] = get_field_cache().stats()
+    if NEGATIVE_CACHE_ENABLED:
+        stats['negative_cache'] = get_negative_cache().stats()
+    if SEARCH_CACHE_ENABLED:
+        stats['search_cache'] = get_search_cache().stats()
+    return stats
@@ -0,0 +1,246 @@
+"""
+Host-wide quota coordinator for Google Maps API calls
+All processes on a host share one SQLite database (WAL mode) that holds a global
+token bucket, per-SKU daily spend and a ledger of every request made
+"""
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+import requests
+from config import QUOTA_DB_PATH, GLOBAL_REQUESTS_PER_SECOND, RATE_LIMIT_BURST, DAILY_BUDGETS
+from sqlite_store import SQLiteStore
+
+
+class QuotaExceededError(requests.exceptions.RequestException):
+    """
+    Raised when the daily budget for an API SKU has been spent
+    """
+
+
+def sku_for_endpoint(endpoint: str) -> str:
+    """
+    Map a Maps API path to its billing SKU
+
+    Args:
+        endpoint: URL or path, e.g. 'place/details/json' or '.../maps/api/geocode/json'
+
+    Returns:
+        SKU name such as 'textsearch', 'details' or 'geocode'
+    """
+    path = endpoint.split('?', 1)[0].rstrip('/')
+    parts = [p for p in path.split('/') if p]
+    if parts and parts[-1] in ('json', 'xml'):
+        parts = parts[:-1]
+    return parts[-1] if parts else 'unknown'
+
+
+class QuotaCoordinator(SQLiteStore):
+    """
+    Enforces a global requests-per-second limit and daily per-SKU budgets across processes
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS rate_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            tokens REAL NOT NULL,
+            updated REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS daily_spend (
+            day TEXT NOT NULL,
+            sku TEXT NOT NULL,
+            units INTEGER NOT NULL,
+            PRIMARY KEY (day, sku)
+        );
+        CREATE TABLE IF NOT EXISTS ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts REAL NOT NULL,
+            day TEXT NOT NULL,
+            sku TEXT NOT NULL,
+            units INTEGER NOT NULL,
+            pid INTEGER NOT NULL,
+            waited REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_ledger_day_sku ON ledger (day, sku);
+    """
+
+    def __init__(self, db_path: str = QUOTA_DB_PATH, rate: float = GLOBAL_REQUESTS_PER_SECOND,
+                 burst: int = RATE_LIMIT_BURST, daily_budgets: Dict[str, int] = None):
+        """
+        Initialize the coordinator and create the database if needed
+
+        Args:
+            db_path: Path to the shared SQLite database
+            rate: Host-wide requests per second
+            burst: Maximum requests allowed back-to-back
+            daily_budgets: Requests allowed per SKU per UTC day. Missing or 0 means unlimited
+        """
+        super().__init__(db_path)
+        self.rate = float(rate)
+        self.burst = burst
+        self.daily_budgets = dict(DAILY_BUDGETS if daily_budgets is None else daily_budgets)
+
+        self._connect().execute("INSERT OR IGNORE INTO rate_state (id, tokens, updated) VALUES (1, ?, ?)",
+                                (float(self.burst), time.time()))
+
+    @staticmethod
+    def _day(ts: float) -> str:
+        return time.strftime('%Y-%m-%d', time.gmtime(ts))
+
+    def reserve(self, sku: str, units: int = 1) -> float:
+        """
+        Record a spend and reserve a slot in the global rate limit without sleeping
+
+        Args:
+            sku: API SKU being called
+            units: Number of billable requests
+
+        Returns:
+            Seconds the caller must wait before sending
+
+        Raises:
+            QuotaExceededError: If the SKU's daily budget is already spent
+        """
+        conn = self._connect()
+        now = time.time()
+        day = self._day(now)
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            budget = self.daily_budgets.get(sku) or 0
+            if budget:
+                row = conn.execute("SELECT units FROM daily_spend WHERE day = ? AND sku = ?",
+                                   (day, sku)).fetchone()
+                spent = row[0] if row else 0
+                if spent + units > budget:
+                    raise QuotaExceededError(f"Daily budget for '{sku}' exhausted ({spent}/{budget})")
+
+            tokens, updated = conn.execute("SELECT tokens, updated FROM rate_state WHERE id = 1").fetchone()
+            tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate) - units
+            wait = -tokens / self.rate if tokens < 0 else 0.0
+
+            conn.execute("UPDATE rate_state SET tokens = ?, updated = ? WHERE id = 1", (tokens, now))
+            conn.execute("""
+                INSERT INTO daily_spend (day, sku, units) VALUES (?, ?, ?)
+                ON CONFLICT (day, sku) DO UPDATE SET units = units + excluded.units
+            """, (day, sku, units))
+            conn.execute("INSERT INTO ledger (ts, day, sku, units, pid, waited) VALUES (?, ?, ?, ?, ?, ?)",
+                         (now, day, sku, units, os.getpid(), wait))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+    def acquire(self, sku: str, units: int = 1) -> float:
+        """
+        Block until the global rate limit allows a request, recording the spend
+
+        Args:
+            sku: API SKU being called
+            units: Number of billable requests
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self.reserve(sku, units)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def spend_today(self) -> Dict[str, int]:
+        """
+        Get today's spend per SKU
+
+        Returns:
+            Dictionary mapping SKU to units spent today (UTC)
+        """
+        rows = self._connect().execute("SELECT sku, units FROM daily_spend WHERE day = ?",
+                                       (self._day(time.time()),)).fetchall()
+        return {sku: units for sku, units in rows}
+
+    def remaining_today(self, sku: str) -> Optional[int]:
+        """
+        Get the remaining daily budget for a SKU
+
+        Returns:
+            Units left today, or None if the SKU has no budget
+        """
+        budget = self.daily_budgets.get(sku) or 0
+        if not budget:
+            return None
+        return max(0, budget - self.spend_today().get(sku, 0))
+
+    def ledger(self, sku: str = None, since: float = None, limit: int = 1000) -> List[Dict]:
+        """
+        Query the spend ledger, newest first
+
+        Args:
+            sku: Only return entries for this SKU
+            since: Only return entries at or after this Unix timestamp
+            limit: Maximum rows to return
+
+        Returns:
+            List of ledger entry dictionaries
+        """
+        query = "SELECT ts, sku, units, pid, waited FROM ledger WHERE 1 = 1"
+        args = []
+        if sku:
+            query += " AND sku = ?"
+            args.append(sku)
+        if since is not None:
+            query += " AND ts >= ?"
+            args.append(since)
+        query += " ORDER BY id DESC LIMIT ?"
+        args.append(limit)
+
+        rows = self._connect().execute(query, args).fetchall()
+        return [{'ts': ts, 'sku': s, 'units': units, 'pid': pid, 'waited': waited}
+                for ts, s, units, pid, waited in rows]
+
+    def prune_ledger(self, keep_days: int = 30) -> int:
+        """
+        Delete ledger entries older than keep_days
+
+        Returns:
+            Number of rows deleted
+        """
+        cutoff = time.time() - keep_days * 86400
+        conn = self._connect()
+        cursor = conn.execute("DELETE FROM ledger WHERE ts < ?", (cutoff,))
+        conn.execute("DELETE FROM daily_spend WHERE day < ?", (self._day(cutoff),))
+        return cursor.rowcount
+
+
+_coordinator = None
+_coordinator_lock = threading.Lock()
+
+
+def get_quota_coordinator() -> QuotaCoordinator:
+    """
+    Get the process-wide coordinator backed by QUOTA_DB_PATH
+
+    Returns:
+        Shared QuotaCoordinator
+    """
+    global _coordinator
+
+    if _coordinator is None:
+        with _coordinator_lock:
+            if _coordinator is None:
+                _coordinator = QuotaCoordinator()
+    return _coordinator
+
+
+if __name__ == "__main__":
+    # Print today's spend and the most recent ledger entries
+    coordinator = get_quota_coordinator()
+    print(f"Quota database: {coordinator.db_path}")
+    print("Spend today (UTC):")
+    for sku, units in sorted(coordinator.spend_today().items()):
+        remaining = coordinator.remaining_today(sku)
+        print(f"  {sku:<12} {units:>8}  remaining: {'unlimited' if remaining is None else remaining}")
+    print("\nRecent requests:")
+    for entry in coordinator.ledger(limit=20):
+        print(f"  {time.strftime('%H:%M:%S', time.localtime(entry['ts']))}  {entry['sku']:<12} "
+              f"pid={entry['pid']}  waited={entry['waited'] * 1000:.0f} ms")
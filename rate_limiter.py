@@ -0,0 +1,149 @@
+"""
+Token-bucket rate limiter shared by all Places API calls in a process
+"""
+import threading
+import time
+from typing import Dict
+from config import REQUESTS_PER_SECOND, RATE_LIMIT_BURST
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+
+    Tokens refill continuously at `rate` per second up to `burst`. A caller that finds
+    the bucket empty reserves the next token and sleeps outside the lock, so concurrent
+    callers queue up behind each other without holding the lock while they wait.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Initialize the bucket full
+
+        Args:
+            rate: Tokens added per second
+            burst: Maximum tokens that can accumulate
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+
+        self.rate = float(rate)
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+        # Counters
+        self._acquired = 0
+        self._throttled = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def reserve(self, tokens: int = 1) -> float:
+        """
+        Take tokens from the bucket without sleeping
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            Seconds the caller must wait before proceeding (0 if tokens were available)
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+            self._acquired += 1
+            if wait > 0:
+                self._throttled += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+        return wait
+
+    def acquire(self, tokens: int = 1) -> float:
+        """
+        Block until tokens are available
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def stats(self) -> Dict:
+        """
+        Get wait-time counters
+
+        Returns:
+            Dictionary with acquire/throttle counts and wait totals in seconds
+        """
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'acquired': self._acquired,
+                'throttled': self._throttled,
+                'total_wait_seconds': self._total_wait,
+                'max_wait_seconds': self._max_wait,
+                'average_wait_seconds': self._total_wait / self._throttled if self._throttled else 0.0,
+            }
+
+    def reset_stats(self):
+        """
+        Reset wait-time counters
+        """
+        with self._lock:
+            self._acquired = 0
+            self._throttled = 0
+            self._total_wait = 0.0
+            self._max_wait = 0.0
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> TokenBucket:
+    """
+    Get the process-wide limiter configured from REQUESTS_PER_SECOND and RATE_LIMIT_BURST
+
+    Returns:
+        Shared TokenBucket
+    """
+    global _limiter
+
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = TokenBucket(REQUESTS_PER_SECOND, RATE_LIMIT_BURST)
+    return _limiter
+
+
+def configure_rate_limiter(rate: float, burst: int = 1) -> TokenBucket:
+    """
+    Replace the process-wide limiter, e.g. for benchmarks or a per-deployment override
+
+    Args:
+        rate: Tokens added per second
+        burst: Maximum tokens that can accumulate
+
+    Returns:
+        The new shared TokenBucket
+    """
+    global _limiter
+
+    with _limiter_lock:
+        _limiter = TokenBucket(rate, burst)
+    return _limiter
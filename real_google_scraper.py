@@ -10,6 +10,7 @@ from flask import Flask, request, jsonify
 from dotenv import load_dotenv
 from yelp_analyzer import GooglePlacesReviewAnalyzer
 from utils import search_businesses
+import places_client
 import urllib.parse
 import json
 
@@ -508,7 +509,7 @@ def attempt_real_google_scraping(user_name, known_review=None):
             try:
                 scraping_log.append(f"🌐 Trying URL {i+1}: {url}")
                 
-                response = requests.get(url, headers=headers, timeout=10)
+                response = places_client.get_http_session().get(url, headers=headers, timeout=10)
                 scraping_log.append(f"📡 Response status: {response.status_code}")
                 
                 if response.status_code == 200:
@@ -0,0 +1,277 @@
+"""
+Retry, backoff and circuit breaking for Google Maps API calls
+Understands both HTTP status codes and Places-level statuses such as OVER_QUERY_LIMIT
+that arrive inside an HTTP 200
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+import requests
+from config import (
+    RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY, RETRY_AFTER_MAX,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT
+)
+
+
+RETRYABLE_HTTP_STATUSES = {429, 500, 502, 503, 504}
+RETRYABLE_PLACES_STATUSES = {'OVER_QUERY_LIMIT', 'UNKNOWN_ERROR'}
+FAILED_PLACES_STATUSES = {'REQUEST_DENIED', 'INVALID_REQUEST'}
+
+
+class PlacesAPIError(requests.exceptions.RequestException):
+    """
+    Raised for an HTTP or Places-level error status
+
+    Attributes:
+        status: HTTP status code or Places status string
+        retryable: Whether the call may succeed if retried
+        retry_after: Seconds the server asked us to wait, if it said
+    """
+
+    def __init__(self, status, message: str = '', retryable: bool = False,
+                 retry_after: Optional[float] = None, response=None):
+        super().__init__(f"{status}: {message}" if message else str(status), response=response)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """
+    Raised without calling upstream while an endpoint's circuit is open
+    """
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given in seconds or as an HTTP date
+
+    Returns:
+        Seconds to wait, or None if absent or unparseable
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def check_response(response: requests.Response) -> Dict:
+    """
+    Turn a Maps API response into JSON data or a classified error
+
+    Args:
+        response: HTTP response
+
+    Returns:
+        JSON response data for OK, ZERO_RESULTS and NOT_FOUND statuses
+
+    Raises:
+        PlacesAPIError: For retryable HTTP statuses and Places error statuses
+        requests.exceptions.HTTPError: For other HTTP error statuses
+    """
+    if response.status_code in RETRYABLE_HTTP_STATUSES:
+        raise PlacesAPIError(response.status_code, response.reason or '', retryable=True,
+                             retry_after=parse_retry_after(response.headers.get('Retry-After')),
+                             response=response)
+    response.raise_for_status()
+
+    data = response.json()
+    status = data.get('status') if isinstance(data, dict) else None
+    if status in RETRYABLE_PLACES_STATUSES:
+        raise PlacesAPIError(status, data.get('error_message', ''), retryable=True,
+                             retry_after=parse_retry_after(response.headers.get('Retry-After')),
+                             response=response)
+    if status in FAILED_PLACES_STATUSES:
+        raise PlacesAPIError(status, data.get('error_message', ''), response=response)
+    return data
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Whether an error from an upstream call is worth retrying
+    """
+    if isinstance(error, PlacesAPIError):
+        return error.retryable
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY) -> float:
+    """
+    Capped exponential backoff with full jitter
+
+    Args:
+        attempt: Zero-based retry number
+
+    Returns:
+        Seconds to sleep
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker
+
+    After `failure_threshold` consecutive retryable failures the circuit opens and calls
+    fail fast for `reset_timeout` seconds. Then a single probe call is let through
+    (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """
+        Check whether a call may proceed
+
+        Raises:
+            CircuitOpenError: If the circuit is open or a half-open probe is already running
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.rejected += 1
+            remaining = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(f"Circuit for '{self.name}' is open, retry in {remaining:.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def release(self):
+        """
+        Give back a half-open probe slot for a call that never reached upstream
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def stats(self) -> Dict:
+        state = self.state
+        with self._lock:
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """
+    Get the process-wide circuit breaker for an endpoint, creating it on first use
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def circuit_stats() -> Dict[str, Dict]:
+    """
+    Get the state of every circuit breaker created so far
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.stats() for breaker in breakers}
+
+
+def call_with_retries(func: Callable, breaker: CircuitBreaker = None,
+                      max_attempts: int = RETRY_MAX_ATTEMPTS, sleep: Callable = time.sleep):
+    """
+    Call func, retrying retryable failures with backoff and honoring Retry-After
+
+    Args:
+        func: Function making one upstream attempt
+        breaker: Circuit breaker guarding the endpoint
+        max_attempts: Total attempts including the first
+        sleep: Sleep function (replaceable in tests)
+
+    Returns:
+        func's result
+
+    Raises:
+        CircuitOpenError: If the breaker rejects the call
+        The last error once attempts are exhausted, or any non-retryable error immediately
+    """
+    for attempt in range(max_attempts):
+        if breaker:
+            breaker.allow()
+        try:
+            result = func()
+        except Exception as e:
+            if not is_retryable(e):
+                if breaker:
+                    if getattr(e, 'response', None) is not None:
+                        # The upstream answered; the request itself was bad
+                        breaker.record_success()
+                    else:
+                        # Failed locally (e.g. quota exhausted) without telling us anything
+                        breaker.release()
+                raise
+            if breaker:
+                breaker.record_failure()
+            if attempt == max_attempts - 1:
+                raise
+
+            delay = backoff_delay(attempt)
+            retry_after = getattr(e, 'retry_after', None)
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, RETRY_AFTER_MAX))
+            sleep(delay)
+        else:
+            if breaker:
+                breaker.record_success()
+            return result
@@ -0,0 +1,261 @@
+"""
+Persistent on-disk cache for Maps API responses
+Raw JSON responses are stored compressed in SQLite with a per-entry TTL and evicted
+least-recently-used once the cache grows past its size limit
+"""
+import json
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+from config import RESPONSE_CACHE_DB_PATH, RESPONSE_CACHE_MAX_BYTES
+from sqlite_store import SQLiteStore
+
+
+def normalize_fields(fields) -> str:
+    """
+    Normalize a Places `fields` parameter so equivalent field lists share a cache key
+
+    Args:
+        fields: Comma-separated string or list of field names
+
+    Returns:
+        Sorted, de-duplicated, comma-separated field list
+    """
+    if not fields:
+        return ''
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    return ','.join(sorted({f.strip() for f in fields if f and f.strip()}))
+
+
+def cache_key(endpoint: str, params: Dict) -> str:
+    """
+    Build the cache key for a request
+
+    The key is (endpoint, place_id, normalized field list, language) plus any other
+    parameters; the API key is never part of it.
+
+    Args:
+        endpoint: Maps API path, e.g. 'place/details/json'
+        params: Query parameters
+
+    Returns:
+        Cache key string
+    """
+    params = {k: v for k, v in (params or {}).items() if k != 'key'}
+    place_id = str(params.pop('place_id', ''))
+    fields = normalize_fields(params.pop('fields', ''))
+    language = str(params.pop('language', '')).lower()
+    rest = '&'.join(f"{k}={params[k]}" for k in sorted(params))
+    return '|'.join([endpoint, place_id, fields, language, rest])
+
+
+class ResponseCache(SQLiteStore):
+    """
+    Size-bounded LRU cache of JSON responses with per-entry expiry
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            endpoint TEXT NOT NULL,
+            body BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            created REAL NOT NULL,
+            expires REAL NOT NULL,
+            last_access REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access);
+        CREATE TABLE IF NOT EXISTS meta (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_size INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO meta (id, total_size) VALUES (1, 0);
+    """
+
+    def __init__(self, db_path: str = RESPONSE_CACHE_DB_PATH, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        """
+        Open the cache
+
+        Args:
+            db_path: Path to the SQLite cache database
+            max_bytes: Maximum total size of stored (compressed) responses
+        """
+        super().__init__(db_path)
+        self.max_bytes = max_bytes
+
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _count(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Cache key from cache_key()
+
+        Returns:
+            Cached JSON data, or None on a miss or expired entry
+        """
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("SELECT body, size, expires FROM entries WHERE key = ?", (key,)).fetchone()
+
+        if row is None:
+            self._count('misses')
+            return None
+
+        body, size, expires = row
+        if expires <= now:
+            self._delete(key)
+            self._count('expirations')
+            self._count('misses')
+            return None
+
+        conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+        self._count('hits')
+        return json.loads(zlib.decompress(body))
+
+    def put(self, key: str, endpoint: str, data: Dict, ttl: float):
+        """
+        Store a response, evicting least-recently-used entries if over the size limit
+
+        Args:
+            key: Cache key from cache_key()
+            endpoint: Maps API path the response came from
+            data: JSON response data
+            ttl: Seconds until the entry expires
+        """
+        body = zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+        size = len(body)
+        if size > self.max_bytes:
+            return
+
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            old_size = row[0] if row else 0
+            conn.execute("""
+                INSERT OR REPLACE INTO entries (key, endpoint, body, size, created, expires, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (key, endpoint, body, size, now, now + ttl, now))
+            total = conn.execute("SELECT total_size FROM meta WHERE id = 1").fetchone()[0] + size - old_size
+
+            evicted = 0
+            while total > self.max_bytes:
+                victims = conn.execute("SELECT key, size FROM entries WHERE key != ? ORDER BY last_access LIMIT 64",
+                                       (key,)).fetchall()
+                if not victims:
+                    break
+                for victim_key, victim_size in victims:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (victim_key,))
+                    total -= victim_size
+                    evicted += 1
+                    if total <= self.max_bytes:
+                        break
+            conn.execute("UPDATE meta SET total_size = ? WHERE id = 1", (total,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        if evicted:
+            self._count('evictions', evicted)
+
+    def _delete(self, key: str):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            if row:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                conn.execute("UPDATE meta SET total_size = total_size - ? WHERE id = 1", (row[0],))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def purge_expired(self) -> int:
+        """
+        Delete every expired entry
+
+        Returns:
+            Number of entries removed
+        """
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE expires <= ?",
+                                       (now,)).fetchone()
+            conn.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+            conn.execute("UPDATE meta SET total_size = total_size - ? WHERE id = 1", (size,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._count('expirations', count)
+        return count
+
+    def clear(self):
+        """
+        Remove every entry
+        """
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute("DELETE FROM entries")
+        conn.execute("UPDATE meta SET total_size = 0 WHERE id = 1")
+        conn.execute('COMMIT')
+
+    def stats(self) -> Dict:
+        """
+        Get hit/miss/eviction counters for this process and the cache's current size
+
+        Returns:
+            Dictionary of cache statistics
+        """
+        conn = self._connect()
+        entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        total = conn.execute("SELECT total_size FROM meta WHERE id = 1").fetchone()[0]
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': entries,
+                'size_bytes': total,
+                'max_bytes': self.max_bytes,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Get the process-wide response cache backed by RESPONSE_CACHE_DB_PATH
+
+    Returns:
+        Shared ResponseCache
+    """
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,330 @@
+"""
+Columnar scoring of reviews and reviewer histories
+Reviews are flattened into typed columns once and per-reviewer statistics are computed
+with NumPy reductions over all histories at the same time, instead of per-row Series
+and per-user list comprehensions. Reviewers known to the reviewer index are instead
+scored from a RatingAccumulator, which is updated review by review and never needs the
+history; both give reviewer statistics with the same fields
+"""
+import struct
+from array import array
+from itertools import chain
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from config import LOW_RATING_THRESHOLD, SUSPICIOUS_THRESHOLD, MIN_REVIEWS_FOR_ANALYSIS
+
+
+def add_reviewer_columns(df_reviews: pd.DataFrame, image_url: bool = False) -> pd.DataFrame:
+    """
+    Flatten the nested 'user' dictionaries into reviewer columns, in place
+
+    Args:
+        df_reviews: Reviews with a 'user' column of {'id', 'name', ...} dictionaries
+        image_url: Also add 'reviewer_image_url'
+
+    Returns:
+        The same DataFrame
+    """
+    users = df_reviews['user'].tolist()
+    df_reviews['reviewer_id'] = [user['id'] for user in users]
+    df_reviews['reviewer_name'] = [user['name'] for user in users]
+    if image_url:
+        df_reviews['reviewer_image_url'] = [user.get('image_url', '') for user in users]
+    return df_reviews
+
+
+STARS = np.arange(1, 6)
+
+
+def review_time(review: Dict) -> int:
+    """
+    Posting time of a review as a Unix timestamp (0 if unknown)
+    """
+    try:
+        return int(review.get('time_created') or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def star_rating(value) -> int:
+    """
+    A review's rating as a whole number of stars, 1 to 5 (0 if missing or out of range)
+    """
+    try:
+        rating = float(value)
+    except (TypeError, ValueError):
+        return 0
+    return int(rating) if rating in (1, 2, 3, 4, 5) else 0
+
+
+def reviewer_stats(histories: Dict[Hashable, List[Dict]]) -> Dict[Hashable, Dict]:
+    """
+    Rating statistics for many reviewers in one pass
+
+    Every history is concatenated into a single ratings array with a reviewer code per
+    rating. Per-star counts come from one np.bincount over (code, star) pairs, and
+    totals, low-rating counts, means and variances are derived from those counts.
+    Ratings that are missing or outside 1-5 are left out (and counted in a warning), so
+    one bad history does not stop the analysis.
+
+    Args:
+        histories: Reviewer key to that reviewer's reviews (each with a 'rating')
+
+    Returns:
+        Reviewer key to total_reviews, low_rating_count, low_rating_percentage,
+        average_rating, rating_variance, rating_counts (reviews per star, 1 to 5),
+        first_seen, last_seen (Unix times, 0 if unknown) and is_suspicious, for
+        reviewers with at least MIN_REVIEWS_FOR_ANALYSIS valid ratings
+    """
+    keys = [key for key, reviews in histories.items() if len(reviews) >= MIN_REVIEWS_FOR_ANALYSIS]
+    if not keys:
+        return {}
+
+    kept = [histories[key] for key in keys]
+    lengths = np.fromiter(map(len, kept), dtype=np.int64, count=len(keys))
+    total = int(lengths.sum())
+    ratings = np.fromiter((star_rating(review.get('rating')) for review in chain.from_iterable(kept)),
+                          dtype=np.int64, count=total)
+    times = np.fromiter(map(review_time, chain.from_iterable(kept)), dtype=np.int64, count=total)
+    codes = np.repeat(np.arange(len(keys)), lengths)
+    valid = ratings > 0
+    if not valid.all():
+        print(f"⚠️  Skipped {total - int(valid.sum())} reviewer ratings outside 1-5")
+        ratings, times, codes = ratings[valid], times[valid], codes[valid]
+        lengths = np.bincount(codes, minlength=len(keys))
+    # Reviewers left with no valid rating are dropped below; this only avoids dividing by 0
+    divisors = np.maximum(lengths, 1)
+
+    counts = np.bincount(codes * 5 + ratings - 1, minlength=len(keys) * 5).reshape(len(keys), 5)
+    low_counts = counts[:, :LOW_RATING_THRESHOLD - 1].sum(axis=1)
+    low_percentages = low_counts / divisors
+    averages = counts @ STARS / divisors
+    variances = np.maximum(counts @ (STARS * STARS) / divisors - averages * averages, 0.0)
+    suspicious = low_percentages >= SUSPICIOUS_THRESHOLD
+
+    # Unknown times (0) are left out of first_seen
+    no_time = np.iinfo(np.int64).max
+    first_seen = np.full(len(keys), no_time)
+    np.minimum.at(first_seen, codes, np.where(times > 0, times, no_time))
+    first_seen[first_seen == no_time] = 0
+    last_seen = np.zeros(len(keys), dtype=np.int64)
+    np.maximum.at(last_seen, codes, times)
+
+    return {
+        key: {
+            'total_reviews': int(lengths[i]),
+            'low_rating_count': int(low_counts[i]),
+            'low_rating_percentage': float(low_percentages[i]),
+            'average_rating': float(averages[i]),
+            'rating_variance': float(variances[i]),
+            'rating_counts': counts[i].tolist(),
+            'first_seen': int(first_seen[i]),
+            'last_seen': int(last_seen[i]),
+            'is_suspicious': bool(suspicious[i]),
+        }
+        for i, key in enumerate(keys) if lengths[i] >= MIN_REVIEWS_FOR_ANALYSIS
+    }
+
+
+class RatingAccumulator:
+    """
+    Online rating statistics of one reviewer
+
+    Keeps the number of reviews per star (1-5) in a fixed int array, the running mean
+    and sum of squared deviations (Welford) and when the reviewer was first and last
+    seen. Adding or removing a review is O(1) and the verdict comes from the counts
+    alone, so the reviewer's reviews never have to be kept or re-read.
+    """
+
+    __slots__ = ('counts', 'mean', 'm2', 'first_seen', 'last_seen')
+
+    COUNTS = struct.Struct('<5I')
+
+    def __init__(self, counts: bytes = None, mean: float = 0.0, m2: float = 0.0,
+                 first_seen: int = 0, last_seen: int = 0):
+        """
+        Args:
+            counts: Packed per-star counts from pack(), None for a new reviewer
+            mean: Running mean rating
+            m2: Running sum of squared deviations from the mean
+            first_seen: Unix time of the earliest review
+            last_seen: Unix time of the latest review
+        """
+        self.counts = array('I', self.COUNTS.unpack(counts) if counts else (0,) * 5)
+        self.mean = mean
+        self.m2 = m2
+        self.first_seen = first_seen
+        self.last_seen = last_seen
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    @staticmethod
+    def _check(rating: int):
+        if not 1 <= rating <= 5:
+            raise ValueError(f"Rating must be 1-5, got {rating}")
+
+    def add(self, rating: int, seen: int = 0):
+        """
+        Count a review
+
+        Args:
+            rating: Star rating, 1 to 5
+            seen: Unix time the review was posted; 0 if unknown, which leaves first and
+                last seen unchanged
+
+        Raises:
+            ValueError: The rating is outside 1-5
+        """
+        self._check(rating)
+        self.counts[rating - 1] += 1
+        delta = rating - self.mean
+        self.mean += delta / self.total
+        self.m2 += delta * (rating - self.mean)
+        if seen:
+            self.first_seen = min(self.first_seen, seen) if self.first_seen else seen
+            self.last_seen = max(self.last_seen, seen)
+
+    def remove(self, rating: int):
+        """
+        Uncount a review that was replaced (e.g. edited); first and last seen are kept
+
+        Raises:
+            ValueError: The rating is outside 1-5
+        """
+        self._check(rating)
+        self.counts[rating - 1] -= 1
+        total = self.total
+        if total == 0:
+            self.mean = self.m2 = 0.0
+            return
+        old_mean = self.mean
+        self.mean = (old_mean * (total + 1) - rating) / total
+        self.m2 = max(0.0, self.m2 - (rating - old_mean) * (rating - self.mean))
+
+    def pack(self) -> Tuple[bytes, float, float, int, int]:
+        """
+        Fields for storage, in the order the constructor takes them
+        """
+        return self.COUNTS.pack(*self.counts), self.mean, self.m2, self.first_seen, self.last_seen
+
+    def summary(self) -> Dict:
+        """
+        Reviewer statistics with the same fields as reviewer_stats()
+        """
+        total = self.total
+        low_count = sum(self.counts[:LOW_RATING_THRESHOLD - 1])
+        low_percentage = low_count / total if total else 0.0
+        return {
+            'total_reviews': total,
+            'low_rating_count': low_count,
+            'low_rating_percentage': low_percentage,
+            'average_rating': self.mean,
+            'rating_variance': self.m2 / total if total else 0.0,
+            'rating_counts': self.counts.tolist(),
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+            'is_suspicious': total >= MIN_REVIEWS_FOR_ANALYSIS and low_percentage >= SUSPICIOUS_THRESHOLD,
+        }
+
+
+def analyze_reviewers(df_reviews: pd.DataFrame, get_user_reviews: Callable[[Hashable], List[Dict]],
+                      key_column: str = 'reviewer_id', known_stats: Dict[Hashable, Optional[Dict]] = None) -> Dict:
+    """
+    Find suspicious reviewers among a business's low-rating reviews
+
+    Each distinct low-rating reviewer's history is fetched once. A reviewer who left
+    several low ratings is keyed once in user_analysis with their last such review, and
+    listed once per review in suspicious_users, as the row-by-row analysis did.
+
+    Args:
+        df_reviews: Reviews with reviewer columns from add_reviewer_columns()
+        get_user_reviews: Function returning a reviewer's reviews given their key
+        key_column: Column identifying the reviewer ('reviewer_id' or 'reviewer_name')
+        known_stats: Precomputed reviewer_stats() entries (None for a reviewer with too
+            few reviews); histories are only fetched for reviewers not in it
+
+    Returns:
+        Dictionary with low_rating_reviews (count), user_analysis and suspicious_users
+    """
+    low = df_reviews[df_reviews['rating'].to_numpy() < LOW_RATING_THRESHOLD]
+    low_keys = low[key_column].tolist()
+    low_names = low['reviewer_name'].tolist()
+    low_ratings = low['rating'].tolist()
+    low_texts = low['text'].tolist() if 'text' in low else [''] * len(low)
+
+    known_stats = known_stats or {}
+    stats = {key: known_stats[key] for key in dict.fromkeys(low_keys) if key in known_stats}
+    stats.update(reviewer_stats({key: get_user_reviews(key) for key in dict.fromkeys(low_keys)
+                                 if key not in known_stats}))
+
+    user_analysis = {}
+    suspicious_users = []
+    for key, name, rating, text in zip(low_keys, low_names, low_ratings, low_texts):
+        user_stats = stats.get(key)
+        if user_stats is None:
+            continue
+        user_analysis[key] = {
+            'name': name,
+            **user_stats,
+            'target_business_rating': rating,
+            'target_business_comment': text,
+        }
+        if user_stats['is_suspicious']:
+            suspicious_users.append(key)
+
+    return {
+        'low_rating_reviews': len(low),
+        'user_analysis': user_analysis,
+        'suspicious_users': suspicious_users,
+    }
+
+
+def low_rating_reviewer_keys(reviews: List[Dict], user_field: str = 'id') -> List[Hashable]:
+    """
+    Distinct reviewers who left a low rating, in review order
+
+    These are the reviewers whose histories score_business() will ask for, so callers
+    can fetch the histories ahead of time (e.g. before scoring in another process).
+
+    Args:
+        reviews: Formatted reviews with a nested 'user' dictionary
+        user_field: User field that keys the reviewer ('id' or 'name')
+
+    Returns:
+        Reviewer keys
+    """
+    return list(dict.fromkeys(review['user'][user_field] for review in reviews
+                              if review['rating'] < LOW_RATING_THRESHOLD))
+
+
+def score_business(place_id: str, reviews: List[Dict], get_user_reviews: Callable[[Hashable], List[Dict]],
+                   key_column: str = 'reviewer_id', image_url: bool = False,
+                   known_stats: Dict[Hashable, Optional[Dict]] = None) -> Dict:
+    """
+    Build the analysis result for one business from its reviews
+
+    Args:
+        place_id: Google Places place ID
+        reviews: Formatted reviews with a nested 'user' dictionary (not empty)
+        get_user_reviews: Function returning a reviewer's reviews given their key
+        key_column: Column identifying the reviewer ('reviewer_id' or 'reviewer_name')
+        image_url: Also add a 'reviewer_image_url' column to all_reviews
+        known_stats: Precomputed reviewer statistics, see analyze_reviewers()
+
+    Returns:
+        Analysis results dictionary as returned by analyze_business_reviews
+    """
+    df_reviews = add_reviewer_columns(pd.DataFrame(reviews), image_url=image_url)
+    analysis = analyze_reviewers(df_reviews, get_user_reviews, key_column=key_column, known_stats=known_stats)
+    return {
+        'place_id': place_id,
+        'total_reviews': len(df_reviews),
+        'low_rating_reviews': analysis['low_rating_reviews'],
+        'suspicious_users_count': len(analysis['suspicious_users']),
+        'user_analysis': analysis['user_analysis'],
+        'suspicious_users': analysis['suspicious_users'],
+        'all_reviews': df_reviews.to_dict('records')
+    }
@@ -0,0 +1,306 @@
+"""
+Persistent cross-business index of every review we have fetched
+The Places API has no per-author endpoint, so reviewer histories are built up from the
+reviews of every business we look at. Reviewers are keyed by their Google contributor
+ID (from author_url), which unlike author_name is unique and does not change. Each
+reviewer's rating statistics are kept up to date as reviews arrive, so they can be
+scored without reading their history
+"""
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from config import (
+    MIN_REVIEWS_FOR_ANALYSIS, REVIEWER_INDEX_DB_PATH, REVIEWER_INDEX_ENABLED, SIMULATE_USER_REVIEWS
+)
+from review_engine import RatingAccumulator, star_rating
+from sqlite_store import SQLiteStore
+
+
+CONTRIBUTOR_ID = re.compile(r'/contrib/(\d+)')
+
+
+def author_key(review: Dict) -> Optional[str]:
+    """
+    Stable identity of a Places API review's author
+
+    Args:
+        review: Review as returned by Place Details
+
+    Returns:
+        The contributor ID from author_url, the author_url itself if it has none,
+        or None for a review without an author_url
+    """
+    url = review.get('author_url') or ''
+    match = CONTRIBUTOR_ID.search(url)
+    if match:
+        return match.group(1)
+    return url or None
+
+
+class ReviewerIndex(SQLiteStore):
+    """
+    Reviews by author across businesses
+
+    Reviews are clustered by author (a WITHOUT ROWID table keyed by author, then
+    place), so a reviewer's history is one index seek and a contiguous read. Only what
+    scoring needs is kept: review texts stay out of the index, and business names are
+    stored once per place. Every new or edited review also updates its author's
+    RatingAccumulator in reviewer_stats.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS reviews (
+            author TEXT NOT NULL,
+            place_id TEXT NOT NULL,
+            rating INTEGER NOT NULL,
+            time INTEGER NOT NULL,
+            PRIMARY KEY (author, place_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS places (
+            place_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS reviewers (
+            author TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            url TEXT NOT NULL,
+            last_seen REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS reviewer_stats (
+            author TEXT PRIMARY KEY,
+            counts BLOB NOT NULL,
+            mean REAL NOT NULL,
+            m2 REAL NOT NULL,
+            first_seen INTEGER NOT NULL,
+            last_seen INTEGER NOT NULL
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path: str = REVIEWER_INDEX_DB_PATH):
+        """
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        super().__init__(db_path)
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stats_hits = 0
+        self.indexed = 0
+
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM reviews LIMIT 1").fetchone() and \
+                not conn.execute("SELECT 1 FROM reviewer_stats LIMIT 1").fetchone():
+            self.rebuild_stats()
+
+    def _load_stats(self, conn, author: str) -> RatingAccumulator:
+        row = conn.execute(
+            "SELECT counts, mean, m2, first_seen, last_seen FROM reviewer_stats WHERE author = ?", (author,)
+        ).fetchone()
+        return RatingAccumulator(*row) if row else RatingAccumulator()
+
+    def add_reviews(self, place_id: str, business_name: str, reviews: List[Dict]) -> int:
+        """
+        Index a business's reviews
+
+        A reviewer has at most one review per place, so a review seen again is skipped
+        and an edited one replaces the indexed one; either way each review is counted
+        once in its author's statistics.
+
+        Args:
+            place_id: Google Places place ID
+            business_name: Name of the business
+            reviews: Formatted reviews; those without a stable author ('url' in the
+                user dictionary) or a 1-5 star rating are skipped, the latter with a
+                warning
+
+        Returns:
+            Number of new or edited reviews
+        """
+        reviews = [review for review in reviews if review['user'].get('url')]
+        rated = [review for review in reviews if star_rating(review.get('rating'))]
+        if len(rated) < len(reviews):
+            print(f"⚠️  Skipped {len(reviews) - len(rated)} reviews of {place_id} rated outside 1-5")
+        reviews = rated
+        if not reviews:
+            return 0
+        reviewers = {review['user']['id']: (review['user']['id'], review['user'].get('name', ''),
+                                            review['user']['url'], time.time())
+                     for review in reviews}
+
+        conn = self._connect()
+        accumulators = {}
+        indexed = 0
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for review in reviews:
+                author, rating = review['user']['id'], star_rating(review['rating'])
+                seen = int(review.get('time_created') or 0)
+                old = conn.execute("SELECT rating FROM reviews WHERE author = ? AND place_id = ?",
+                                   (author, place_id)).fetchone()
+                if old is not None and old[0] == rating:
+                    continue
+                if author not in accumulators:
+                    accumulators[author] = self._load_stats(conn, author)
+                if old is not None:
+                    accumulators[author].remove(old[0])
+                accumulators[author].add(rating, seen)
+                conn.execute("INSERT OR REPLACE INTO reviews (author, place_id, rating, time) VALUES (?, ?, ?, ?)",
+                             (author, place_id, rating, seen))
+                indexed += 1
+            conn.executemany(
+                "INSERT OR REPLACE INTO reviewer_stats (author, counts, mean, m2, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(author, *accumulator.pack()) for author, accumulator in accumulators.items()]
+            )
+            conn.execute("INSERT OR REPLACE INTO places (place_id, name) VALUES (?, ?)", (place_id, business_name or ''))
+            conn.executemany("INSERT OR REPLACE INTO reviewers (author, name, url, last_seen) VALUES (?, ?, ?, ?)",
+                             reviewers.values())
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+        with self._stats_lock:
+            self.indexed += indexed
+        return indexed
+
+    def rebuild_stats(self):
+        """
+        Recompute every reviewer's statistics from the indexed reviews (for an index
+        created before statistics were kept)
+        """
+        conn = self._connect()
+        accumulators = {}
+        for author, rating, seen in conn.execute("SELECT author, rating, time FROM reviews ORDER BY author"):
+            accumulators.setdefault(author, RatingAccumulator()).add(rating, seen)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute("DELETE FROM reviewer_stats")
+            conn.executemany(
+                "INSERT INTO reviewer_stats (author, counts, mean, m2, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?)",
+                [(author, *accumulator.pack()) for author, accumulator in accumulators.items()]
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def get_stats(self, authors: Iterable[str]) -> Dict[str, RatingAccumulator]:
+        """
+        Rating statistics of reviewers, without reading their reviews
+
+        Args:
+            authors: Author keys from author_key()
+
+        Returns:
+            Author key to RatingAccumulator, for authors with at least one indexed review
+        """
+        conn = self._connect()
+        found = {}
+        for author in dict.fromkeys(authors):
+            accumulator = self._load_stats(conn, author)
+            if accumulator.total:
+                found[author] = accumulator
+        with self._stats_lock:
+            self.stats_hits += sum(accumulator.total >= MIN_REVIEWS_FOR_ANALYSIS for accumulator in found.values())
+        return found
+
+    def get_reviews(self, author: str) -> List[Dict]:
+        """
+        Every indexed review by an author
+
+        Args:
+            author: Author key from author_key()
+
+        Returns:
+            Reviews with rating, business_id, business_name and time_created, oldest first
+        """
+        rows = self._connect().execute(
+            "SELECT r.rating, r.place_id, coalesce(p.name, ''), r.time FROM reviews r "
+            "LEFT JOIN places p ON p.place_id = r.place_id WHERE r.author = ? ORDER BY r.time",
+            (author,)
+        ).fetchall()
+        with self._stats_lock:
+            if len(rows) >= MIN_REVIEWS_FOR_ANALYSIS:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return [{'rating': rating, 'business_id': place_id, 'business_name': name, 'time_created': time_created}
+                for rating, place_id, name, time_created in rows]
+
+    def stats(self) -> Dict:
+        conn = self._connect()
+        with self._stats_lock:
+            return {
+                'reviewers': conn.execute("SELECT count(*) FROM reviewers").fetchone()[0],
+                'reviews': conn.execute("SELECT count(*) FROM reviews").fetchone()[0],
+                'indexed': self.indexed,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stats_hits': self.stats_hits,
+            }
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_reviewer_index() -> ReviewerIndex:
+    """
+    Get the process-wide reviewer index backed by REVIEWER_INDEX_DB_PATH
+    """
+    global _index
+
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ReviewerIndex()
+    return _index
+
+
+def index_reviews(place_id: str, business_name: str, reviews: List[Dict]):
+    """
+    Add a business's formatted reviews to the reviewer index, if it is enabled
+    """
+    if REVIEWER_INDEX_ENABLED and reviews:
+        get_reviewer_index().add_reviews(place_id, business_name, reviews)
+
+
+def indexed_user_reviews(user_id: str) -> Optional[List[Dict]]:
+    """
+    A reviewer's history from the reviewer index
+
+    Args:
+        user_id: Reviewer key ('id' of a formatted review's user)
+
+    Returns:
+        The indexed reviews, or None when the caller should fall back to simulated
+        data: the index is disabled, or it holds fewer than MIN_REVIEWS_FOR_ANALYSIS
+        reviews by this user and SIMULATE_USER_REVIEWS is on
+    """
+    if not REVIEWER_INDEX_ENABLED:
+        return None
+    reviews = get_reviewer_index().get_reviews(user_id)
+    if len(reviews) < MIN_REVIEWS_FOR_ANALYSIS and SIMULATE_USER_REVIEWS:
+        return None
+    return reviews
+
+
+def indexed_user_stats(user_ids: Iterable[str]) -> Dict[str, Dict]:
+    """
+    Reviewer statistics from the reviewer index, for scoring without histories
+
+    Args:
+        user_ids: Reviewer keys ('id' of a formatted review's user)
+
+    Returns:
+        User ID to RatingAccumulator.summary(), for users with at least
+        MIN_REVIEWS_FOR_ANALYSIS indexed reviews (none if the index is disabled);
+        pass as known_stats to score_business()
+    """
+    if not REVIEWER_INDEX_ENABLED:
+        return {}
+    return {user_id: accumulator.summary() for user_id, accumulator in get_reviewer_index().get_stats(user_ids).items()
+            if accumulator.total >= MIN_REVIEWS_FOR_ANALYSIS}
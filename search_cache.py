@@ -0,0 +1,285 @@
+"""
+Normalized, fuzzy cache of business search results
+"McDonald's" / "mcdonalds " in "Vancouver, BC" / "vancouver british columbia" are one
+search. Queries and locations are normalized before they are used as keys, and a trigram
+index over cached queries serves a near-identical query (same location) from cache when
+the similarity is high enough, so fewer Text Search calls are billed
+"""
+import json
+import re
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Optional, Set, Tuple
+from config import SEARCH_CACHE_DB_PATH, SEARCH_CACHE_TTL, SEARCH_FUZZY_ENABLED, SEARCH_FUZZY_MIN_SIMILARITY
+from sqlite_store import SQLiteStore
+
+
+# Phrases rewritten to one canonical form in locations, matched on whole words. Names that
+# are also cities (New York, Washington) are deliberately left alone
+LOCATION_ALIASES = {
+    'british columbia': 'bc', 'alberta': 'ab', 'saskatchewan': 'sk', 'manitoba': 'mb', 'ontario': 'on',
+    'quebec': 'qc', 'nova scotia': 'ns', 'new brunswick': 'nb', 'newfoundland and labrador': 'nl',
+    'prince edward island': 'pe',
+    'california': 'ca', 'texas': 'tx', 'florida': 'fl', 'illinois': 'il', 'massachusetts': 'ma',
+    'oregon': 'or', 'nyc': 'new york', 'new york city': 'new york',
+    'united states of america': 'usa', 'united states': 'usa', 'us': 'usa',
+    'united kingdom': 'uk', 'great britain': 'uk',
+    'saint': 'st', 'mount': 'mt', 'fort': 'ft',
+}
+# Country names dropped from the end of a location; the rest of it already pins the place
+DROPPED_COUNTRIES = ('canada', 'usa')
+
+# How often (in writes) expired searches are swept out
+PURGE_EVERY = 500
+
+_APOSTROPHES = re.compile(r"['‘’`]")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_DIGITS = re.compile(r"\d+")
+_ALIAS_PATTERN = re.compile(r"\b(" + '|'.join(sorted(map(re.escape, LOCATION_ALIASES), key=len, reverse=True)) + r")\b")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Fold case, diacritics, punctuation and whitespace
+
+    Apostrophes are removed rather than split on, so "McDonald's" matches "mcdonalds".
+
+    Args:
+        text: Raw query text
+
+    Returns:
+        Lower-case ASCII words separated by single spaces
+    """
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    text = _APOSTROPHES.sub('', text)
+    return _NON_WORD.sub(' ', text).strip()
+
+
+def normalize_location(location: str) -> str:
+    """
+    Normalize a location and rewrite common aliases (provinces, states, city nicknames)
+
+    Args:
+        location: Raw location, e.g. "Vancouver, British Columbia, Canada"
+
+    Returns:
+        Canonical location, e.g. "vancouver bc"
+    """
+    location = _ALIAS_PATTERN.sub(lambda m: LOCATION_ALIASES[m.group(1)], normalize_text(location))
+    words = location.split()
+    while len(words) > 1 and words[-1] in DROPPED_COUNTRIES:
+        words.pop()
+    return ' '.join(words)
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Word trigrams of normalized text, padded so word starts and ends count
+    """
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class SearchCache(SQLiteStore):
+    """
+    Search results keyed by normalized (query, location), with a trigram index on queries
+
+    A fuzzy match is only considered within the same normalized location, and never
+    between queries whose numbers differ ("pizza 1" is not "pizza 2").
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS searches (
+            id INTEGER PRIMARY KEY,
+            query TEXT NOT NULL,
+            location TEXT NOT NULL,
+            results TEXT NOT NULL,
+            gram_count INTEGER NOT NULL,
+            expires REAL NOT NULL,
+            UNIQUE (query, location)
+        );
+        CREATE INDEX IF NOT EXISTS idx_searches_expires ON searches (expires);
+        CREATE TABLE IF NOT EXISTS search_grams (
+            gram TEXT NOT NULL,
+            search_id INTEGER NOT NULL,
+            PRIMARY KEY (gram, search_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_search_grams_search ON search_grams (search_id);
+    """
+
+    def __init__(self, db_path: str = SEARCH_CACHE_DB_PATH, ttl: float = SEARCH_CACHE_TTL,
+                 fuzzy: bool = SEARCH_FUZZY_ENABLED, min_similarity: float = SEARCH_FUZZY_MIN_SIMILARITY):
+        """
+        Open the search cache
+
+        Args:
+            db_path: Path to the SQLite database file
+            ttl: Seconds a result set stays fresh
+            fuzzy: Whether near-identical queries may be served from cache
+            min_similarity: Trigram Jaccard similarity a fuzzy match needs
+        """
+        super().__init__(db_path)
+        self.ttl = ttl
+        self.fuzzy = fuzzy
+        self.min_similarity = min_similarity
+
+        self._stats_lock = threading.Lock()
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self._writes = 0
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _fuzzy_match(self, query: str, location: str) -> Optional[Tuple[str, float, str]]:
+        grams = trigrams(query)
+        if not grams:
+            return None
+        placeholders = ','.join('?' * len(grams))
+        rows = self._connect().execute(
+            f"SELECT s.query, s.results, s.gram_count, COUNT(*) FROM search_grams g "
+            f"JOIN searches s ON s.id = g.search_id "
+            f"WHERE g.gram IN ({placeholders}) AND s.location = ? AND s.expires > ? GROUP BY s.id",
+            list(grams) + [location, time.time()]
+        ).fetchall()
+
+        digits = _DIGITS.findall(query)
+        best = None
+        for candidate, results, gram_count, shared in rows:
+            similarity = shared / (len(grams) + gram_count - shared)
+            if similarity >= self.min_similarity and _DIGITS.findall(candidate) == digits:
+                if best is None or similarity > best[1]:
+                    best = (candidate, similarity, results)
+        return best
+
+    def get(self, query: str, location: str) -> Optional[List[Dict]]:
+        """
+        Look up cached results for a search
+
+        Args:
+            query: Raw search term
+            location: Raw location
+
+        Returns:
+            Cached result list, or None on a miss
+        """
+        query, location = normalize_text(query), normalize_location(location)
+        row = self._connect().execute(
+            "SELECT results FROM searches WHERE query = ? AND location = ? AND expires > ?",
+            (query, location, time.time())
+        ).fetchone()
+        if row is not None:
+            self._count('exact_hits')
+            return json.loads(row[0])
+
+        match = self._fuzzy_match(query, location) if self.fuzzy else None
+        if match is not None:
+            self._count('fuzzy_hits')
+            return json.loads(match[2])
+
+        self._count('misses')
+        return None
+
+    def put(self, query: str, location: str, results: List[Dict]):
+        """
+        Store the results of a search under its normalized key
+
+        Args:
+            query: Raw search term
+            location: Raw location
+            results: Result list to cache
+        """
+        query, location = normalize_text(query), normalize_location(location)
+        grams = trigrams(query)
+        expires = time.time() + self.ttl
+
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute("SELECT id FROM searches WHERE query = ? AND location = ?",
+                               (query, location)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE searches SET results = ?, expires = ? WHERE id = ?",
+                             (json.dumps(results), expires, row[0]))
+            else:
+                search_id = conn.execute(
+                    "INSERT INTO searches (query, location, results, gram_count, expires) VALUES (?, ?, ?, ?, ?)",
+                    (query, location, json.dumps(results), len(grams), expires)
+                ).lastrowid
+                conn.executemany("INSERT OR IGNORE INTO search_grams (gram, search_id) VALUES (?, ?)",
+                                 [(gram, search_id) for gram in grams])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        with self._stats_lock:
+            self._writes += 1
+            purge = self._writes % PURGE_EVERY == 0
+        if purge:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """
+        Delete expired searches and their trigrams
+
+        Returns:
+            Number of searches removed
+        """
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            conn.execute("DELETE FROM search_grams WHERE search_id IN (SELECT id FROM searches WHERE expires <= ?)",
+                         (now,))
+            removed = conn.execute("DELETE FROM searches WHERE expires <= ?", (now,)).rowcount
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return removed
+
+    def stats(self) -> Dict:
+        """
+        Get hit counters for this process and the number of cached searches
+
+        Returns:
+            Dictionary of search cache statistics
+        """
+        rows = self._connect().execute("SELECT COUNT(*) FROM searches").fetchone()[0]
+        with self._stats_lock:
+            lookups = self.exact_hits + self.fuzzy_hits + self.misses
+            return {
+                'exact_hits': self.exact_hits,
+                'fuzzy_hits': self.fuzzy_hits,
+                'misses': self.misses,
+                'hit_rate': (self.exact_hits + self.fuzzy_hits) / lookups if lookups else 0.0,
+                'cached_searches': rows,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """
+    Get the process-wide search cache backed by SEARCH_CACHE_DB_PATH
+
+    Returns:
+        Shared SearchCache
+    """
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SearchCache()
+    return _cache
@@ -1,17 +1,30 @@
 """
 Simplified Google Review Analyzer for Railway Deployment
 """
+import io
 import os
 import requests
 import json
 import urllib.parse
-from flask import Flask, request, jsonify
-import googlemaps
+from flask import Flask, Response, request, jsonify, stream_with_context
+from werkzeug.utils import secure_filename
+import places_client
+from config import LEAD_MAX_RESULTS, LEAD_STREAMING, LEAD_STORE_ENABLED
+from maps_client import get_maps_client, maps_client_stats
+from lead_finder import find_leads, iter_leads
+from lead_store import get_lead_store
+from branch_comparison import analyze_branches, parse_branch_count, render_branch_comparison, render_branch_options
+from negative_cache import search_unless_empty
+from bulk_enrich import BulkEnricher, get_enrichment_store, iter_csv, job_id_for, read_input_rows
 
 app = Flask(__name__)
 
-def search_business_and_reviews(business_name, location):
-    """Search for a business and get its reviews using Google Places API"""
+def lead_store():
+    """Shared lead store, or None when it is disabled"""
+    return get_lead_store() if LEAD_STORE_ENABLED else None
+
+def search_business_and_reviews(business_name, location, branch_count=1):
+    """Search for a business and get its reviews using Google Places API (plus the next matching branches, fetched concurrently)"""
     api_key = os.environ.get('GOOGLE_API_KEY')
     if not api_key:
         return None, "API key not configured"
@@ -21,36 +34,46 @@ def search_business_and_reviews(business_name, location):
         return None, f"API key appears to be invalid (too short: {len(api_key)} characters)"
     
     try:
-        # Initialize Google Maps client
-        gmaps = googlemaps.Client(key=api_key)
+        # Shared Google Maps client (reused across requests)
+        gmaps = get_maps_client(api_key)
         
         # Search for the business
         search_query = f"{business_name} {location}"
-        places_result = gmaps.places(query=search_query)
+        places_result = search_unless_empty(lambda: gmaps.places(query=search_query), search_query)
         
         if not places_result.get('results'):
             return None, f"No businesses found for '{business_name}' in '{location}'"
         
-        # Get the first result
+        # Get place details including reviews for the top matches in parallel
+        details = {}
+        
+        def get_reviews(place_id):
+            place_details = gmaps.place(
+                place_id=place_id,
+                fields=['name', 'formatted_address', 'rating', 'reviews', 'user_ratings_total']
+            )
+            details[place_id] = place_details.get('result')
+            return (details[place_id] or {}).get('reviews', [])
+        
+        branches = analyze_branches(places_result['results'], get_reviews, branch_count)
+        
+        # The first result is shown in full
         place = places_result['results'][0]
         place_id = place['place_id']
         place_name = place['name']
         place_address = place.get('formatted_address', 'Address not available')
         
-        # Get place details including reviews
-        place_details = gmaps.place(
-            place_id=place_id,
-            fields=['name', 'formatted_address', 'rating', 'reviews', 'user_ratings_total']
-        )
+        if branches[0]['error']:
+            return None, f"Error searching business: {branches[0]['error']}"
         
-        if 'result' not in place_details:
+        result = details.get(place_id)
+        if result is None:
             return None, "Could not get business details"
         
-        result = place_details['result']
-        reviews = result.get('reviews', [])
+        reviews = branches[0]['reviews']
         
         # Filter bad reviews (< 4 stars)
-        bad_reviews = [review for review in reviews if review.get('rating', 5) < 4]
+        bad_reviews = branches[0]['bad_reviews']
         
         return {
             'place_name': place_name,
@@ -60,13 +83,14 @@ def search_business_and_reviews(business_name, location):
             'total_reviews': result.get('user_ratings_total', 0),
             'all_reviews': reviews,
             'bad_reviews': bad_reviews,
-            'bad_reviewers': [review.get('author_name', 'Anonymous') for review in bad_reviews]
+            'bad_reviewers': [review.get('author_name', 'Anonymous') for review in bad_reviews],
+            'branches': branches
         }, None
         
     except Exception as e:
         return None, f"Error searching business: {str(e)}"
 
-def search_businesses_for_leads(search_query, location):
+def search_businesses_for_leads(search_query, location, max_results=LEAD_MAX_RESULTS):
     """Search for multiple businesses (lead finder) using Google Places API"""
     api_key = os.environ.get('GOOGLE_API_KEY')
     if not api_key:
@@ -77,53 +101,15 @@ def search_businesses_for_leads(search_query, location):
         return None, f"API key appears to be invalid (too short: {len(api_key)} characters)"
     
     try:
-        # Initialize Google Maps client
-        gmaps = googlemaps.Client(key=api_key)
+        # Shared Google Maps client (reused across requests)
+        gmaps = get_maps_client(api_key)
         
-        # Search for businesses
-        full_query = f"{search_query} {location}"
-        places_result = gmaps.places(query=full_query)
+        # Search for businesses and fetch their details concurrently (up to LEAD_MAX_RESULTS)
+        leads = find_leads(gmaps, search_query, location, max_results=max_results, store=lead_store())
         
-        if not places_result.get('results'):
+        if not leads:
             return None, f"No businesses found for '{search_query}' in '{location}'"
         
-        # Get details for each business (up to 20 results)
-        leads = []
-        for place in places_result['results'][:20]:
-            place_id = place.get('place_id')
-            place_name = place.get('name', 'Unknown')
-            place_address = place.get('formatted_address', 'Address not available')
-            rating = place.get('rating', 'N/A')
-            total_reviews = place.get('user_ratings_total', 0)
-            
-            # Get detailed information for each place
-            try:
-                place_details = gmaps.place(
-                    place_id=place_id,
-                    fields=['formatted_phone_number', 'website', 'international_phone_number']
-                )
-                
-                if 'result' in place_details:
-                    phone = place_details['result'].get('formatted_phone_number', place_details['result'].get('international_phone_number', 'No phone'))
-                    website = place_details['result'].get('website', 'No website')
-                else:
-                    phone = 'No phone'
-                    website = 'No website'
-                    
-            except Exception as e:
-                # If we can't get details for one business, continue with others
-                phone = 'No phone'
-                website = 'No website'
-            
-            leads.append({
-                'name': place_name,
-                'address': place_address,
-                'phone': phone,
-                'website': website,
-                'rating': rating,
-                'total_reviews': total_reviews
-            })
-        
         return leads, None
         
     except Exception as e:
@@ -195,7 +181,7 @@ def get_base_html(title, content):
                 font-size: 1.1em;
             }}
             
-            .form-group input {{
+            .form-group input, .form-group select {{
                 width: 100%;
                 padding: 15px;
                 border: 2px solid #e1e5e9;
@@ -204,7 +190,7 @@ def get_base_html(title, content):
                 transition: border-color 0.3s ease;
             }}
             
-            .form-group input:focus {{
+            .form-group input:focus, .form-group select:focus {{
                 outline: none;
                 border-color: #667eea;
             }}
@@ -510,6 +496,132 @@ def get_base_html(title, content):
     </html>
     '''
 
+LEADS_TABLE_HEAD = '''
+            <div class="table-wrapper">
+            <table class="leads-table">
+                <thead>
+                    <tr>
+                        <th>#</th>
+                        <th>Business Name</th>
+                        <th>Address</th>
+                        <th>Phone</th>
+                        <th>Website</th>
+                        <th>Rating</th>
+                        <th>Reviews</th>
+                    </tr>
+                </thead>
+                <tbody>
+            '''
+
+LEADS_TABLE_TAIL = '''
+                </tbody>
+            </table>
+            </div>
+            '''
+
+NO_LEADS_HTML = '<p style="color: #28a745; font-weight: bold;">🎉 No leads found for your search criteria.</p>'
+
+def _lead_badges(lead):
+    """Format the rating badge and website link for a lead"""
+    rating_html = '<span class="rating-badge">★ ' + str(lead['rating']) + '</span>' if isinstance(lead['rating'], (int, float)) else 'N/A'
+    website_html = f"<a href='{lead['website']}' target='_blank'>Visit Website</a>" if lead['website'] != 'No website' else 'No website'
+    return rating_html, website_html
+
+def render_lead_row(idx, lead):
+    """Desktop table row for one lead"""
+    rating_html, website_html = _lead_badges(lead)
+    return f'''
+                <tr>
+                    <td>{idx}</td>
+                    <td><strong>{lead['name']}</strong></td>
+                    <td>{lead['address']}</td>
+                    <td>{lead['phone']}</td>
+                    <td>{website_html}</td>
+                    <td>{rating_html}</td>
+                    <td>{lead['total_reviews']}</td>
+                </tr>
+                '''
+
+def render_lead_card(idx, lead):
+    """Mobile card for one lead"""
+    rating_html, website_html = _lead_badges(lead)
+    return f'''
+                <div class="lead-card">
+                    <div class="lead-card-header">
+                        <div style="display: flex; align-items: center; flex: 1;">
+                            <div class="lead-card-number">{idx}</div>
+                            <div class="lead-card-title">{lead['name']}</div>
+                        </div>
+                        <div>{rating_html}</div>
+                    </div>
+                    <div class="lead-card-row">
+                        <div class="lead-card-label">📍 Address:</div>
+                        <div class="lead-card-value">{lead['address']}</div>
+                    </div>
+                    <div class="lead-card-row">
+                        <div class="lead-card-label">📞 Phone:</div>
+                        <div class="lead-card-value">{lead['phone']}</div>
+                    </div>
+                    <div class="lead-card-row">
+                        <div class="lead-card-label">🌐 Website:</div>
+                        <div class="lead-card-value">{website_html}</div>
+                    </div>
+                    <div class="lead-card-row">
+                        <div class="lead-card-label">⭐ Reviews:</div>
+                        <div class="lead-card-value">{lead['total_reviews']}</div>
+                    </div>
+                </div>
+                '''
+
+STREAM_SLOT = '<!--stream-->'
+
+def stream_lead_page(gmaps, search_query, location, max_results=LEAD_MAX_RESULTS):
+    """Yield the lead finder page in chunks: shell and table header first, then each lead as its details arrive"""
+    page_head, page_tail = get_base_html(f"Leads - {search_query}", STREAM_SLOT).split(STREAM_SLOT)
+    
+    # Mobile cards are appended by script because their container sits outside the open table
+    yield page_head + f'''
+        <div class="header">
+            <h1>✅ Lead List Generated</h1>
+            <p id="lead-status">Searching for "{search_query}" in "{location}"...</p>
+        </div>
+        
+        <div class="results-section">
+            <div class="success-box">
+                <div class="success-title">📋 Business Leads List</div>
+                <p><strong>Search:</strong> {search_query}</p>
+                <p><strong>Location:</strong> {location}</p>
+                <p><strong>Total Results:</strong> <span id="lead-count">0</span></p>
+            </div>
+            
+            <div class="leads-card" id="lead-cards"></div>
+            ''' + LEADS_TABLE_HEAD
+    
+    count = 0
+    error = None
+    try:
+        for count, lead in enumerate(iter_leads(gmaps, search_query, location, max_results=max_results,
+                                                      store=lead_store()), 1):
+            card = json.dumps(render_lead_card(count, lead)).replace('</', '<\\/')
+            yield render_lead_row(count, lead) + f'''<script>
+                document.getElementById('lead-cards').insertAdjacentHTML('beforeend', {card});
+                document.getElementById('lead-count').textContent = '{count}';
+                </script>'''
+    except Exception as e:
+        error = f"Error searching businesses: {str(e)}"
+    
+    footer = LEADS_TABLE_TAIL
+    if error:
+        footer += f'<div class="error">{error}</div>'
+    elif not count:
+        footer += NO_LEADS_HTML
+    status = json.dumps(f'Found {count} businesses for "{search_query}" in "{location}"').replace('</', '<\\/')
+    yield footer + f'''
+            <script>document.getElementById('lead-status').textContent = {status};</script>
+            <a href="/" class="back-btn">← Search for More Leads</a>
+        </div>
+        ''' + page_tail
+
 @app.route('/')
 def index():
     """Main search page with tabs for different features"""
@@ -538,6 +650,11 @@ def index():
                     <input type="text" id="location" name="location" placeholder="e.g., Los Angeles, CA" required>
                 </div>
                 
+                <div class="form-group">
+                    <label for="branches">Branches:</label>
+                    ''' + render_branch_options() + '''
+                </div>
+                
                 <button type="submit" class="search-btn">🔍 Find Bad Reviews</button>
             </form>
         </div>
@@ -557,6 +674,15 @@ def index():
                 
                 <button type="submit" class="search-btn">🚀 Find Leads</button>
             </form>
+            
+            <form method="POST" action="/bulk-enrich" enctype="multipart/form-data" style="margin-top: 30px;">
+                <div class="form-group">
+                    <label for="bulk_file">Enrich a CSV of businesses (columns: name, location):</label>
+                    <input type="file" id="bulk_file" name="file" accept=".csv" required>
+                </div>
+                
+                <button type="submit" class="search-btn">📥 Enrich CSV</button>
+            </form>
         </div>
     </div>
     
@@ -591,6 +717,7 @@ def search_reviews():
     """Search for business reviews and find bad reviewers"""
     business_name = request.form.get('business_name', '').strip()
     location = request.form.get('location', '').strip()
+    branch_count = parse_branch_count(request.form.get('branches'))
     
     if not business_name or not location:
         error_content = '''
@@ -622,7 +749,7 @@ def search_reviews():
             return get_base_html("Configuration Error", error_content)
         
         # Search for the actual business and get real reviews
-        business_data, error = search_business_and_reviews(business_name, location)
+        business_data, error = search_business_and_reviews(business_name, location, branch_count)
         
         if error:
             error_content = f'''
@@ -664,6 +791,7 @@ def search_reviews():
         </div>
         
         <div class="results-section">
+            {render_branch_comparison(business_data['branches'])}
             <div class="success-box">
                 <div class="success-title">🏢 Business Information</div>
                 <p><strong>Name:</strong> {business_data['place_name']}</p>
@@ -738,6 +866,12 @@ def lead_finder():
             '''
             return get_base_html("Configuration Error", error_content)
         
+        if LEAD_STREAMING:
+            # Rows are sent as their details arrive instead of after the whole search
+            gmaps = get_maps_client(api_key)
+            return Response(stream_with_context(stream_lead_page(gmaps, search_query, location)),
+                            mimetype='text/html', headers={'X-Accel-Buffering': 'no'})
+        
         # Search for businesses
         leads, error = search_businesses_for_leads(search_query, location)
         
@@ -759,84 +893,20 @@ def lead_finder():
         leads_cards_html = ""
         if leads:
             # Desktop table view
-            leads_table_html = '''
-            <div class="table-wrapper">
-            <table class="leads-table">
-                <thead>
-                    <tr>
-                        <th>#</th>
-                        <th>Business Name</th>
-                        <th>Address</th>
-                        <th>Phone</th>
-                        <th>Website</th>
-                        <th>Rating</th>
-                        <th>Reviews</th>
-                    </tr>
-                </thead>
-                <tbody>
-            '''
+            leads_table_html = LEADS_TABLE_HEAD
             
             # Mobile card view
             leads_cards_html = '<div class="leads-card">'
             
             for idx, lead in enumerate(leads, 1):
-                # Format rating badge
-                rating_html = '<span class="rating-badge">★ ' + str(lead['rating']) + '</span>' if isinstance(lead['rating'], (int, float)) else 'N/A'
-                
-                # Format website link
-                website_html = f"<a href='{lead['website']}' target='_blank'>Visit Website</a>" if lead['website'] != 'No website' else 'No website'
-                
-                # Desktop table row
-                leads_table_html += f'''
-                <tr>
-                    <td>{idx}</td>
-                    <td><strong>{lead['name']}</strong></td>
-                    <td>{lead['address']}</td>
-                    <td>{lead['phone']}</td>
-                    <td>{website_html}</td>
-                    <td>{rating_html}</td>
-                    <td>{lead['total_reviews']}</td>
-                </tr>
-                '''
-                
-                # Mobile card
-                leads_cards_html += f'''
-                <div class="lead-card">
-                    <div class="lead-card-header">
-                        <div style="display: flex; align-items: center; flex: 1;">
-                            <div class="lead-card-number">{idx}</div>
-                            <div class="lead-card-title">{lead['name']}</div>
-                        </div>
-                        <div>{rating_html}</div>
-                    </div>
-                    <div class="lead-card-row">
-                        <div class="lead-card-label">📍 Address:</div>
-                        <div class="lead-card-value">{lead['address']}</div>
-                    </div>
-                    <div class="lead-card-row">
-                        <div class="lead-card-label">📞 Phone:</div>
-                        <div class="lead-card-value">{lead['phone']}</div>
-                    </div>
-                    <div class="lead-card-row">
-                        <div class="lead-card-label">🌐 Website:</div>
-                        <div class="lead-card-value">{website_html}</div>
-                    </div>
-                    <div class="lead-card-row">
-                        <div class="lead-card-label">⭐ Reviews:</div>
-                        <div class="lead-card-value">{lead['total_reviews']}</div>
-                    </div>
-                </div>
-                '''
+                leads_table_html += render_lead_row(idx, lead)
+                leads_cards_html += render_lead_card(idx, lead)
             
-            leads_table_html += '''
-                </tbody>
-            </table>
-            </div>
-            '''
+            leads_table_html += LEADS_TABLE_TAIL
             leads_cards_html += '</div>'
         else:
-            leads_table_html = '<p style="color: #28a745; font-weight: bold;">🎉 No leads found for your search criteria.</p>'
-            leads_cards_html = '<p style="color: #28a745; font-weight: bold;">🎉 No leads found for your search criteria.</p>'
+            leads_table_html = NO_LEADS_HTML
+            leads_cards_html = NO_LEADS_HTML
         
         success_content = f'''
         <div class="header">
@@ -874,6 +944,31 @@ def lead_finder():
         '''
         return get_base_html("Error", error_content)
 
+@app.route('/bulk-enrich', methods=['POST'])
+def bulk_enrich():
+    """Enrich an uploaded CSV of business names and locations, streaming the result back as CSV"""
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({"error": "Upload a CSV file in the 'file' field"}), 400
+    
+    api_key = os.environ.get('GOOGLE_API_KEY')
+    if not api_key:
+        return jsonify({"error": "Google API key not configured"}), 500
+    
+    try:
+        text = upload.read().decode('utf-8-sig')
+        rows = read_input_rows(text)
+        gmaps = get_maps_client(api_key)
+    except (UnicodeDecodeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Re-uploading the same file after a crash resumes from its checkpoint
+    enricher = BulkEnricher(gmaps, get_enrichment_store(), lead_store=lead_store())
+    filename = os.path.splitext(secure_filename(upload.filename or '') or 'leads')[0] + '_enriched.csv'
+    return Response(stream_with_context(iter_csv(enricher.run(rows, job_id_for(text)))),
+                    mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename={filename}', 'X-Accel-Buffering': 'no'})
+
 @app.route('/health')
 def health_check():
     """Health check endpoint for Railway"""
@@ -883,6 +978,26 @@ def health_check():
         "api_key_configured": bool(os.environ.get('GOOGLE_API_KEY'))
     })
 
+@app.route('/stats')
+def stats():
+    """Places client counters (rate limiting, request coalescing, cache)"""
+    stats = places_client.client_stats()
+    stats['maps_client'] = maps_client_stats()
+    if LEAD_STORE_ENABLED:
+        stats['lead_store'] = get_lead_store().stats()
+    return jsonify(stats)
+
+@app.route('/leads.csv')
+def export_leads():
+    """Download every lead collected so far as CSV"""
+    if not LEAD_STORE_ENABLED:
+        return jsonify({"error": "Lead store is disabled"}), 404
+    
+    buffer = io.StringIO()
+    get_lead_store().export_csv(buffer)
+    return Response(buffer.getvalue(), mimetype='text/csv',
+                    headers={'Content-Disposition': 'attachment; filename=leads.csv'})
+
 @app.route('/ping')
 def ping():
     """Simple ping endpoint for Railway health checks"""
@@ -916,7 +1031,7 @@ def test_api():
     
     try:
         # Test the API key with a simple request
-        gmaps = googlemaps.Client(key=api_key)
+        gmaps = get_maps_client(api_key)
         result = gmaps.geocode('New York City')
         
         if result:
@@ -0,0 +1,97 @@
+"""
+In-process single-flight request coalescing
+Concurrent callers asking for the same key wait on one in-flight call and share its result
+"""
+import copy
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    """
+    One in-flight call and the callers waiting on it
+    """
+    __slots__ = ('event', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into one execution
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.peak_waiters = 0
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run func unless an identical call is already in flight, in which case wait for it
+
+        Waiters get deep copies of a snapshot of the leader's result, taken before the
+        leader returns, so nobody can mutate another caller's data. If the leader
+        raises, every waiter re-raises the same error.
+
+        Args:
+            key: Identity of the call, e.g. endpoint + normalized params
+            func: Function to run
+            *args, **kwargs: Arguments for func
+
+        Returns:
+            func's result
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                self.peak_waiters = max(self.peak_waiters, call.waiters)
+                leader = False
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            if call.waiters and call.error is None:
+                # Snapshot before the leader's caller gets the result and can mutate it
+                call.result = copy.deepcopy(result)
+            call.event.set()
+
+    def stats(self) -> Dict:
+        """
+        Get coalescing counters
+
+        Returns:
+            Dictionary with executions, coalesced waiters, peak waiters and calls in flight
+        """
+        with self._lock:
+            return {
+                'executions': self.executions,
+                'coalesced_waiters': self.coalesced,
+                'peak_waiters': self.peak_waiters,
+                'in_flight': len(self._calls),
+            }
@@ -0,0 +1,49 @@
+"""
+Base class for the small SQLite-backed stores (quota ledger, response cache, ...)
+Handles per-thread / per-process connections and WAL setup
+"""
+import os
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """
+    Owns one SQLite connection per thread and per process for a database file
+
+    Subclasses set SCHEMA to the CREATE statements they need.
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, db_path: str):
+        """
+        Open (and create if needed) the database
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.SCHEMA:
+            self._connect().executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Get this thread's connection, reopening it after a fork
+
+        Returns:
+            Connection in autocommit mode; use BEGIN/COMMIT for transactions
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
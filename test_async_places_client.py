@@ -0,0 +1,85 @@
+"""
+Tests for the bounded-concurrency async Places client
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import async_places_client
+
+
+def _slow_search(query, location, api_key=None):
+    time.sleep(0.05)
+    return [{'place_id': f"{query}-{location}"}]
+
+
+def test_search_many_runs_concurrently_in_order():
+    """
+    20 searches with concurrency 10 take about two call latencies, results keep input order
+    """
+    queries = [(f"q{i}", 'here') for i in range(20)]
+    with patch('async_places_client.utils.search_businesses', side_effect=_slow_search):
+        start = time.monotonic()
+        results = async_places_client.search_many(queries, concurrency=10)
+        elapsed = time.monotonic() - start
+
+    assert [r[0]['place_id'] for r in results] == [f"q{i}-here" for i in range(20)]
+    assert elapsed < 0.5
+
+
+def test_concurrency_cap_respected():
+    """
+    Never more than `concurrency` calls are in flight
+    """
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def tracked(place_id, api_key=None):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        return {'place_id': place_id}
+
+    with patch('async_places_client.utils.get_business_details', side_effect=tracked):
+        details = async_places_client.get_details_many([f"p{i}" for i in range(15)], concurrency=3)
+
+    assert peak <= 3
+    assert details['p7'] == {'place_id': 'p7'}
+
+
+def test_concurrency_cap_is_shared_by_concurrent_callers(monkeypatch):
+    """
+    Callers on different threads share one process-wide limit
+    """
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def tracked(place_id, api_key=None):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        return {'place_id': place_id}
+
+    executor = ThreadPoolExecutor(max_workers=3)
+    monkeypatch.setattr(async_places_client, '_executor', executor)
+    with patch('async_places_client.utils.get_business_details', side_effect=tracked):
+        callers = [threading.Thread(target=async_places_client.get_details_many,
+                                    args=([f"p{i}" for i in range(6)],), kwargs={'concurrency': 3})
+                   for _ in range(4)]
+        for caller in callers:
+            caller.start()
+        for caller in callers:
+            caller.join()
+    executor.shutdown()
+
+    assert peak <= 3
@@ -0,0 +1,99 @@
+"""
+Tests for checkpointed batch analysis
+"""
+import random
+import pytest
+from batch_analysis import BatchAnalyzer, BatchStore, analyze_many, job_id_for, read_place_ids
+from resilience import CircuitOpenError
+from review_engine import score_business
+from yelp_analyzer import GooglePlacesReviewAnalyzer
+
+
+class FakeAnalyzer:
+    def __init__(self, bad=()):
+        self.bad = set(bad)
+        self.fetched = []
+
+    def get_business_reviews(self, place_id, raise_errors=False):
+        self.fetched.append(place_id)
+        if place_id in self.bad:
+            raise RuntimeError(f"details failed for {place_id}")
+        if place_id == 'empty':
+            return []
+        rng = random.Random(place_id)
+        return [{'rating': rng.randint(1, 5), 'text': f"review {i}", 'user': {'id': f"u{rng.randrange(30)}", 'name': 'N'}}
+                for i in range(40)]
+
+    def get_user_reviews(self, user_id):
+        rng = random.Random(user_id)
+        return [{'rating': rng.randint(1, 5)} for _ in range(rng.randint(3, 12))]
+
+    def get_user_stats(self, user_ids):
+        return {}
+
+
+PLACE_IDS = [f"place{i}" for i in range(12)] + ['empty']
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BatchStore(str(tmp_path / 'batch.db'))
+
+
+def test_results_match_single_business_analysis(store):
+    analyzer = FakeAnalyzer()
+    results = analyze_many(analyzer, PLACE_IDS, store=store, processes=1)
+
+    assert list(results) == PLACE_IDS
+    assert results['place3'] == score_business('place3', analyzer.get_business_reviews('place3'),
+                                               analyzer.get_user_reviews, image_url=True)
+    assert results['empty'] == {'error': 'No reviews found for this business'}
+
+
+def test_failed_businesses_are_retried_on_resume(store):
+    job = job_id_for(PLACE_IDS)
+    first = BatchAnalyzer(FakeAnalyzer(bad={'place5'}), store, processes=1, fetch_workers=4)
+    results = dict(first.run(PLACE_IDS, job))
+    assert results['place5']['error'] == 'RuntimeError: details failed for place5'
+    assert first.stats() == {'resumed': 0, 'analyzed': 12, 'failed': 1}
+
+    retry = FakeAnalyzer()
+    second = BatchAnalyzer(retry, store, processes=1)
+    results = dict(second.run(PLACE_IDS, job))
+    assert retry.fetched == ['place5']
+    assert 'error' not in results['place5']
+    assert second.stats() == {'resumed': 12, 'analyzed': 1, 'failed': 0}
+
+
+def test_completed_job_is_analyzed_again(store):
+    job = job_id_for(PLACE_IDS)
+    analyze_many(FakeAnalyzer(), PLACE_IDS, store=store, processes=1)
+    assert store.finished(job) == {}
+
+    again = FakeAnalyzer()
+    batch = BatchAnalyzer(again, store, processes=1)
+    dict(batch.run(PLACE_IDS, job))
+    assert sorted(again.fetched) == sorted(PLACE_IDS)
+    assert batch.stats() == {'resumed': 0, 'analyzed': 13, 'failed': 0}
+
+
+def test_api_errors_of_the_real_analyzer_are_not_checkpointed(store, monkeypatch):
+    def open_circuit(place_id, fields, api_key=None):
+        raise CircuitOpenError("place/details/json: circuit open")
+
+    monkeypatch.setattr('places_client.get_place_details', open_circuit)
+    batch = BatchAnalyzer(GooglePlacesReviewAnalyzer(api_key='test'), store, processes=1)
+    results = dict(batch.run(['p1'], 'job'))
+
+    assert results['p1']['error'] == 'CircuitOpenError: place/details/json: circuit open'
+    assert batch.stats() == {'resumed': 0, 'analyzed': 0, 'failed': 1}
+    assert store.finished('job') == {}
+
+
+def test_process_pool_scoring(store):
+    results = analyze_many(FakeAnalyzer(), PLACE_IDS[:4], store=store, processes=2)
+    assert all(results[place_id]['total_reviews'] == 40 for place_id in PLACE_IDS[:4])
+
+
+def test_batch_file_parsing():
+    assert read_place_ids("a\n\n# comment\nb  # trailing\na\n") == ['a', 'b']
@@ -0,0 +1,88 @@
+"""
+Tests for concurrent top-N branch comparison
+"""
+import time
+from unittest.mock import patch
+import requests
+from branch_comparison import analyze_branches, parse_branch_count, render_branch_comparison
+
+BRANCHES = [{'place_id': f'p{i}', 'name': f'Branch {i}', 'rating': 4.0, 'user_ratings_total': 100}
+            for i in range(5)]
+
+
+def slow_reviews(place_id):
+    time.sleep(0.1)
+    if place_id == 'p2':
+        raise RuntimeError("details failed")
+    stars = int(place_id[1:]) % 5 + 1
+    return [{'rating': stars, 'text': 'x'}, {'rating': 5, 'text': 'y'}]
+
+
+def test_branches_are_fetched_concurrently_in_rank_order():
+    start = time.perf_counter()
+    branches = analyze_branches(BRANCHES, slow_reviews, count=5, concurrency=5)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.3
+    assert [b['business']['place_id'] for b in branches] == ['p0', 'p1', 'p2', 'p3', 'p4']
+    assert branches[0]['bad_reviews_count'] == 1
+    assert branches[0]['bad_percentage'] == 50.0
+    assert branches[4]['bad_reviews_count'] == 0
+    # One failing branch is reported, not fatal
+    assert branches[2]['error'] == 'details failed'
+    assert branches[2]['total_reviews'] == 0
+
+
+def test_branch_count_is_clamped():
+    assert parse_branch_count(None) == 1
+    assert parse_branch_count('abc') == 1
+    assert parse_branch_count('0') == 1
+    assert parse_branch_count('3') == 3
+    assert parse_branch_count('500') == 10
+
+
+def test_comparison_only_rendered_for_several_branches():
+    one = analyze_branches(BRANCHES, lambda place_id: [], count=1)
+    assert render_branch_comparison(one) == ''
+
+    html = render_branch_comparison(analyze_branches(BRANCHES, slow_reviews, count=3))
+    assert 'Branch Comparison (3 locations)' in html
+    assert html.index('Branch 0') < html.index('Branch 1') < html.index('Branch 2')
+
+
+def test_front_end_renders_comparison():
+    import beautiful_web_fixed
+
+    class Analyzer:
+        def get_business_reviews(self, place_id, raise_errors=False):
+            return [{'rating': 2, 'text': f'bad at {place_id}', 'user': {'name': 'Sam'}}]
+
+    with patch('beautiful_web_fixed.search_businesses', return_value=BRANCHES), \
+            patch('beautiful_web_fixed.GooglePlacesReviewAnalyzer', Analyzer), \
+            patch.dict('os.environ', {'GOOGLE_API_KEY': 'test'}):
+        response = beautiful_web_fixed.app.test_client().post(
+            '/', data={'business_name': 'Branch', 'location': 'Vancouver', 'branches': '3'})
+
+    html = response.get_data(as_text=True)
+    assert 'Branch Comparison (3 locations)' in html
+    assert 'bad at p0' in html
+    assert 'bad at p1' not in html
+
+
+def test_front_end_shows_failed_branch_fetch_as_error(monkeypatch):
+    import beautiful_web_fixed
+
+    def details(place_id, fields, api_key=None):
+        if place_id == 'p1':
+            raise requests.ConnectionError("connection reset")
+        return {'name': 'Branch', 'reviews': [{'rating': 2, 'text': 'bad', 'author_name': 'Sam'}]}
+
+    monkeypatch.setattr('places_client.get_place_details', details)
+    with patch('beautiful_web_fixed.search_businesses', return_value=BRANCHES), \
+            patch.dict('os.environ', {'GOOGLE_API_KEY': 'test'}):
+        response = beautiful_web_fixed.app.test_client().post(
+            '/', data={'business_name': 'Branch', 'location': 'Vancouver', 'branches': '3'})
+
+    html = response.get_data(as_text=True)
+    assert 'Branch Comparison (3 locations)' in html
+    assert '<em>connection reset</em>' in html
@@ -0,0 +1,119 @@
+"""
+Tests for bulk CSV lead enrichment
+"""
+import csv
+import io
+import threading
+import time
+import pytest
+from bulk_enrich import BulkEnricher, EnrichmentStore, iter_csv, job_id_for, read_input_rows
+
+INPUT = "Business Name,City\n" + "".join(f"Shop {i},Vancouver\n" for i in range(30)) + "Nowhere Inc,Atlantis\n"
+
+
+class FakeGmaps:
+    def __init__(self, fail_after=None):
+        self.lock = threading.Lock()
+        self.searches = 0
+        self.fail_after = fail_after
+
+    def places(self, query=None):
+        with self.lock:
+            self.searches += 1
+            if self.fail_after is not None and self.searches > self.fail_after:
+                raise RuntimeError("process crashed")
+        time.sleep(0.002)
+        if 'Nowhere' in query:
+            return {'status': 'ZERO_RESULTS', 'results': []}
+        number = query.split()[1]
+        return {'status': 'OK', 'results': [{'place_id': f'pid{number}', 'name': f'Shop {number}',
+                                              'rating': 4.2, 'user_ratings_total': int(number)}]}
+
+    def place(self, place_id, fields=None):
+        return {'result': {'formatted_phone_number': f'phone-{place_id}', 'website': f'https://{place_id}.test'}}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return EnrichmentStore(str(tmp_path / 'bulk.db'))
+
+
+def test_rows_are_enriched_in_input_order(store):
+    rows = read_input_rows(INPUT)
+    assert rows[0] == ('Shop 0', 'Vancouver')
+
+    output = list(BulkEnricher(FakeGmaps(), store, workers=4).run(rows, job_id_for(INPUT)))
+
+    assert [r['name'] for r in output] == [name for name, _ in rows]
+    assert output[7]['place_id'] == 'pid7'
+    assert output[7]['phone'] == 'phone-pid7'
+    assert output[7]['user_ratings_total'] == 7
+    assert output[-1]['status'] == 'not_found'
+
+
+def test_resume_skips_finished_rows(store):
+    rows = read_input_rows(INPUT)
+    job = job_id_for(INPUT)
+
+    crashed = BulkEnricher(FakeGmaps(fail_after=10), store, workers=2)
+    first = list(crashed.run(rows, job))
+    assert sum(r['status'] == 'ok' for r in first) == 10
+
+    gmaps = FakeGmaps()
+    resumed = BulkEnricher(gmaps, store, workers=4)
+    second = list(resumed.run(rows, job))
+
+    assert all(r['status'] in ('ok', 'not_found') for r in second)
+    assert resumed.stats()['resumed'] == 10
+    assert gmaps.searches == len(rows) - 10
+    assert [r['name'] for r in second] == [name for name, _ in rows]
+
+
+def test_stale_checkpoints_are_not_replayed(store):
+    rows = read_input_rows(INPUT)
+    job = job_id_for(INPUT)
+    list(BulkEnricher(FakeGmaps(), store).run(rows, job))
+    # The same file uploaded again after LEAD_ENRICH_MAX_AGE
+    store._connect().execute("UPDATE checkpoints SET finished = finished - ?", (store.max_age + 1,))
+    store._connect().execute("UPDATE resolved SET resolved_at = resolved_at - ?", (store.max_age + 1,))
+
+    gmaps = FakeGmaps()
+    enricher = BulkEnricher(gmaps, store)
+    list(enricher.run(rows, job))
+    assert enricher.stats()['resumed'] == 0
+    assert gmaps.searches == len(rows)
+
+
+def test_resolved_queries_are_cached_across_jobs(store):
+    list(BulkEnricher(FakeGmaps(), store).run(read_input_rows(INPUT), 'job-a'))
+
+    gmaps = FakeGmaps()
+    enricher = BulkEnricher(gmaps, store)
+    output = list(enricher.run([('shop  3', 'VANCOUVER')], 'job-b'))
+    assert gmaps.searches == 0
+    assert output[0]['place_id'] == 'pid3'
+    assert output[0]['name'] == 'shop  3'
+    # Keys are folded like the search cache's
+    list(enricher.run([('Shop 4.', 'Vancouver,')], 'job-c'))
+    assert gmaps.searches == 0
+
+
+def test_not_found_rows_are_not_cached_across_jobs(store):
+    list(BulkEnricher(FakeGmaps(), store).run([('Nowhere Inc', 'Atlantis')], 'job-a'))
+
+    gmaps = FakeGmaps()
+    output = list(BulkEnricher(gmaps, store).run([('Nowhere Inc', 'Atlantis')], 'job-b'))
+    assert gmaps.searches == 1
+    assert output[0]['status'] == 'not_found'
+
+
+def test_csv_output():
+    text = ''.join(iter_csv([{'name': 'Shop 1', 'place_id': 'pid1', 'status': 'ok'}]))
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert rows[0]['place_id'] == 'pid1'
+    assert 'user_ratings_total' in rows[0]
+
+
+def test_missing_name_column_is_rejected():
+    with pytest.raises(ValueError):
+        read_input_rows("city\nVancouver\n")
@@ -0,0 +1,49 @@
+"""
+Tests for record/replay cassettes
+"""
+import time
+import pytest
+import requests
+from fake_places_server import start_server
+from cassette import Cassette, CassetteAdapter, CassetteMissError, request_key, RECORD, REPLAY
+
+
+def _session(cassette, mode, **kwargs):
+    session = requests.Session()
+    adapter = CassetteAdapter(cassette, mode, **kwargs)
+    session.mount('http://', adapter)
+    return session
+
+
+def test_request_key_ignores_api_key_and_param_order():
+    first = request_key('get', 'https://maps.googleapis.com/maps/api/place/details/json?place_id=a&key=k1&fields=name')
+    second = request_key('GET', 'https://maps.googleapis.com/maps/api/place/details/json?fields=name&place_id=a&key=k2')
+    assert first == second
+    assert 'k1' not in first
+
+
+def test_record_then_replay_offline(tmp_path):
+    path = str(tmp_path / 'cassette.json.gz')
+    server, base_url = start_server(places=1000)
+    url = f"{base_url}/maps/api/place/details/json"
+    try:
+        recorder = Cassette(path)
+        recorded = _session(recorder, RECORD).get(url, params={'place_id': 'FAKE_000000001', 'key': 'secret'})
+        recorder.save()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    with open(path, 'rb') as f:
+        assert b'secret' not in f.read()
+
+    player = Cassette(path)
+    assert len(player) == 1
+    start = time.perf_counter()
+    replayed = _session(player, REPLAY, latency_ms=50).get(url, params={'place_id': 'FAKE_000000001', 'key': 'other'})
+    assert time.perf_counter() - start >= 0.05
+    assert replayed.status_code == 200
+    assert replayed.json() == recorded.json()
+
+    with pytest.raises(CassetteMissError):
+        _session(player, REPLAY, latency_ms=0).get(url, params={'place_id': 'never_recorded'})
@@ -0,0 +1,37 @@
+"""
+Tests for the local fake Places API server
+"""
+from unittest.mock import patch
+import pytest
+import requests
+import places_client
+import utils
+from fake_places_server import SyntheticCorpus
+
+
+def test_corpus_is_deterministic():
+    corpus = SyntheticCorpus(places=1000, reviewers=100)
+    assert corpus.details(42) == SyntheticCorpus(places=1000, reviewers=100).details(42)
+    assert corpus.index_for(corpus.place_id(42)) == 42
+    assert all(1 <= r['rating'] <= 5 for r in corpus.reviews(42))
+
+
+def test_search_and_details_through_utils(fake_api):
+    businesses = list(utils.iter_search_businesses('pizza', 'vancouver', api_key='test', max_results=25))
+    assert len(businesses) == 25
+    assert fake_api.stats()['textsearch'] == 2
+
+    details = utils.get_business_details(businesses[0]['place_id'], api_key='test')
+    assert details['place_id'] == businesses[0]['place_id']
+    assert len(details['reviews']) == 5
+    # Only the requested fields come back
+    assert 'formatted_phone_number' not in details
+
+
+def test_injected_over_query_limit_is_surfaced(fake_api):
+    fake_api.options['over_query_limit_rate'] = 1.0
+    with patch('resilience.RETRY_AFTER_MAX', 0), patch('resilience.backoff_delay', return_value=0):
+        with pytest.raises(requests.exceptions.RequestException) as info:
+            places_client.request_json('place/details/json', {'place_id': 'FAKE_000000001'}, api_key='test')
+    assert getattr(info.value, 'status', None) == 'OVER_QUERY_LIMIT'
+    assert fake_api.stats()['injected_over_query_limit'] >= 1
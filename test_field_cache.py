@@ -0,0 +1,76 @@
+"""
+Tests for the two-tier Place Details field cache
+"""
+import pytest
+import utils
+from field_cache import FieldCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return FieldCache(str(tmp_path / 'fields.db'), contact_ttl=3600, volatile_ttl=60)
+
+
+class Recorder:
+    def __init__(self, result):
+        self.result = result
+        self.requests = []
+
+    def __call__(self, fields):
+        self.requests.append(sorted(fields))
+        return {k: v for k, v in self.result.items() if k in fields}
+
+
+PLACE = {'formatted_phone_number': '604-555-0100', 'rating': 4.4, 'user_ratings_total': 80,
+         'reviews': [{'rating': 1, 'text': 'bad'}]}
+
+
+def test_only_missing_fields_are_requested(cache):
+    fetch = Recorder(PLACE)
+    first = cache.details('p1', 'formatted_phone_number,website,rating', fetch)
+    assert first == {'formatted_phone_number': '604-555-0100', 'rating': 4.4}
+
+    # website is cached as absent; only reviews is new
+    second = cache.details('p1', ['formatted_phone_number', 'website', 'rating', 'reviews'], fetch)
+    assert second['reviews'] == PLACE['reviews']
+    assert fetch.requests == [['formatted_phone_number', 'rating', 'website'], ['reviews']]
+
+    assert cache.details('p1', 'website,formatted_phone_number', fetch) == {'formatted_phone_number': '604-555-0100'}
+    assert len(fetch.requests) == 2
+    stats = cache.stats()
+    assert stats['full_hits'] == 1
+    assert stats['partial_fetches'] == 1
+
+
+def test_volatile_fields_expire_before_contact_fields(cache):
+    fetch = Recorder(PLACE)
+    cache.details('p1', 'formatted_phone_number,rating,user_ratings_total', fetch)
+    cache._connect().execute("UPDATE fields SET expires = expires - 120")
+
+    cache.details('p1', 'formatted_phone_number,rating,user_ratings_total', fetch)
+    assert fetch.requests[-1] == ['rating', 'user_ratings_total']
+
+
+def test_not_found_is_not_cached(cache):
+    calls = []
+    assert cache.details('gone', 'rating', lambda fields: calls.append(fields)) == {}
+    assert cache.details('gone', 'rating', lambda fields: calls.append(fields)) == {}
+    assert len(calls) == 2
+
+
+def test_languages_are_cached_separately(cache):
+    fetch = Recorder(PLACE)
+    cache.details('p1', 'reviews', fetch)
+    cache.details('p1', 'reviews', fetch, language='fr')
+    assert len(fetch.requests) == 2
+
+
+def test_repeat_details_lookup_is_served_from_field_cache(fake_api, cache, monkeypatch):
+    monkeypatch.setattr('places_client.FIELD_CACHE_ENABLED', True)
+    monkeypatch.setattr('places_client.get_field_cache', lambda: cache)
+
+    place_id = fake_api.corpus.place_id(1)
+    details = utils.get_business_details(place_id, api_key='test')
+    assert details['place_id'] == place_id
+    assert utils.get_business_details(place_id, api_key='test') == details
+    assert fake_api.stats()['details'] == 1
@@ -0,0 +1,104 @@
+"""
+Tests for the geographic grid sweep
+"""
+import random
+import threading
+import pytest
+from grid_sweep import GridSweep, haversine_m, tile_bbox
+from lead_store import LeadStore
+
+BBOX = (49.0, -123.2, 49.4, -122.8)
+
+
+class SpatialGmaps:
+    """
+    Stand-in for googlemaps.Client whose Text Search returns the places nearest the location
+    bias, 20 per page and at most 60 per query like the real API
+    """
+
+    def __init__(self, places=400, seed=1):
+        rng = random.Random(seed)
+        self.corpus = [{'place_id': f'p{i}', 'name': f'Business {i}',
+                        'geometry': {'location': {'lat': rng.uniform(BBOX[0], BBOX[2]),
+                                                  'lng': rng.uniform(BBOX[1], BBOX[3])}}}
+                       for i in range(places)]
+        # A well-known place outside the area that the location bias still returns
+        self.corpus.append({'place_id': 'far', 'name': 'Far away',
+                            'geometry': {'location': {'lat': 50.0, 'lng': -120.0}}})
+        self.pages = {}
+        self.lock = threading.Lock()
+        self.searches = 0
+        self.detail_calls = 0
+
+    def places_nearby(self, location, radius):
+        lat, lng = location
+
+        def distance(place):
+            loc = place['geometry']['location']
+            return haversine_m(lat, lng, loc['lat'], loc['lng'])
+
+        inside = sorted((p for p in self.corpus if distance(p) <= radius), key=distance)
+        return (inside + [self.corpus[-1]])[:60]
+
+    def places(self, query=None, location=None, radius=None, page_token=None):
+        with self.lock:
+            if page_token:
+                results, offset = self.pages.pop(page_token)
+            else:
+                self.searches += 1
+                results, offset = self.places_nearby(location, radius), 0
+            page = {'status': 'OK', 'results': results[offset:offset + 20]}
+            if offset + 20 < len(results):
+                token = f'tok{len(self.pages)}-{offset}-{id(results)}'
+                self.pages[token] = (results, offset + 20)
+                page['next_page_token'] = token
+            return page
+
+    def place(self, place_id, fields=None):
+        with self.lock:
+            self.detail_calls += 1
+        return {'result': {'formatted_phone_number': f'phone-{place_id}'}}
+
+
+def test_tiles_cover_bbox():
+    cells = tile_bbox(BBOX, 3)
+    assert len(cells) == 9
+    assert cells[0].south == BBOX[0] and cells[0].west == BBOX[1]
+    assert abs(cells[-1].north - BBOX[2]) < 1e-9 and abs(cells[-1].east - BBOX[3]) < 1e-9
+
+
+def test_sweep_finds_every_place_once(tmp_path):
+    gmaps = SpatialGmaps()
+    store = LeadStore(str(tmp_path / 'leads.db'))
+    sweep = GridSweep(gmaps, 'plumbers', BBOX, grid_size=2, max_depth=4, workers=4,
+                      store=store, token_delay=0)
+
+    leads = list(sweep)
+    place_ids = [lead['place_id'] for lead in leads]
+
+    assert len(place_ids) == len(set(place_ids)) == 400
+    assert 'far' not in place_ids
+    stats = sweep.stats()
+    assert stats['cells_split'] > 0
+    assert stats['duplicates'] > 0
+    assert gmaps.detail_calls == 400
+    assert store.stats()['leads'] == 400
+
+
+def test_second_sweep_reuses_stored_details(tmp_path):
+    gmaps = SpatialGmaps(places=100)
+    store = LeadStore(str(tmp_path / 'leads.db'))
+    list(GridSweep(gmaps, 'plumbers', BBOX, grid_size=2, store=store, token_delay=0))
+    calls = gmaps.detail_calls
+
+    leads = list(GridSweep(gmaps, 'plumbers', BBOX, grid_size=2, store=store, token_delay=0))
+    assert len(leads) == 100
+    assert gmaps.detail_calls == calls
+    assert leads[0]['phone'].startswith('phone-')
+
+
+def test_results_without_place_id_are_not_counted_as_duplicates():
+    sweep = GridSweep(SpatialGmaps(places=0), 'plumbers', BBOX, token_delay=0)
+    places = sweep._new_places([{'place_id': 'a'}, {'name': 'No ID'}, {'place_id': 'a'}])
+    assert places == [{'place_id': 'a'}]
+    assert (sweep.stats()['duplicates'], sweep.stats()['missing_place_id']) == (1, 1)
@@ -0,0 +1,97 @@
+"""
+Tests for incremental re-analysis
+"""
+import random
+import pytest
+from batch_analysis import BatchStore, analyze_many
+from incremental_analysis import AnalysisState, review_digest
+from review_engine import reviewer_stats, score_business
+from test_batch_analysis import FakeAnalyzer
+
+
+def review(user, rating, time_created, text='meh'):
+    return {'rating': rating, 'text': text, 'user': {'id': user, 'name': user}, 'time_created': time_created}
+
+
+class Histories:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, user):
+        self.calls.append(user)
+        rng = random.Random(user)
+        return [{'rating': rng.randint(1, 5)} for _ in range(rng.randint(4, 12))]
+
+
+@pytest.fixture
+def state(tmp_path):
+    return AnalysisState(str(tmp_path / 'state.db'))
+
+
+def analyze(state, reviews, histories):
+    unchanged, known_stats = state.prepare('p1', reviews, histories)
+    if unchanged is not None:
+        return unchanged
+    results = score_business('p1', reviews, histories, known_stats=known_stats)
+    state.record('p1', reviews, known_stats, results)
+    return results
+
+
+def test_digest_ignores_order_but_not_edits():
+    reviews = [review('a', 1, 100), review('b', 5, 200)]
+    assert review_digest(reviews) == review_digest(reviews[::-1])
+    assert review_digest(reviews) != review_digest([review('a', 2, 100), review('b', 5, 200)])
+
+
+def test_unchanged_reviews_skip_analysis(state):
+    reviews = [review(f"u{i}", 1 + i % 5, 100 + i) for i in range(10)]
+    histories = Histories()
+    first = analyze(state, reviews, histories)
+    histories.calls.clear()
+
+    assert analyze(state, list(reversed(reviews)), histories) == first
+    assert histories.calls == []
+    assert state.stats()['unchanged'] == 1
+
+
+def test_only_reviewers_with_new_reviews_are_rescored(state):
+    reviews = [review(f"u{i}", 1 + i % 5, 100 + i) for i in range(10)]
+    histories = Histories()
+    analyze(state, reviews, histories)
+    histories.calls.clear()
+
+    updated = [review('newcomer', 1, 500), review('u0', 2, 600, 'again')] + reviews
+    results = analyze(state, updated, histories)
+
+    assert sorted(histories.calls) == ['newcomer', 'u0']
+    assert results == score_business('p1', updated, Histories())
+    assert state.stats()['incremental'] == 1
+
+
+def test_reviewer_statistics_are_looked_up_only_for_changed_reviews(state):
+    reviews = [review(f"u{i}", 1 + i % 5, 100 + i) for i in range(10)]
+    lookups = []
+    known = {'u0': reviewer_stats({'u0': [{'rating': 1}] * 6})['u0']}
+
+    def get_user_stats(keys):
+        lookups.append(list(keys))
+        return {key: known[key] for key in keys if key in known}
+
+    unchanged, known_stats = state.prepare('p1', reviews, Histories(), get_user_stats=get_user_stats)
+    assert unchanged is None and known_stats['u0'] == known['u0']
+    state.record('p1', reviews, known_stats, score_business('p1', reviews, Histories(), known_stats=known_stats))
+    assert len(lookups) == 1
+
+    unchanged, _ = state.prepare('p1', reviews[::-1], Histories(), get_user_stats=get_user_stats)
+    assert unchanged is not None
+    assert len(lookups) == 1
+
+
+def test_incremental_batch_rerun(tmp_path, state):
+    place_ids = [f"place{i}" for i in range(5)]
+    store = BatchStore(str(tmp_path / 'batch.db'))
+    first = analyze_many(FakeAnalyzer(), place_ids, store=store, processes=1, state=state)
+
+    second = analyze_many(FakeAnalyzer(), place_ids, store=store, processes=1, state=state, restart=True)
+    assert second == first
+    assert state.stats()['unchanged'] == 5
@@ -0,0 +1,131 @@
+"""
+Tests for the concurrent lead finder pipeline
+"""
+import random
+import threading
+import time
+import pytest
+import lead_finder
+
+
+class FakeGmaps:
+    """
+    Stand-in for googlemaps.Client with two result pages and slow, uneven details
+    """
+
+    def __init__(self, places=30, fail_ids=(), page_error=False):
+        self.results = [{'place_id': f'p{i}', 'name': f'Business {i}', 'rating': 4.0} for i in range(places)]
+        self.fail_ids = set(fail_ids)
+        self.page_error = page_error
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def places(self, query=None, page_token=None):
+        if page_token:
+            if self.page_error:
+                raise RuntimeError("page 2 failed")
+            return {'status': 'OK', 'results': self.results[20:]}
+        return {'status': 'OK', 'results': self.results[:20], 'next_page_token': 'tok'}
+
+    def place(self, place_id, fields=None):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(random.uniform(0.005, 0.03))
+            if place_id in self.fail_ids:
+                raise RuntimeError("details failed")
+            return {'result': {'formatted_phone_number': f'phone-{place_id}', 'website': f'https://{place_id}.test'}}
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+@pytest.fixture(autouse=True)
+def no_token_delay(monkeypatch):
+    original = lead_finder.iter_results
+    monkeypatch.setattr(lead_finder, 'iter_results',
+                        lambda fetch_page, max_results=None: original(fetch_page, max_results=max_results, token_delay=0))
+
+
+def test_leads_keep_ranking_order_with_bounded_concurrency():
+    gmaps = FakeGmaps()
+    leads = lead_finder.find_leads(gmaps, 'plumbers', 'Vancouver', max_results=30, workers=4)
+
+    assert [lead['name'] for lead in leads] == [f'Business {i}' for i in range(30)]
+    assert leads[3]['phone'] == 'phone-p3'
+    assert 1 < gmaps.max_active <= 4
+
+
+def test_one_failed_detail_lookup_does_not_affect_others():
+    gmaps = FakeGmaps(places=5, fail_ids={'p2'})
+    leads = lead_finder.find_leads(gmaps, 'plumbers', 'Vancouver', workers=3)
+
+    assert len(leads) == 5
+    assert leads[2]['phone'] == lead_finder.NO_PHONE
+    assert leads[2]['website'] == lead_finder.NO_WEBSITE
+    assert leads[1]['website'] == 'https://p1.test'
+
+
+def test_later_page_failure_keeps_first_page():
+    gmaps = FakeGmaps(places=30, page_error=True)
+    leads = lead_finder.find_leads(gmaps, 'plumbers', 'Vancouver', workers=4)
+    assert len(leads) == 20
+
+
+def test_known_places_skip_details_lookup(tmp_path):
+    from lead_store import LeadStore
+
+    store = LeadStore(str(tmp_path / 'leads.db'))
+    first = FakeGmaps(places=10)
+    lead_finder.find_leads(first, 'plumber', 'Vancouver', store=store)
+    assert first.max_active > 0
+
+    # An overlapping search: 5 places already enriched, 5 new ones
+    second = FakeGmaps(places=15)
+    second.results = second.results[5:]
+    calls = []
+    original_place = second.place
+    second.place = lambda place_id, fields=None: calls.append(place_id) or original_place(place_id, fields)
+
+    leads = lead_finder.find_leads(second, 'plumbers', 'Burnaby', store=store)
+
+    assert sorted(calls) == sorted(f'p{i}' for i in range(10, 15))
+    assert [lead['place_id'] for lead in leads] == [f'p{i}' for i in range(5, 15)]
+    assert leads[0]['phone'] == 'phone-p5'
+    assert store.stats()['leads'] == 15
+
+
+def test_first_page_failure_raises():
+    class Broken(FakeGmaps):
+        def places(self, query=None, page_token=None):
+            raise RuntimeError("REQUEST_DENIED")
+
+    with pytest.raises(RuntimeError):
+        lead_finder.find_leads(Broken(), 'plumbers', 'Vancouver')
+
+
+def test_lead_page_streams_header_before_details(monkeypatch):
+    import simple_railway_app
+
+    gmaps = FakeGmaps(places=3)
+    monkeypatch.setenv('GOOGLE_API_KEY', 'AIzaSy' + 'x' * 33)
+    monkeypatch.setattr(simple_railway_app, 'LEAD_STREAMING', True)
+    monkeypatch.setattr(simple_railway_app, 'LEAD_STORE_ENABLED', False)
+    monkeypatch.setattr(simple_railway_app, 'get_maps_client', lambda api_key: gmaps)
+
+    client = simple_railway_app.app.test_client()
+    response = client.post('/lead-finder', data={'search_query': 'plumbers', 'location': 'Vancouver'},
+                           buffered=False)
+    chunks = response.response
+    first = next(chunks)
+    first = first.decode() if isinstance(first, bytes) else first
+    assert '<th>Business Name</th>' in first
+    assert 'Business 0' not in first
+
+    rest = ''.join(c.decode() if isinstance(c, bytes) else c for c in chunks)
+    assert rest.index('Business 0') < rest.index('Business 1') < rest.index('Business 2')
+    assert 'phone-p1' in rest
+    assert 'Found 3 businesses' in rest
+    assert rest.rstrip().endswith('</html>')
@@ -0,0 +1,59 @@
+"""
+Tests for the local lead database
+"""
+import io
+import csv
+import time
+import pytest
+from lead_store import LeadStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LeadStore(str(tmp_path / 'leads.db'), max_age=3600)
+
+
+def lead(place_id, **overrides):
+    data = {'place_id': place_id, 'name': f'Business {place_id}', 'address': '1 Main St',
+            'phone': '604-555-0100', 'website': 'https://example.test', 'rating': 4.5, 'total_reviews': 12}
+    data.update(overrides)
+    return data
+
+
+def test_only_enriched_places_are_fresh(store):
+    store.save_lead(lead('a'), enriched=True)
+    store.save_lead(lead('b'), enriched=False)
+
+    assert store.fresh_contacts('a') == ('604-555-0100', 'https://example.test')
+    assert store.fresh_contacts('b') is None
+    assert store.fresh_contacts('missing') is None
+
+
+def test_stale_details_are_refetched(store):
+    store.save_lead(lead('a'), enriched=True)
+    store._connect().execute("UPDATE leads SET enriched_at = ?", (time.time() - 7200,))
+    assert store.fresh_contacts('a') is None
+
+
+def test_listing_update_keeps_contact_details(store):
+    store.save_lead(lead('a', phone='No phone'), enriched=True)
+    store.save_lead(lead('a', phone='ignored', rating=3.9), enriched=False)
+
+    assert store.fresh_contacts('a') == ('No phone', 'https://example.test')
+    row = store.query()[0]
+    assert row['phone'] is None
+    assert row['rating'] == 3.9
+
+
+def test_query_and_csv_export(store):
+    store.save_lead(lead('a', name='Ace Plumbing', rating=4.8), enriched=True)
+    store.save_lead(lead('b', name='Bob Roofing', rating=3.0, website='No website'), enriched=True)
+
+    assert [r['place_id'] for r in store.query(text='plumb')] == ['a']
+    assert [r['place_id'] for r in store.query(min_rating=4)] == ['a']
+    assert [r['place_id'] for r in store.query(has_website=False)] == ['b']
+
+    buffer = io.StringIO()
+    assert store.export_csv(buffer) == 2
+    rows = list(csv.DictReader(io.StringIO(buffer.getvalue())))
+    assert {r['name'] for r in rows} == {'Ace Plumbing', 'Bob Roofing'}
@@ -0,0 +1,37 @@
+"""
+Tests for the shared googlemaps.Client
+"""
+import pytest
+import maps_client
+import places_client
+from config import HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+
+KEY_A = 'AIzaSy' + 'a' * 33
+KEY_B = 'AIzaSy' + 'b' * 33
+
+
+@pytest.fixture(autouse=True)
+def fresh_client():
+    maps_client.reset_maps_client()
+    yield
+    maps_client.reset_maps_client()
+
+
+def test_client_is_reused_until_key_changes():
+    first = maps_client.get_maps_client(KEY_A)
+    assert maps_client.get_maps_client(KEY_A) is first
+    assert first.session is places_client.get_session()
+    assert first.timeout == (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+    second = maps_client.get_maps_client(KEY_B)
+    assert second is not first
+    assert second.key == KEY_B
+    assert maps_client.get_maps_client(KEY_B) is second
+
+
+def test_client_follows_rebuilt_session():
+    first = maps_client.get_maps_client(KEY_A)
+    places_client.close_session()
+    second = maps_client.get_maps_client(KEY_A)
+    assert second is not first
+    assert second.session is places_client.get_session()
@@ -0,0 +1,75 @@
+"""
+Tests for the negative search cache and its Bloom filter
+"""
+import pytest
+import utils
+from negative_cache import BloomFilter, NegativeCache, search_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return NegativeCache(str(tmp_path / 'negative.db'), ttl=60, capacity=1000, error_rate=0.01)
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(10_000, 0.01)
+    for i in range(10_000):
+        bloom.add(f"empty {i}")
+
+    assert all(f"empty {i}" in bloom for i in range(10_000))
+    false_positives = sum(f"other {i}" in bloom for i in range(10_000))
+    assert false_positives / 10_000 < 0.02
+    assert 0.005 < bloom.estimated_false_positive_rate() < 0.02
+    assert bloom.memory_bytes < 12 * 1024
+
+
+def test_search_key_ignores_case_and_spacing():
+    assert search_key('  Joes  PIZZA ') == search_key('joes pizza')
+    assert search_key('pizza', location='1,2') != search_key('pizza', location='3,4')
+
+
+def test_repeat_miss_skips_upstream(cache):
+    calls = []
+
+    def empty():
+        calls.append(1)
+        return {'status': 'ZERO_RESULTS', 'results': []}
+
+    key = search_key('zzz nowhere')
+    assert cache.search(key, empty)['results'] == []
+    assert cache.search(key, empty)['status'] == 'ZERO_RESULTS'
+    assert len(calls) == 1
+    assert cache.stats()['hits'] == 1
+
+
+def test_non_empty_results_and_expired_misses_go_upstream(cache, monkeypatch):
+    calls = []
+
+    def found():
+        calls.append(1)
+        return {'status': 'OK', 'results': [{'place_id': 'p1'}]}
+
+    cache.search('pizza', found)
+    cache.search('pizza', found)
+    assert len(calls) == 2
+
+    cache.record('typo')
+    assert cache.is_empty('typo')
+    monkeypatch.setattr('negative_cache.time.time', lambda: 10**12)
+    # Expired misses are forgotten and go upstream again
+    assert not cache.is_empty('typo')
+
+
+def test_entries_are_shared_between_processes(tmp_path):
+    first = NegativeCache(str(tmp_path / 'negative.db'), ttl=60)
+    first.record('typo')
+    assert NegativeCache(str(tmp_path / 'negative.db'), ttl=60).is_empty('typo')
+
+
+def test_repeat_empty_search_is_answered_from_negative_cache(fake_api, cache, monkeypatch):
+    monkeypatch.setattr('negative_cache.NEGATIVE_CACHE_ENABLED', True)
+    monkeypatch.setattr('negative_cache.get_negative_cache', lambda: cache)
+
+    assert list(utils.iter_search_businesses('zzz nowhere', 'atlantis', api_key='test')) == []
+    assert list(utils.iter_search_businesses('ZZZ  Nowhere', 'atlantis', api_key='test')) == []
+    assert fake_api.stats()['textsearch'] == 1
@@ -0,0 +1,77 @@
+"""
+Tests for streaming Text Search pagination
+"""
+import time
+from unittest.mock import patch
+from pagination import iter_pages, iter_results
+from resilience import PlacesAPIError
+
+
+def _pages(count, per_page=20):
+    pages = {}
+    for n in range(count):
+        token = f"token{n}" if n else None
+        pages[token] = {
+            'status': 'OK',
+            'results': [{'place_id': f"p{n}_{i}"} for i in range(per_page)],
+        }
+        if n < count - 1:
+            pages[token]['next_page_token'] = f"token{n + 1}"
+    return pages
+
+
+def test_follows_next_page_token():
+    pages = _pages(3)
+    fetched = []
+
+    def fetch_page(token):
+        fetched.append(token)
+        return pages[token]
+
+    results = list(iter_results(fetch_page, token_delay=0))
+    assert len(results) == 60
+    assert fetched == [None, 'token1', 'token2']
+
+
+def test_stops_early_without_fetching_more_pages():
+    pages = _pages(3)
+    fetched = []
+
+    def fetch_page(token):
+        fetched.append(token)
+        return pages[token]
+
+    results = list(iter_results(fetch_page, max_results=25, token_delay=0))
+    assert len(results) == 25
+    assert fetched == [None, 'token1']
+
+
+def test_first_page_is_available_before_token_delay():
+    pages = _pages(2)
+    start = time.monotonic()
+    generator = iter_pages(lambda token: pages[token], token_delay=0.2)
+    first = next(generator)
+    assert time.monotonic() - start < 0.1
+    assert len(first['results']) == 20
+
+    # Work done by the caller counts towards the activation delay
+    time.sleep(0.15)
+    before_second = time.monotonic()
+    next(generator)
+    assert time.monotonic() - before_second < 0.1
+
+
+def test_retries_token_that_is_not_active_yet():
+    pages = _pages(2)
+    attempts = []
+
+    def fetch_page(token):
+        attempts.append(token)
+        if token and attempts.count(token) == 1:
+            raise PlacesAPIError('INVALID_REQUEST')
+        return pages[token]
+
+    with patch('pagination.TOKEN_RETRY_DELAY', 0):
+        results = list(iter_results(fetch_page, token_delay=0))
+    assert len(results) == 40
+    assert attempts == [None, 'token1', 'token1']
@@ -0,0 +1,54 @@
+"""
+Tests for the shared pooled Places HTTP client
+"""
+from unittest.mock import patch, MagicMock
+import places_client
+
+
+def test_session_is_shared():
+    """
+    The same pooled session is returned on every call within a process
+    """
+    places_client.close_session()
+    try:
+        first = places_client.get_session()
+        second = places_client.get_session()
+        assert first is second
+        adapter = first.get_adapter('https://maps.googleapis.com')
+        assert adapter._pool_maxsize == places_client.HTTP_POOL_SIZE
+    finally:
+        places_client.close_session()
+
+
+def test_session_rebuilt_after_fork():
+    """
+    A different process id gets a fresh session
+    """
+    places_client.close_session()
+    try:
+        first = places_client.get_session()
+        with patch('places_client.os.getpid', return_value=-1):
+            second = places_client.get_session()
+        assert first is not second
+    finally:
+        places_client.close_session()
+
+
+def test_request_json_adds_key_and_timeout():
+    """
+    request_json builds the URL, adds the key and applies the default timeout
+    """
+    mock_session = MagicMock()
+    mock_session.get.return_value.json.return_value = {'status': 'OK', 'results': []}
+
+    with patch('places_client.get_session', return_value=mock_session):
+        params = {'query': 'pizza'}
+        data = places_client.request_json('place/textsearch/json', params, api_key='test_key')
+
+    assert data == {'status': 'OK', 'results': []}
+    args, kwargs = mock_session.get.call_args
+    assert args[0].endswith('/maps/api/place/textsearch/json')
+    assert kwargs['params'] == {'query': 'pizza', 'key': 'test_key'}
+    assert kwargs['timeout'] == places_client.DEFAULT_TIMEOUT
+    # Caller's params are left untouched
+    assert params == {'query': 'pizza'}
@@ -0,0 +1,68 @@
+"""
+Tests for the host-wide quota coordinator
+"""
+import multiprocessing
+import os
+import pytest
+from quota import QuotaCoordinator, QuotaExceededError, sku_for_endpoint
+
+
+def test_sku_for_endpoint():
+    assert sku_for_endpoint('place/textsearch/json') == 'textsearch'
+    assert sku_for_endpoint('https://maps.googleapis.com/maps/api/place/details/json?place_id=x') == 'details'
+    assert sku_for_endpoint('https://maps.googleapis.com/maps/api/geocode/json') == 'geocode'
+
+
+def test_daily_budget_enforced(tmp_path):
+    """
+    Spending past a SKU's daily budget raises, other SKUs are unaffected
+    """
+    coordinator = QuotaCoordinator(str(tmp_path / 'quota.db'), rate=1000, burst=100,
+                                   daily_budgets={'details': 2})
+    coordinator.acquire('details')
+    coordinator.acquire('details')
+    with pytest.raises(QuotaExceededError):
+        coordinator.acquire('details')
+    coordinator.acquire('textsearch')
+
+    assert coordinator.spend_today() == {'details': 2, 'textsearch': 1}
+    assert coordinator.remaining_today('details') == 0
+    assert coordinator.remaining_today('textsearch') is None
+
+
+def test_global_rate_is_shared(tmp_path):
+    """
+    Two coordinators on the same database draw from one bucket
+    """
+    path = str(tmp_path / 'quota.db')
+    first = QuotaCoordinator(path, rate=10, burst=1, daily_budgets={})
+    second = QuotaCoordinator(path, rate=10, burst=1, daily_budgets={})
+
+    assert first.reserve('details') == 0
+    assert second.reserve('details') == pytest.approx(0.1, abs=0.02)
+
+
+def _spend(path, count):
+    coordinator = QuotaCoordinator(path, rate=1000, burst=1000, daily_budgets={})
+    for _ in range(count):
+        coordinator.acquire('textsearch')
+
+
+def test_ledger_across_processes(tmp_path):
+    """
+    Every spend from every process ends up in the shared ledger
+    """
+    path = str(tmp_path / 'quota.db')
+    QuotaCoordinator(path, daily_budgets={})
+    processes = [multiprocessing.Process(target=_spend, args=(path, 10)) for _ in range(3)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+
+    coordinator = QuotaCoordinator(path, daily_budgets={})
+    entries = coordinator.ledger(sku='textsearch')
+    assert len(entries) == 30
+    assert len({e['pid'] for e in entries}) == 3
+    assert os.getpid() not in {e['pid'] for e in entries}
+    assert coordinator.spend_today()['textsearch'] == 30
@@ -0,0 +1,61 @@
+"""
+Tests for the token-bucket rate limiter
+"""
+import threading
+import time
+import pytest
+from rate_limiter import TokenBucket
+
+
+def test_burst_is_not_throttled():
+    """
+    Requests within the burst go through immediately
+    """
+    bucket = TokenBucket(rate=5, burst=5)
+    start = time.monotonic()
+    for _ in range(5):
+        assert bucket.acquire() == 0
+    assert time.monotonic() - start < 0.05
+    assert bucket.stats()['throttled'] == 0
+
+
+def test_throttles_beyond_burst():
+    """
+    Once the burst is spent, callers wait roughly 1/rate per token
+    """
+    bucket = TokenBucket(rate=20, burst=1)
+    bucket.acquire()
+    wait = bucket.reserve()
+    assert 0.04 <= wait <= 0.06
+
+    stats = bucket.stats()
+    assert stats['acquired'] == 2
+    assert stats['throttled'] == 1
+    assert stats['total_wait_seconds'] == pytest.approx(wait)
+
+
+def test_shared_across_threads():
+    """
+    Concurrent callers are spread out at the configured rate
+    """
+    bucket = TokenBucket(rate=50, burst=2)
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(12)]
+
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+
+    # 2 free tokens, then 10 more at 50/s
+    assert elapsed >= 0.18
+    assert bucket.stats()['acquired'] == 12
+    assert bucket.stats()['throttled'] == 10
+
+
+def test_rejects_invalid_settings():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+    with pytest.raises(ValueError):
+        TokenBucket(rate=1, burst=0)
@@ -0,0 +1,92 @@
+"""
+Tests for retry, backoff and circuit breaking
+"""
+import pytest
+import requests
+from unittest.mock import MagicMock
+from resilience import (
+    PlacesAPIError, CircuitBreaker, CircuitOpenError,
+    call_with_retries, check_response, parse_retry_after
+)
+
+
+def _response(status_code=200, data=None, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.reason = 'Error'
+    response.headers = headers or {}
+    response.json.return_value = data or {}
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=response)
+    return response
+
+
+def test_over_query_limit_inside_200_is_retryable():
+    with pytest.raises(PlacesAPIError) as info:
+        check_response(_response(200, {'status': 'OVER_QUERY_LIMIT'}))
+    assert info.value.retryable
+
+    with pytest.raises(PlacesAPIError) as info:
+        check_response(_response(200, {'status': 'REQUEST_DENIED', 'error_message': 'bad key'}))
+    assert not info.value.retryable
+
+    assert check_response(_response(200, {'status': 'ZERO_RESULTS', 'results': []}))['results'] == []
+
+
+def test_429_honors_retry_after():
+    with pytest.raises(PlacesAPIError) as info:
+        check_response(_response(429, headers={'Retry-After': '3'}))
+    assert info.value.retry_after == 3
+    assert parse_retry_after('not a date') is None
+
+
+def test_retries_then_succeeds():
+    attempts = iter([PlacesAPIError('OVER_QUERY_LIMIT', retryable=True, retry_after=2),
+                     requests.exceptions.ConnectionError(),
+                     {'status': 'OK'}])
+    sleeps = []
+
+    def flaky():
+        outcome = next(attempts)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert call_with_retries(flaky, max_attempts=4, sleep=sleeps.append) == {'status': 'OK'}
+    assert len(sleeps) == 2
+    assert sleeps[0] >= 2  # Retry-After wins over a shorter backoff
+
+
+def test_non_retryable_error_is_not_retried():
+    calls = []
+
+    def denied():
+        calls.append(1)
+        raise PlacesAPIError('REQUEST_DENIED')
+
+    with pytest.raises(PlacesAPIError):
+        call_with_retries(denied, max_attempts=4, sleep=lambda s: None)
+    assert len(calls) == 1
+
+
+def test_circuit_opens_and_half_opens():
+    breaker = CircuitBreaker('details', failure_threshold=2, reset_timeout=0.05)
+
+    def failing():
+        raise requests.exceptions.Timeout()
+
+    with pytest.raises(requests.exceptions.Timeout):
+        call_with_retries(failing, breaker=breaker, max_attempts=2, sleep=lambda s: None)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # Fails fast without calling upstream
+    upstream = MagicMock()
+    with pytest.raises(CircuitOpenError):
+        call_with_retries(upstream, breaker=breaker, max_attempts=2, sleep=lambda s: None)
+    upstream.assert_not_called()
+
+    import time
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert call_with_retries(lambda: 'ok', breaker=breaker) == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED
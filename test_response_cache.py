@@ -0,0 +1,84 @@
+"""
+Tests for the persistent Places response cache
+"""
+import time
+from unittest.mock import patch, MagicMock
+import places_client
+from response_cache import ResponseCache, cache_key
+
+
+def test_cache_key_normalizes_fields():
+    """
+    Field order, duplicates and the API key do not change the key
+    """
+    first = cache_key('place/details/json', {'place_id': 'abc', 'fields': 'rating,name', 'key': 'k1'})
+    second = cache_key('place/details/json', {'place_id': 'abc', 'fields': 'name, rating,name', 'key': 'k2'})
+    other_language = cache_key('place/details/json', {'place_id': 'abc', 'fields': 'name,rating', 'language': 'fr'})
+    assert first == second
+    assert first != other_language
+
+
+def test_hit_miss_and_expiry(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), max_bytes=10**6)
+    assert cache.get('k') is None
+
+    cache.put('k', 'place/details/json', {'status': 'OK', 'result': {'name': 'Cafe'}}, ttl=60)
+    assert cache.get('k') == {'status': 'OK', 'result': {'name': 'Cafe'}}
+
+    cache.put('short', 'place/details/json', {'status': 'OK'}, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get('short') is None
+
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+    assert stats['expirations'] == 1
+    assert stats['entries'] == 1
+
+
+def test_lru_eviction(tmp_path):
+    """
+    Least recently used entries are evicted once the size limit is passed
+    """
+    cache = ResponseCache(str(tmp_path / 'cache.db'), max_bytes=10**6)
+    payload = {'status': 'OK', 'blob': 'x' * 50}
+    cache.put('a', 'e', payload, ttl=60)
+    entry_size = cache.stats()['size_bytes']
+    cache.max_bytes = entry_size * 2
+
+    cache.put('b', 'e', payload, ttl=60)
+    time.sleep(0.01)
+    cache.get('a')  # 'b' is now least recently used
+    cache.put('c', 'e', payload, ttl=60)
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['size_bytes'] <= cache.max_bytes
+
+
+def test_request_json_reads_through_cache(tmp_path):
+    """
+    A repeated details lookup is served from the cache without an upstream call
+    """
+    cache = ResponseCache(str(tmp_path / 'cache.db'))
+    mock_session = MagicMock()
+    mock_session.get.return_value.json.return_value = {'status': 'OK', 'result': {'name': 'Cafe'}}
+
+    with patch('places_client.get_session', return_value=mock_session), \
+            patch('places_client.get_response_cache', return_value=cache), \
+            patch('places_client.RESPONSE_CACHE_ENABLED', True), \
+            patch.dict('places_client.RESPONSE_CACHE_TTLS', {'place/details/json': 60}):
+        params = {'place_id': 'abc', 'fields': 'name'}
+        first = places_client.request_json('place/details/json', params, api_key='k')
+        second = places_client.request_json('place/details/json', params, api_key='k')
+
+    assert first == second
+    assert mock_session.get.call_count == 1
+    assert cache.stats()['hits'] == 1
+
+
+def test_details_are_cached_by_one_tier_only():
+    import config
+    assert ('place/details/json' in config.RESPONSE_CACHE_TTLS) != config.FIELD_CACHE_ENABLED
@@ -0,0 +1,158 @@
+"""
+Tests for the columnar review scoring engine
+"""
+import json
+import random
+import pandas as pd
+import pytest
+from config import LOW_RATING_THRESHOLD, MIN_REVIEWS_FOR_ANALYSIS, SUSPICIOUS_THRESHOLD
+from review_engine import RatingAccumulator, add_reviewer_columns, analyze_reviewers, reviewer_stats, score_business
+
+
+def row_by_row(df_reviews, get_user_reviews):
+    """
+    The per-row analysis the engine replaced, kept as the reference
+    """
+    low_rating_reviewers = df_reviews[df_reviews['rating'] < LOW_RATING_THRESHOLD]
+    suspicious_users = []
+    user_analysis = {}
+    for _, review in low_rating_reviewers.iterrows():
+        user_id = review['reviewer_id']
+        user_reviews = get_user_reviews(user_id)
+        if len(user_reviews) >= MIN_REVIEWS_FOR_ANALYSIS:
+            user_ratings = [r['rating'] for r in user_reviews]
+            low_rating_count = sum(1 for rating in user_ratings if rating < LOW_RATING_THRESHOLD)
+            low_rating_percentage = low_rating_count / len(user_ratings)
+            average_rating = sum(user_ratings) / len(user_ratings)
+            mean_square = sum(rating * rating for rating in user_ratings) / len(user_ratings)
+            user_analysis[user_id] = {
+                'name': review['reviewer_name'],
+                'total_reviews': len(user_reviews),
+                'low_rating_count': low_rating_count,
+                'low_rating_percentage': low_rating_percentage,
+                'average_rating': average_rating,
+                'rating_variance': max(mean_square - average_rating * average_rating, 0.0),
+                'rating_counts': [user_ratings.count(star) for star in range(1, 6)],
+                'first_seen': 0,
+                'last_seen': 0,
+                'is_suspicious': low_rating_percentage >= SUSPICIOUS_THRESHOLD,
+                'target_business_rating': review['rating'],
+                'target_business_comment': review.get('text', '')
+            }
+            if low_rating_percentage >= SUSPICIOUS_THRESHOLD:
+                suspicious_users.append(user_id)
+    return {'low_rating_reviews': len(low_rating_reviewers), 'user_analysis': user_analysis,
+            'suspicious_users': suspicious_users}
+
+
+def make_reviews(count, reviewers, seed=1):
+    rng = random.Random(seed)
+    reviews = []
+    for i in range(count):
+        user = f"user{rng.randrange(reviewers)}"
+        review = {'rating': rng.randint(1, 5), 'user': {'id': user, 'name': user.title()}}
+        if i % 7:
+            review['text'] = f"review {i}"
+        reviews.append(review)
+
+    histories = {f"user{n}": [{'rating': rng.randint(1, 5)} for _ in range(rng.randint(0, 20))]
+                 for n in range(reviewers)}
+    return reviews, histories.__getitem__
+
+
+def test_engine_matches_row_by_row_analysis():
+    reviews, get_user_reviews = make_reviews(2000, 300)
+
+    expected = row_by_row(add_reviewer_columns(pd.DataFrame(reviews)), get_user_reviews)
+    actual = analyze_reviewers(add_reviewer_columns(pd.DataFrame(reviews)), get_user_reviews)
+
+    assert actual['user_analysis']
+    assert json.dumps(actual) == json.dumps(expected)
+
+
+def test_histories_are_fetched_once_per_reviewer():
+    reviews, get_user_reviews = make_reviews(500, 20)
+    calls = []
+
+    def counting(user_id):
+        calls.append(user_id)
+        return get_user_reviews(user_id)
+
+    analyze_reviewers(add_reviewer_columns(pd.DataFrame(reviews)), counting)
+    assert len(calls) == len(set(calls))
+
+
+def test_no_low_ratings():
+    df = add_reviewer_columns(pd.DataFrame([{'rating': 5, 'text': 'great', 'user': {'id': 'a', 'name': 'A'}}]))
+    assert analyze_reviewers(df, lambda user_id: []) == {'low_rating_reviews': 0, 'user_analysis': {},
+                                                        'suspicious_users': []}
+
+
+def test_accumulator_matches_full_history_statistics():
+    rng = random.Random(7)
+    histories = {f"u{i}": [{'rating': rng.randint(1, 5), 'time_created': 1000 + t}
+                           for t in range(1, rng.randint(5, 40) + 1)] for i in range(50)}
+    expected = reviewer_stats(histories)
+    for key, reviews in histories.items():
+        accumulator = RatingAccumulator()
+        for review in reviews:
+            accumulator.add(review['rating'], seen=review['time_created'])
+        # Round-trips through storage
+        summary = RatingAccumulator(*accumulator.pack()).summary()
+
+        assert list(summary) == list(expected[key])
+        for field in ('total_reviews', 'low_rating_count', 'rating_counts', 'first_seen', 'last_seen',
+                      'is_suspicious'):
+            assert summary[field] == expected[key][field]
+        for field in ('low_rating_percentage', 'average_rating', 'rating_variance'):
+            assert summary[field] == pytest.approx(expected[key][field])
+        ratings = [review['rating'] for review in reviews]
+        assert summary['rating_variance'] == pytest.approx(pd.Series(ratings).var(ddof=0))
+        assert (summary['first_seen'], summary['last_seen']) == (1001, 1000 + len(ratings))
+
+
+def test_accumulator_remove_undoes_add():
+    accumulator = RatingAccumulator()
+    for rating in (5, 1, 4, 2):
+        accumulator.add(rating, seen=1)
+    accumulator.add(3, seen=2)
+    accumulator.remove(3)
+    assert accumulator.counts.tolist() == [1, 1, 0, 1, 1]
+    assert accumulator.mean == pytest.approx(3.0)
+    assert accumulator.m2 == pytest.approx(10.0)
+
+
+def test_unknown_times_do_not_move_first_and_last_seen():
+    accumulator = RatingAccumulator()
+    accumulator.add(2, seen=0)
+    assert (accumulator.first_seen, accumulator.last_seen) == (0, 0)
+    accumulator.add(3, seen=50)
+    accumulator.add(4)
+    assert (accumulator.first_seen, accumulator.last_seen) == (50, 50)
+
+    stats = reviewer_stats({'a': [{'rating': 1, 'time_created': t} for t in (0, 70, None, 60, 0)]})
+    assert (stats['a']['first_seen'], stats['a']['last_seen']) == (60, 70)
+
+
+@pytest.mark.parametrize('rating', [0, 6])
+def test_accumulator_rejects_ratings_outside_one_to_five(rating):
+    with pytest.raises(ValueError):
+        RatingAccumulator().add(rating)
+    with pytest.raises(ValueError):
+        RatingAccumulator().remove(rating)
+
+
+def test_bad_ratings_in_a_history_leave_the_rest_of_the_analysis_intact(capsys):
+    reviews, get_user_reviews = make_reviews(300, 40)
+    expected = score_business('p1', reviews, get_user_reviews)
+    bad_user = next(iter(expected['user_analysis']))
+
+    def with_bad_ratings(user_id):
+        history = get_user_reviews(user_id)
+        if user_id == bad_user:
+            history = history + [{'rating': 0}, {'rating': 6}, {'rating': None}, {'rating': 'n/a'}]
+        return history
+
+    actual = score_business('p1', reviews, with_bad_ratings)
+    assert json.dumps(actual) == json.dumps(expected)
+    assert 'Skipped 4 reviewer ratings outside 1-5' in capsys.readouterr().out
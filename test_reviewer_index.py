@@ -0,0 +1,117 @@
+"""
+Tests for the cross-business reviewer index
+"""
+import pytest
+import reviewer_index
+from reviewer_index import ReviewerIndex, author_key, indexed_user_reviews, indexed_user_stats
+from yelp_analyzer import GooglePlacesReviewAnalyzer
+
+
+def contrib_url(contributor):
+    return f"https://www.google.com/maps/contrib/{contributor}/reviews"
+
+
+def formatted(contributor, rating, time_created, name='Sam K.'):
+    return {'rating': rating, 'text': 'text', 'time_created': time_created,
+            'user': {'id': str(contributor), 'name': name, 'url': contrib_url(contributor)}}
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    index = ReviewerIndex(str(tmp_path / 'reviewers.db'))
+    monkeypatch.setattr(reviewer_index, 'get_reviewer_index', lambda: index)
+    monkeypatch.setattr(reviewer_index, 'REVIEWER_INDEX_ENABLED', True)
+    return index
+
+
+def test_author_key_prefers_contributor_id():
+    assert author_key({'author_url': contrib_url(1234), 'author_name': 'Sam K.'}) == '1234'
+    assert author_key({'author_url': 'https://example.com/sam'}) == 'https://example.com/sam'
+    assert author_key({'author_name': 'Sam K.'}) is None
+
+
+def test_histories_accumulate_across_businesses(index):
+    index.add_reviews('p1', 'Cafe One', [formatted(1, 2, 100), formatted(2, 5, 110)])
+    index.add_reviews('p2', 'Cafe Two', [formatted(1, 1, 50)])
+    # Seeing a place again (here with an edited rating) replaces its review
+    index.add_reviews('p1', 'Cafe One', [formatted(1, 3, 120)])
+    # Reviews without a stable author are not indexed
+    assert index.add_reviews('p3', 'Cafe Three', [{'rating': 1, 'user': {'id': 'Anon', 'name': 'Anon'}}]) == 0
+    # Nor are ratings outside 1-5, which are skipped rather than raised
+    assert index.add_reviews('p4', 'Cafe Four', [formatted(1, 0, 130), formatted(2, 6, 130)]) == 0
+
+    assert index.get_reviews('1') == [
+        {'rating': 1, 'business_id': 'p2', 'business_name': 'Cafe Two', 'time_created': 50},
+        {'rating': 3, 'business_id': 'p1', 'business_name': 'Cafe One', 'time_created': 120},
+    ]
+    assert index.get_reviews('Anon') == []
+    stats = index.stats()
+    assert (stats['reviewers'], stats['reviews'], stats['indexed']) == (2, 3, 4)
+
+
+def test_short_histories_fall_back_to_simulation(index, monkeypatch):
+    for place in range(3):
+        index.add_reviews(f"p{place}", 'Cafe', [formatted(7, 1, place)])
+    assert indexed_user_reviews('7') is None
+
+    monkeypatch.setattr(reviewer_index, 'SIMULATE_USER_REVIEWS', False)
+    assert [review['rating'] for review in indexed_user_reviews('7')] == [1, 1, 1]
+
+    monkeypatch.setattr(reviewer_index, 'REVIEWER_INDEX_ENABLED', False)
+    assert indexed_user_reviews('7') is None
+
+
+def test_analyzer_histories_come_from_fetched_businesses(index, monkeypatch):
+    def details(place_id, fields, api_key=None):
+        place = int(place_id[1:])
+        return {'name': f"Business {place}", 'reviews': [
+            {'author_name': 'Sam K.', 'author_url': contrib_url(42), 'rating': 1 + place % 2, 'time': place},
+            {'author_name': 'Sam K.', 'author_url': contrib_url(43), 'rating': 5, 'time': place},
+        ]}
+
+    monkeypatch.setattr('places_client.get_place_details', details)
+    analyzer = GooglePlacesReviewAnalyzer(api_key='test')
+    reviews = [analyzer.get_business_reviews(f"p{place}") for place in range(6)]
+
+    # Two reviewers with the same name stay apart
+    assert [review['user']['id'] for review in reviews[0]] == ['42', '43']
+    history = analyzer.get_user_reviews('42')
+    assert [review['rating'] for review in history] == [1, 2, 1, 2, 1, 2]
+    assert history[5]['business_name'] == 'Business 5'
+    assert index.stats()['hits'] == 1
+
+
+def test_statistics_count_each_review_once(index):
+    for place in range(6):
+        index.add_reviews(f"p{place}", 'Cafe', [formatted(9, 1 + place % 2, 100 + place)])
+    # Fetching a business again does not count its reviews twice; an edit replaces the rating
+    assert index.add_reviews('p0', 'Cafe', [formatted(9, 1, 100)]) == 0
+    index.add_reviews('p1', 'Cafe', [formatted(9, 5, 101)])
+
+    stats = indexed_user_stats(['9', 'unknown'])
+    assert list(stats) == ['9']
+    assert stats['9']['rating_counts'] == [3, 2, 0, 0, 1]
+    assert stats['9']['average_rating'] == pytest.approx(2.0)
+    assert stats['9']['low_rating_count'] == 5
+    assert (stats['9']['first_seen'], stats['9']['last_seen']) == (100, 105)
+
+    before = index.get_stats(['9'])['9'].pack()
+    index.rebuild_stats()
+    rebuilt = index.get_stats(['9'])['9'].pack()
+    assert rebuilt[0] == before[0]
+    assert rebuilt[1:3] == pytest.approx(before[1:3])
+
+
+def test_indexed_reviewers_are_scored_without_their_history(index, monkeypatch):
+    for place in range(5):
+        index.add_reviews(f"p{place}", 'Cafe', [formatted(11, 1, place)])
+    monkeypatch.setattr('places_client.get_place_details', lambda place_id, fields, api_key=None: {
+        'name': 'Target', 'reviews': [{'author_name': 'Sam K.', 'author_url': contrib_url(11), 'rating': 2, 'time': 9}]})
+    analyzer = GooglePlacesReviewAnalyzer(api_key='test')
+    monkeypatch.setattr(analyzer, 'get_user_reviews', lambda user_id: pytest.fail('history was read'))
+    monkeypatch.setattr(analyzer, '_save_results', lambda results: None)
+
+    results = analyzer.analyze_business_reviews('target', incremental=False)
+    assert results['suspicious_users'] == ['11']
+    assert results['user_analysis']['11']['total_reviews'] == 6
+    assert results['user_analysis']['11']['rating_counts'] == [5, 1, 0, 0, 0]
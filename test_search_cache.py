@@ -0,0 +1,61 @@
+"""
+Tests for query normalization and the fuzzy search cache
+"""
+import pytest
+import utils
+from search_cache import SearchCache, normalize_location, normalize_text
+
+RESULTS = [{'place_id': 'p1', 'name': "Joe's Pizza"}]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SearchCache(str(tmp_path / 'searches.db'), ttl=60, min_similarity=0.8)
+
+
+def test_normalization_folds_case_punctuation_and_diacritics():
+    assert normalize_text("  McDonald's ") == normalize_text('mcdonalds') == 'mcdonalds'
+    assert normalize_text('Café Crème & Co.') == 'cafe creme co'
+    assert normalize_location('Vancouver, British Columbia, Canada') == 'vancouver bc'
+    assert normalize_location('vancouver bc') == 'vancouver bc'
+    assert normalize_location('Montréal, Québec') == 'montreal qc'
+    assert normalize_location('Saint John, New Brunswick') == 'st john nb'
+
+
+def test_exact_and_fuzzy_hits(cache):
+    cache.put("Joe's Pizzeria Downtown", 'Vancouver, BC', RESULTS)
+
+    assert cache.get('joes pizzeria downtown', 'vancouver british columbia') == RESULTS
+    assert cache.get('Joes Pizzeria Downtwn', 'Vancouver BC') == RESULTS
+    assert cache.stats()['exact_hits'] == 1
+    assert cache.stats()['fuzzy_hits'] == 1
+
+
+def test_dissimilar_queries_locations_and_numbers_miss(cache):
+    cache.put('pizza hut 1', 'vancouver bc', RESULTS)
+    cache.put('starbucks coffee', 'vancouver bc', RESULTS)
+
+    assert cache.get('pizza hut 2', 'vancouver bc') is None
+    assert cache.get('starbucks coffee', 'toronto on') is None
+    assert cache.get('sushi bar', 'vancouver bc') is None
+    assert cache.stats()['misses'] == 3
+
+
+def test_expired_searches_are_purged(cache, monkeypatch):
+    cache.put('pizza', 'vancouver', RESULTS)
+    cache.put('pizza', 'vancouver', RESULTS)
+    monkeypatch.setattr('search_cache.time.time', lambda: 10**12)
+    assert cache.get('pizza', 'vancouver') is None
+    assert cache.purge_expired() == 1
+    assert cache._connect().execute("SELECT COUNT(*) FROM search_grams").fetchone()[0] == 0
+
+
+def test_equivalent_searches_share_one_textsearch(fake_api, cache, monkeypatch):
+    monkeypatch.setattr('utils.SEARCH_CACHE_ENABLED', True)
+    monkeypatch.setattr('utils.get_search_cache', lambda: cache)
+
+    first = utils.search_businesses("McDonald's", 'Vancouver, British Columbia', api_key='test')
+    assert first
+    assert utils.search_businesses('mcdonalds ', 'vancouver bc', api_key='test') == first
+    assert utils.search_businesses('McDonalds', 'Vancouver, BC, Canada', api_key='test') == first
+    assert fake_api.stats()['textsearch'] == 1
@@ -0,0 +1,83 @@
+"""
+Tests for single-flight request coalescing
+"""
+import threading
+import time
+import pytest
+from single_flight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def slow_lookup():
+        calls.append(1)
+        time.sleep(0.1)
+        return {'results': [{'place_id': 'abc'}]}
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do('pizza|vancouver', slow_lookup)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == 8
+    assert all(r == {'results': [{'place_id': 'abc'}]} for r in results)
+    # Waiters get their own copy
+    assert len({id(r) for r in results}) == 8
+
+    stats = flight.stats()
+    assert stats['executions'] == 1
+    assert stats['coalesced_waiters'] == 7
+    assert stats['in_flight'] == 0
+
+
+def test_errors_are_shared_and_not_cached():
+    flight = SingleFlight()
+    started = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        time.sleep(0.05)
+        raise ValueError("upstream down")
+
+    def waiter():
+        started.wait()
+        try:
+            flight.do('k', failing)
+        except ValueError as e:
+            errors.append(e)
+
+    t = threading.Thread(target=waiter)
+    t.start()
+    with pytest.raises(ValueError):
+        flight.do('k', failing)
+    t.join()
+
+    assert len(errors) == 1
+    # The next call runs again instead of reusing the failure
+    assert flight.do('k', lambda: 'ok') == 'ok'
+
+
+def test_leader_mutating_its_result_does_not_reach_waiters():
+    flight = SingleFlight()
+
+    def lookup():
+        # Hold the call open until the waiter has joined it
+        while flight.stats()['coalesced_waiters'] == 0:
+            time.sleep(0.001)
+        return {'results': ['abc']}
+
+    leader = threading.Thread(target=lambda: flight.do('k', lookup)['results'].append('mutated'))
+    leader.start()
+    while flight.stats()['in_flight'] == 0:
+        time.sleep(0.001)
+    result = flight.do('k', lookup)
+    leader.join()
+
+    assert result == {'results': ['abc']}
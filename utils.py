@@ -3,14 +3,20 @@ Utility functions for Google Places Review Analyzer
 """
 import requests
 import json
-from typing import List, Dict, Optional
-from config import GOOGLE_API_KEY
+from typing import List, Dict, Optional, Iterator
+from config import GOOGLE_API_KEY, MAX_SEARCH_PAGES, SEARCH_CACHE_ENABLED
+import places_client
+from search_cache import get_search_cache
+from pagination import iter_results
 
 
 def search_businesses(query: str, location: str, api_key: str = None) -> List[Dict]:
     """
     Search for businesses on Google Places
     
+    Results are cached under the normalized query and location, and a near-identical
+    query in the same location is served from cache when it is similar enough.
+    
     Args:
         query: Search term (business name, cuisine type, etc.)
         location: Location to search in
@@ -21,7 +27,11 @@ def search_businesses(query: str, location: str, api_key: str = None) -> List[Di
     """
     api_key = api_key or GOOGLE_API_KEY
     
-    url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
+    if SEARCH_CACHE_ENABLED:
+        cached = get_search_cache().get(query, location)
+        if cached is not None:
+            return cached
+    
     params = {
         'query': f"{query} in {location}",
         'key': api_key,
@@ -29,13 +39,53 @@ def search_businesses(query: str, location: str, api_key: str = None) -> List[Di
     }
     
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        return data.get('results', [])
+        data = places_client.request_json('place/textsearch/json', params)
     except requests.exceptions.RequestException as e:
         print(f"Error searching businesses: {e}")
         return []
+    
+    results = data.get('results', [])
+    # Empty results are left to the negative cache, which forgets them much sooner
+    if SEARCH_CACHE_ENABLED and results:
+        get_search_cache().put(query, location, results)
+    return results
+
+
+def iter_search_businesses(query: str, location: str, api_key: str = None,
+                           max_results: int = None, max_pages: int = MAX_SEARCH_PAGES) -> Iterator[Dict]:
+    """
+    Search for businesses on Google Places, following result pages as they are needed
+    
+    The first page is yielded as soon as it arrives; later pages are only fetched if the
+    caller keeps iterating, so stopping early saves requests.
+    
+    Args:
+        query: Search term (business name, cuisine type, etc.)
+        location: Location to search in
+        api_key: Google Places API key
+        max_results: Stop after this many businesses (None for every page)
+        max_pages: Maximum result pages to fetch
+        
+    Yields:
+        Business dictionaries in ranking order
+    """
+    api_key = api_key or GOOGLE_API_KEY
+    
+    def fetch_page(page_token):
+        if page_token:
+            params = {'pagetoken': page_token, 'key': api_key}
+        else:
+            params = {
+                'query': f"{query} in {location}",
+                'key': api_key,
+                'fields': 'place_id,name,rating,user_ratings_total,formatted_address'
+            }
+        return places_client.request_json('place/textsearch/json', params)
+    
+    try:
+        yield from iter_results(fetch_page, max_results=max_results, max_pages=max_pages)
+    except requests.exceptions.RequestException as e:
+        print(f"Error searching businesses: {e}")
 
 
 def get_business_details(place_id: str, api_key: str = None) -> Optional[Dict]:
@@ -51,18 +101,10 @@ def get_business_details(place_id: str, api_key: str = None) -> Optional[Dict]:
     """
     api_key = api_key or GOOGLE_API_KEY
     
-    url = "https://maps.googleapis.com/maps/api/place/details/json"
-    params = {
-        'place_id': place_id,
-        'key': api_key,
-        'fields': 'place_id,name,rating,user_ratings_total,formatted_address,reviews'
-    }
+    fields = 'place_id,name,rating,user_ratings_total,formatted_address,reviews'
     
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        return data.get('result', {})
+        return places_client.get_place_details(place_id, fields, api_key=api_key)
     except requests.exceptions.RequestException as e:
         print(f"Error getting business details: {e}")
         return None
@@ -176,11 +176,11 @@ class YelpDataVisualizer:
             if i >= len(axes):
                 break
                 
-            ratings = user_data['all_ratings']
             is_suspicious = user_data['is_suspicious']
             
             # Create histogram of user's ratings
-            rating_counts = pd.Series(ratings).value_counts().sort_index()
+            rating_counts = pd.Series(user_data['rating_counts'], index=range(1, 6))
+            rating_counts = rating_counts[rating_counts > 0]
             colors = ['red', 'orange', 'yellow', 'lightgreen', 'green']
             bars = axes[i].bar(rating_counts.index, rating_counts.values, 
                              color=[colors[r-1] for r in rating_counts.index], alpha=0.7)
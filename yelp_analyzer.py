@@ -3,15 +3,17 @@ Google Places Review Analyzer - Main class for analyzing Google Places reviews a
 Updated to use Google Places API instead of Yelp due to Yelp's new paid-only model
 """
 import requests
-import pandas as pd
 import time
 import json
 import os
 from typing import List, Dict, Optional, Tuple
+import places_client
+from review_engine import low_rating_reviewer_keys, score_business
+from incremental_analysis import get_analysis_state
+from reviewer_index import author_key, index_reviews, indexed_user_reviews, indexed_user_stats
 from config import (
     GOOGLE_API_KEY, LOW_RATING_THRESHOLD, 
-    MIN_REVIEWS_FOR_ANALYSIS, SUSPICIOUS_THRESHOLD, 
-    DELAY_BETWEEN_REQUESTS, OUTPUT_DIR, REPORTS_DIR
+    OUTPUT_DIR, REPORTS_DIR, INCREMENTAL_ANALYSIS
 )
 
 
@@ -31,7 +33,7 @@ class GooglePlacesReviewAnalyzer:
         if not self.api_key:
             raise ValueError("Google Places API key is required. Set GOOGLE_API_KEY in config.py or pass api_key parameter")
         
-        self.base_url = "https://maps.googleapis.com/maps/api/place"
+        self.base_url = places_client.build_url('place')
         
         # Create output directories
         os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -42,7 +44,7 @@ class GooglePlacesReviewAnalyzer:
         
     def _make_request(self, endpoint: str, params: Dict = None) -> Dict:
         """
-        Make a request to Google Places API with rate limiting
+        Make a request to Google Places API (rate limited by the shared client)
         
         Args:
             endpoint: API endpoint
@@ -51,34 +53,24 @@ class GooglePlacesReviewAnalyzer:
         Returns:
             JSON response data
         """
-        time.sleep(DELAY_BETWEEN_REQUESTS)
-        
-        params = params or {}
-        params['key'] = self.api_key
-        url = f"{self.base_url}/{endpoint}"
-        
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+        return places_client.request_json(f"place/{endpoint}", params, api_key=self.api_key)
     
-    def get_business_reviews(self, place_id: str) -> List[Dict]:
+    def get_business_reviews(self, place_id: str, raise_errors: bool = False) -> List[Dict]:
         """
         Get all reviews for a specific business
         
         Args:
             place_id: Google Places place ID
+            raise_errors: Raise API errors (open circuit, exhausted quota, ...) instead of
+                returning no reviews, so callers can tell a failure from a place without reviews
             
         Returns:
             List of review dictionaries
         """
-        params = {
-            'place_id': place_id,
-            'fields': 'place_id,name,rating,user_ratings_total,formatted_address,reviews'
-        }
+        fields = 'place_id,name,rating,user_ratings_total,formatted_address,reviews'
         
         try:
-            data = self._make_request('details/json', params)
-            business_details = data.get('result', {})
+            business_details = places_client.get_place_details(place_id, fields, api_key=self.api_key)
             
             if not business_details:
                 return []
@@ -92,47 +84,102 @@ class GooglePlacesReviewAnalyzer:
                     'rating': review.get('rating', 0),
                     'text': review.get('text', ''),
                     'user': {
-                        'id': review.get('author_name', 'Unknown'),
-                        'name': review.get('author_name', 'Unknown')
+                        # Contributor ID when Google provides one; names are not unique
+                        'id': author_key(review) or review.get('author_name', 'Unknown'),
+                        'name': review.get('author_name', 'Unknown'),
+                        'url': review.get('author_url', '')
                     },
                     'time_created': review.get('time', 0),
                     'profile_photo_url': review.get('profile_photo_url', '')
                 }
                 formatted_reviews.append(formatted_review)
-            
+
+            # Build up reviewer histories from every business we look at
+            index_reviews(place_id, business_details.get('name', ''), formatted_reviews)
+
             return formatted_reviews
             
         except requests.exceptions.RequestException as e:
+            if raise_errors:
+                raise
             print(f"Error fetching reviews: {e}")
             return []
     
-    def get_user_reviews(self, user_name: str) -> List[Dict]:
+    def get_many_business_reviews(self, place_ids: List[str], concurrency: int = None) -> Dict[str, List[Dict]]:
         """
-        Get all reviews from a specific user (Note: This is limited by Google Places API)
-        For demonstration, we'll simulate this functionality
+        Get reviews for many businesses concurrently
         
         Args:
-            user_name: Google user name
+            place_ids: Google Places place IDs
+            concurrency: Maximum concurrent requests (defaults to ASYNC_CONCURRENCY)
             
         Returns:
-            List of user's review dictionaries
+            Dictionary mapping place ID to its list of review dictionaries
         """
-        # Note: Google Places API doesn't provide direct access to all reviews by a user
-        # This is a limitation of the public API. In a real implementation, you might:
-        # 1. Use web scraping (with proper permissions and rate limiting)
-        # 2. Build a database of reviews over time
-        # 3. Use other data sources
-        
-        # For now, we'll return cached data if available
-        if user_name in self.user_reviews_cache:
-            return self.user_reviews_cache[user_name]
-        
-        # Simulate user review data (in practice, this would come from your data source)
-        # This is just for demonstration purposes
-        simulated_reviews = self._simulate_user_reviews(user_name)
-        self.user_reviews_cache[user_name] = simulated_reviews
+        from async_places_client import get_reviews_many
+        return get_reviews_many(self, place_ids, concurrency)
+    
+    def analyze_many(self, place_ids: List[str], job: str = None, processes: int = None,
+                     restart: bool = False, incremental: bool = None) -> Dict[str, Dict]:
+        """
+        Analyze many businesses: fetched concurrently within the rate limit, scored on a
+        process pool, and checkpointed per business so a rerun resumes an unfinished batch
         
+        Args:
+            place_ids: Google Places place IDs
+            job: Checkpoint job ID (defaults to one derived from the place IDs)
+            processes: Scoring processes (defaults to BATCH_PROCESSES)
+            restart: Discard the batch's checkpoints and start over
+            incremental: Skip businesses whose reviews are unchanged since their last
+                analysis (defaults to INCREMENTAL_ANALYSIS)
+            
+        Returns:
+            Dictionary mapping place ID to its analysis results (or {'error': ...})
+        """
+        from batch_analysis import analyze_many
+        from config import BATCH_PROCESSES
+        if incremental is None:
+            incremental = INCREMENTAL_ANALYSIS
+        return analyze_many(self, place_ids, job=job, processes=processes or BATCH_PROCESSES, restart=restart,
+                            state=get_analysis_state() if incremental else None)
+    
+    def get_user_reviews(self, user_id: str) -> List[Dict]:
+        """
+        Get all reviews from a specific user (Note: This is limited by Google Places API)
+        Served from the reviewer index; simulated for users it knows too little about
+
+        Args:
+            user_id: Reviewer ID (Google contributor ID, or the name if there is none)
+
+        Returns:
+            List of user's review dictionaries
+        """
+        # Note: Google Places API doesn't provide direct access to all reviews by a user,
+        # so histories come from the reviews of every business we have fetched
+        indexed_reviews = indexed_user_reviews(user_id)
+        if indexed_reviews is not None:
+            return indexed_reviews
+
+        if user_id in self.user_reviews_cache:
+            return self.user_reviews_cache[user_id]
+
+        # Simulate user review data for demonstration purposes
+        simulated_reviews = self._simulate_user_reviews(user_id)
+        self.user_reviews_cache[user_id] = simulated_reviews
+
         return simulated_reviews
+
+    def get_user_stats(self, user_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Get running rating statistics of users from the reviewer index, without their reviews
+
+        Args:
+            user_ids: Reviewer IDs
+
+        Returns:
+            Dictionary mapping user ID to statistics, for users with enough indexed reviews
+        """
+        return indexed_user_stats(user_ids)
     
     def _simulate_user_reviews(self, user_id: str) -> List[Dict]:
         """
@@ -164,12 +211,15 @@ class GooglePlacesReviewAnalyzer:
         
         return reviews
     
-    def analyze_business_reviews(self, place_id: str) -> Dict:
+    def analyze_business_reviews(self, place_id: str, incremental: bool = None) -> Dict:
         """
         Main analysis function - analyzes reviews for a business and identifies suspicious reviewers
         
         Args:
             place_id: Google Places place ID to analyze
+            incremental: Reuse the previous analysis of this place: skip it if the reviews
+                are unchanged, otherwise only score reviewers with new reviews.
+                Defaults to INCREMENTAL_ANALYSIS
             
         Returns:
             Dictionary containing analysis results
@@ -182,67 +232,28 @@ class GooglePlacesReviewAnalyzer:
         if not reviews:
             return {"error": "No reviews found for this business"}
         
-        # Convert to DataFrame for easier analysis
-        df_reviews = pd.DataFrame(reviews)
-        
-        # Extract reviewer information
-        df_reviews['reviewer_id'] = df_reviews['user'].apply(lambda x: x['id'])
-        df_reviews['reviewer_name'] = df_reviews['user'].apply(lambda x: x['name'])
-        df_reviews['reviewer_image_url'] = df_reviews['user'].apply(lambda x: x.get('image_url', ''))
-        
-        # Identify low-rating reviewers
-        low_rating_reviewers = df_reviews[df_reviews['rating'] < LOW_RATING_THRESHOLD]
-        
-        print(f"Found {len(low_rating_reviewers)} reviews with rating < {LOW_RATING_THRESHOLD} stars")
-        print(f"Total reviews analyzed: {len(df_reviews)}")
-        
-        # Analyze each low-rating reviewer
-        suspicious_users = []
-        user_analysis = {}
+        if incremental is None:
+            incremental = INCREMENTAL_ANALYSIS
+        # Reviewers the index knows well enough are scored from their running statistics
+        if incremental:
+            state = get_analysis_state()
+            unchanged, known_stats = state.prepare(place_id, reviews, self.get_user_reviews, user_field='id',
+                                                   get_user_stats=self.get_user_stats)
+            if unchanged is not None:
+                print("Reviews unchanged since the last analysis, reusing its results")
+                return unchanged
+        else:
+            known_stats = self.get_user_stats(low_rating_reviewer_keys(reviews))
         
-        for _, review in low_rating_reviewers.iterrows():
-            user_id = review['reviewer_id']
-            user_name = review['reviewer_name']
-            
-            print(f"Analyzing user: {user_name} (ID: {user_id})")
-            
-            # Get all reviews from this user
-            user_reviews = self.get_user_reviews(user_id)
-            
-            if len(user_reviews) >= MIN_REVIEWS_FOR_ANALYSIS:
-                # Analyze user's review pattern
-                user_ratings = [r['rating'] for r in user_reviews]
-                low_rating_count = sum(1 for rating in user_ratings if rating < LOW_RATING_THRESHOLD)
-                low_rating_percentage = low_rating_count / len(user_ratings)
-                
-                user_analysis[user_id] = {
-                    'name': user_name,
-                    'total_reviews': len(user_reviews),
-                    'low_rating_count': low_rating_count,
-                    'low_rating_percentage': low_rating_percentage,
-                    'average_rating': sum(user_ratings) / len(user_ratings),
-                    'all_ratings': user_ratings,
-                    'is_suspicious': low_rating_percentage >= SUSPICIOUS_THRESHOLD,
-                    'target_business_rating': review['rating'],
-                    'target_business_comment': review.get('text', '')
-                }
-                
-                if low_rating_percentage >= SUSPICIOUS_THRESHOLD:
-                    suspicious_users.append(user_id)
-                    print(f"  [SUSPICIOUS] {low_rating_percentage:.1%} of reviews are low ratings")
-                else:
-                    print(f"  [NORMAL] {low_rating_percentage:.1%} of reviews are low ratings")
+        # Score every low-rating reviewer's history in one pass
+        results = score_business(place_id, reviews, self.get_user_reviews, key_column='reviewer_id', image_url=True,
+                                 known_stats=known_stats)
+        if incremental:
+            state.record(place_id, reviews, known_stats, results)
         
-        # Generate summary
-        results = {
-            'place_id': place_id,
-            'total_reviews': len(df_reviews),
-            'low_rating_reviews': len(low_rating_reviewers),
-            'suspicious_users_count': len(suspicious_users),
-            'user_analysis': user_analysis,
-            'suspicious_users': suspicious_users,
-            'all_reviews': df_reviews.to_dict('records')
-        }
+        print(f"Found {results['low_rating_reviews']} reviews with rating < {LOW_RATING_THRESHOLD} stars")
+        print(f"Total reviews analyzed: {results['total_reviews']}")
+        print(f"Reviewers analyzed: {len(results['user_analysis'])}, suspicious: {len(set(results['suspicious_users']))}")
         
         # Save results
         self._save_results(results)